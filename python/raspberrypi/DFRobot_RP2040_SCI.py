@@ -26,11 +26,92 @@
   @url https://github.com/DFRobot/DFRobot_RP2040_SCI
 '''
 import sys
-import smbus
+import os
+import errno
 import time
-import datetime
+import codecs
+import collections
+import threading
+import contextlib
+import bisect
+try:
+  ## Clock of the timeouts and deadlines, unit s, it does not jump when NTP or the user sets the system time
+  _monotonic = time.monotonic
+except AttributeError:
+  _monotonic = time.time
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+## Type of the decoded char strings, str on Python 3 and unicode on Python 2
+_text_type = type(u"")
+
+## One sensor attribute of a snapshot, value is a float or None if the attribute value is not numeric,
+## sku is the SKU list of the port as get_sku() returns it, e.g. "SEN0334,SEN0228" if several sensors share the port
+SCIReading = collections.namedtuple("SCIReading", ["port", "sku", "key", "value", "unit", "timestamp"])
+
+## One command of the module
+## opcode      Command of the command packet
+## response    Command of the response packet
+## encode      Name of the method turning the arguments into packet fields, None if they are the fields already,
+##             a field is one byte if it is an int, one byte per character if it is a char string
+## decode      Name of the method decoding the valid data of a successful response, None if the command has no valid data
+## length      Expected length of the valid data, None if it is variable
+## idempotent  Whether sending the command again has no other effect, such commands can share a transaction or be retried
+## latency     Typical time from the command to the response, unit s, None to learn it at run time
+## readback    Name of the command reading back the setting of a command which is not idempotent, None if it cannot be read back,
+##             the setting applied if the read value, or its last element, equals the last argument
+SCICommand = collections.namedtuple("SCICommand", ["opcode", "response", "encode", "decode", "length", "idempotent", "latency", "readback"])
+
+class DFRobot_RP2040_SCI_Transport:
+  '''!
+    @brief Transport interface of DFRobot_RP2040_SCI, implemented by the subclass of each physical interface,
+    @n see DFRobot_RP2040_SCI_IIC and DFRobot_RP2040_SCI_Sim
+  '''
 
-class DFRobot_RP2040_SCI:
+  def _send_packet(self, pkt):
+    '''!
+      @brief Write a command packet to the module
+      @param pkt List of data to be sent
+      @exception NotImplementedError The transport does not implement it
+    '''
+    raise NotImplementedError("_send_packet")
+
+  def _recv_data(self, length):
+    '''!
+      @brief Read bytes from the module
+      @param length Number of bytes to be read
+      @return The read data list, a byte which can not be read is 0
+      @exception NotImplementedError The transport does not implement it
+    '''
+    raise NotImplementedError("_recv_data")
+
+  def _recv_into(self, buf, start, length):
+    '''!
+      @brief Read bytes from the module into a buffer, by _recv_data() unless the transport reads into the buffer directly
+      @param buf    bytearray
+      @param start  Index of the first byte
+      @param length Number of bytes to be read
+    '''
+    if length:
+      buf[start:start + length] = bytearray(self._recv_data(length))
+
+  def _bus_key(self):
+    '''!
+      @brief Identify the physical bus of the module, modules on the same bus can not be accessed at the same time
+      @return A hashable bus identifier, each module has a bus of its own by default
+    '''
+    return id(self)
+
+  def _device_key(self):
+    '''!
+      @brief Identify the module, identical commands to the same module can share one transaction
+      @return A hashable module identifier, the bus identifier by default
+    '''
+    return self._bus_key()
+
+class DFRobot_RP2040_SCI(DFRobot_RP2040_SCI_Transport):
   ## Default I2C address
   RP2040_SCI_ADDR_0X21        =    0x21
   RP2040_SCI_ADDR_0X22        =    0x22
@@ -156,6 +237,95 @@ class DFRobot_RP2040_SCI:
 
   DEBUG_TIMEOUT_MS    = 2 #2s
 
+  '''enum Response wait strategy'''
+  ## Poll the response status every 50ms, the same as the Arduino driver
+  eWaitFixed     = 0
+  ## Spin shortly, then back off exponentially up to a ceiling, first poll delayed by the latency learned for each command
+  eWaitAdaptive  = 1
+
+  ## Polling interval of eWaitFixed, unit s
+  WAIT_FIXED_INTERVAL = 0.05
+
+  '''enum State of the recovery after CMD_RESET'''
+  ## Send CMD_RESET and let the module settle
+  eRecoveryReset  = 0
+  ## Probe the module with CMD_GET_VERSION
+  eRecoveryProbe  = 1
+  ## The module is responsive again
+  eRecoveryReady  = 2
+  ## The module did not respond within the recovery timeout
+  eRecoveryFailed = 3
+
+  ## Waiting time of one readiness probe, unit s
+  RECOVERY_PROBE_TIMEOUT = 0.2
+
+  ## Default number of bytes a resync may discard before it gives up, see set_resync()
+  RESYNC_LIMIT = 512
+  ## Bytes read while the module has no response ready: 0, or 0xFF from a released bus
+  IDLE_BYTES = (0x00, 0xFF)
+  ## Default time the response may take to follow a discarded response of another command, unit s, see set_resync()
+  RESYNC_IDLE = 0.2
+
+  ## Commands of the module by name, see SCICommand and _execute()
+  COMMANDS = {
+    "get_version":            SCICommand(CMD_GET_VERSION,      CMD_GET_VERSION,      None,          "_decode_version", 2,    True,  None, None),
+    "set_port1":              SCICommand(CMD_SET_IF0,          CMD_SET_IF0,          None,          None,              None, False, None, "get_port1"),
+    "get_port1":              SCICommand(CMD_READ_IF0,         CMD_READ_IF0,         None,          "_decode_port",    None, True,  None, None),
+    "set_port2":              SCICommand(CMD_SET_IF1,          CMD_SET_IF1,          None,          None,              None, False, None, "get_port2"),
+    "get_port2":              SCICommand(CMD_READ_IF1,         CMD_READ_IF1,         None,          "_decode_port",    None, True,  None, None),
+    "set_port3":              SCICommand(CMD_SET_IF2,          CMD_SET_IF2,          None,          None,              None, False, None, "get_port3"),
+    "get_port3":              SCICommand(CMD_READ_IF2,         CMD_READ_IF2,         None,          "_decode_port",    None, True,  None, None),
+    "set_i2c_address":        SCICommand(CMD_SET_ADDR,         CMD_READ_ADDR,        None,          None,              None, False, None, "get_i2c_address"),
+    "get_i2c_address":        SCICommand(CMD_READ_ADDR,        CMD_READ_ADDR,        None,          "_decode_u8",      1,    True,  None, None),
+    "adjust_rtc":             SCICommand(CMD_SET_TIME,         CMD_SET_TIME,         "_encode_rtc", None,              None, False, None, None),
+    "get_rtc_time":           SCICommand(CMD_GET_TIME,         CMD_GET_TIME,         None,          "_decode_rtc",     8,    True,  None, None),
+    "enable_record":          SCICommand(CMD_RECORD_ON,        CMD_RECORD_ON,        None,          None,              None, False, None, None),
+    "disable_record":         SCICommand(CMD_RECORD_OFF,       CMD_RECORD_OFF,       None,          None,              None, False, None, None),
+    "display_on":             SCICommand(CMD_SCREEN_ON,        CMD_SCREEN_ON,        None,          None,              None, False, None, None),
+    "display_off":            SCICommand(CMD_SCREEN_OFF,       CMD_SCREEN_OFF,       None,          None,              None, False, None, None),
+    "get_keys":               SCICommand(CMD_GET_NAME,         CMD_GET_NAME,         None,          "_decode_text",    None, True,  None, None),
+    "get_values":             SCICommand(CMD_GET_VALUE,        CMD_GET_VALUE,        None,          "_decode_text",    None, True,  None, None),
+    "get_units":              SCICommand(CMD_GET_UNIT,         CMD_GET_UNIT,         None,          "_decode_text",    None, True,  None, None),
+    "get_sku":                SCICommand(CMD_GET_SKU,          CMD_GET_SKU,          None,          "_decode_text",    None, True,  None, None),
+    "get_information":        SCICommand(CMD_GET_INFO,         CMD_GET_INFO,         None,          "_decode_text",    None, True,  None, None),
+    "get_value0":             SCICommand(CMD_GET_KEY_VALUE0,   CMD_GET_KEY_VALUE0,   None,          "_decode_text",    None, True,  None, None),
+    "get_value1":             SCICommand(CMD_GET_KEY_VALUE1,   CMD_GET_KEY_VALUE1,   None,          "_decode_text",    None, True,  None, None),
+    "get_value2":             SCICommand(CMD_GET_KEY_VALUE2,   CMD_GET_KEY_VALUE2,   None,          "_decode_text",    None, True,  None, None),
+    "get_unit0":              SCICommand(CMD_GET_KEY_UINT0,    CMD_GET_KEY_UINT0,    None,          "_decode_text",    None, True,  None, None),
+    "get_unit1":              SCICommand(CMD_GET_KEY_UINT1,    CMD_GET_KEY_UINT1,    None,          "_decode_text",    None, True,  None, None),
+    "get_unit2":              SCICommand(CMD_GET_KEY_UINT2,    CMD_GET_KEY_UINT2,    None,          "_decode_text",    None, True,  None, None),
+    "get_analog_sensor_sku":  SCICommand(CMD_SKU_A,            CMD_SKU_A,            None,          "_decode_text",    None, True,  None, None),
+    "get_digital_sensor_sku": SCICommand(CMD_SKU_D,            CMD_SKU_D,            None,          "_decode_text",    None, True,  None, None),
+    "get_i2c_sensor_sku":     SCICommand(CMD_SKU_IIC,          CMD_SKU_IIC,          None,          "_decode_text",    None, True,  None, None),
+    "get_uart_sensor_sku":    SCICommand(CMD_SKU_UART,         CMD_SKU_UART,         None,          "_decode_text",    None, True,  None, None),
+    "get_timestamp":          SCICommand(CMD_GET_TIMESTAMP,    CMD_GET_TIMESTAMP,    None,          "_decode_text",    None, True,  None, None),
+    "set_refresh_rate":       SCICommand(CMD_SET_REFRESH_TIME, CMD_SET_REFRESH_TIME, None,          None,              None, False, None, "get_refresh_rate"),
+    "get_refresh_rate":       SCICommand(CMD_GET_REFRESH_TIME, CMD_GET_REFRESH_TIME, None,          "_decode_u8",      None, True,  None, None),
+  }
+
+  ## Upper bounds of the latency histogram buckets of get_metrics(), unit s, 10us to 10s in steps of 25%
+  LATENCY_BUCKETS = tuple(0.00001 * 1.25 ** i for i in range(63))
+
+  ## Polling period of stream() when the refresh rate is eRefreshRateMs, and the shortest retry interval, unit s
+  STREAM_MIN_PERIOD = 0.1
+
+  ## Size of the receive buffer, status, command, length and valid data, the valid data of a longer response
+  ## is streamed through it in RX_CHUNK bytes reads and decoded as it arrives
+  RX_BUFFER_SIZE = 256
+  ## Size of the reads of a streamed response, the same as IIC_MAX_TRANSFER of the firmware
+  RX_CHUNK = 32
+
+  ## Encoded packets of the commands without arguments, by opcode
+  _packets   = {}
+  ## Lock of each bus, shared by all the instances in the process, see _bus_key()
+  _bus_locks = {}
+  ## Transactions in progress which can be shared, see enable_coalescing()
+  _inflight  = {}
+  ## Guard of _bus_locks and _inflight
+  _bus_guard = threading.Lock()
+  ## Deadline of the commands of the current thread, see deadline()
+  _deadlines = threading.local()
+
   ## Normal communication
   ERR_CODE_NONE            =   0x00 
   ## Invalid command
@@ -179,6 +349,9 @@ class DFRobot_RP2040_SCI:
   ## Invalid I2C address
   ERR_CODE_I2C_ADRESS      =   0x0A 
 
+  ## Errors after which a command can be tried again, see set_retry()
+  RETRY_ERRORS = frozenset([ERR_CODE_RES_TIMEOUT, ERR_CODE_RES_PKT])
+
   INDEX_CMD        = 0
   INDEX_ARGS_NUM_L = 1
   INDEX_ARGS_NUM_H = 2
@@ -205,9 +378,46 @@ class DFRobot_RP2040_SCI:
   INDEX_SKU      = 2
 
   SKU_MAX_VAILD_LEN = 7
+
+  ## Pattern of one "name:value unit" attribute of CMD_GET_INFO, optionally led by the timestamp "00:00:00" or "00:00.00"
+  INFO_REGEX = r'(?:^|,)\s*(?:(\d{1,2}:\d{2}(?::\d{2}|\.\d{1,2}))\s+)?([^:,]+):([^\s,]*) ?([^,]*)'
+  ## INFO_REGEX compiled by the first _parse_information(), so that re is not imported until then
+  INFO_PATTERN = None
   
   def __init__(self):
-    pass
+    self._wait_strategy = self.eWaitAdaptive
+    self._wait_initial  = 0.0005
+    self._wait_ceiling  = 0.05
+    self._latency_hint  = self._default_latency()
+    self._recovery_timeout = 2
+    self._recovery_settle  = 0.005
+    self._recovery_stats   = {"count": 0, "failed": 0, "total_time": 0.0, "last_time": 0.0, "max_time": 0.0}
+    self._layout      = []
+    self._layout_keys = None
+    self._layout_inf  = None
+    self._schema_cache_on     = False
+    self._schema_revalidate   = 0
+    self._schema_checked_time = 0
+    self._schema = {}
+    self._catalogue_path    = None
+    self._catalogue_version = None
+    self._catalogue = {}
+    self._bus_rlock = None
+    self._rx = bytearray(self.RX_BUFFER_SIZE)
+    self._rx_view = memoryview(self._rx)
+    self._coalesce  = False
+    self._lock_stats = {"count": 0, "contended": 0, "total_wait": 0.0, "max_wait": 0.0, "coalesced": 0}
+    self._retry = (1, None, None, 0.005)
+    self._retry_stats = {"retries": 0, "readbacks": 0, "confirmed": 0, "exhausted": 0}
+    self._resync_limit = 0
+    self._resync_idle = self.RESYNC_IDLE
+    self._resync_stats = {"resyncs": 0, "skipped": 0, "failed": 0}
+    self._metrics      = None
+    self._metrics_hook = None
+    self._prefetch       = None
+    self._prefetch_cache = None
+    self._prefetch_generation = 0
+    self._prefetch_stats = {"hits": 0, "misses": 0, "refreshes": 0}
   
   def begin(self):
     '''!
@@ -216,7 +426,10 @@ class DFRobot_RP2040_SCI:
       @n       0      Init successful
       @n      others  Init failed
     '''
-    self._reset(self.CMD_RESET)
+    self._invalidate_schema()
+    self._catalogue_version = None
+    if self._reset(self.CMD_RESET) != self.eRecoveryReady:
+      return -1
     return 0
   
   def get_version(self):
@@ -229,23 +442,11 @@ class DFRobot_RP2040_SCI:
       @n     Digital sensor SKU, means selecting the SKU of a digital sensor and configuring to digital sensor mode
       @return 16-bit version data
     '''
-    rslt = [0,0,"NULL"]
-    version = 0
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_VERSION
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
+    rslt = self._execute("get_version")[1]
+    if rslt is None:
+      return 0
+    return rslt
 
-    recv_pkt = self._recv_packet(self.CMD_GET_VERSION)
-    rslt[self.INDEX_ERR_CODE] = recv_pkt[self.INDEX_RES_ERR]
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length == 2:
-        version = ((recv_pkt[self.INDEX_RES_DATA] << 8) | recv_pkt[self.INDEX_RES_DATA + 1]) & 0xFFFF
-    return version
-  
   def get_version_description(self, version):
     '''!
       @brief Get version description char string
@@ -281,22 +482,12 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_SKU          or 0x08  The SKU is invalid SKU or unsupported by the SCI Acquisition Module
       @n      ERR_CODE_S_NO_SPACE   or 0x09  Insufficient memory of I2C peripheral(slave)
     '''
-    length = len(sku)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_IF0
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    i = 0
-    for c in sku:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
+    if self._catalogue_path is not None and self.check_sku(self.ePort1, sku) == self.ERR_CODE_SKU:
+      return self.ERR_CODE_SKU
+    rslt = self._execute("set_port1", sku)
+    self._invalidate_schema()
+    return rslt[self.INDEX_ERR_CODE]
 
-    recv_pkt = self._recv_packet(self.CMD_SET_IF0)
-    return recv_pkt[self.INDEX_RES_ERR]
-  
   def get_port1(self):
     '''!
       @brief Get the sensor mode on port1 and SKU config
@@ -305,25 +496,11 @@ class DFRobot_RP2040_SCI:
       @n      The first element in the list: sensor mode
       @n      The second element in the list: sku config
     '''
-    rslt = [0,0,"NULL"]
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_READ_IF0
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
+    rslt = self._execute("get_port1")
+    if rslt[1] is None:
+      return [rslt[self.INDEX_ERR_CODE], 0, "NULL"]
+    return [rslt[self.INDEX_ERR_CODE]] + rslt[1]
 
-    recv_pkt = self._recv_packet(self.CMD_READ_IF0)
-    rslt[self.INDEX_ERR_CODE] = recv_pkt[self.INDEX_RES_ERR]
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        rslt[self.INDEX_MODE] = recv_pkt[self.INDEX_RES_DATA]
-        rslt[self.INDEX_SKU]  = ""
-        for data in recv_pkt[self.INDEX_RES_DATA + 1:]:
-          rslt[self.INDEX_SKU] += chr(data)
-    return rslt
-  
   def set_port2(self, sku):
     '''!
       @brief Set SKU on Port2, which can be connected to I2C or UART sensor. I2C sensors can be auto selected when connected,
@@ -341,21 +518,11 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_SKU          or 0x08  The SKU is invalid SKU or unsupported by the SCI Acquisition Module
       @n      ERR_CODE_S_NO_SPACE   or 0x09  Insufficient memory of I2C peripheral(slave)
     '''
-    length = len(sku)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_IF2
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    i = 0
-    for c in sku:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SET_IF2)
-    return recv_pkt[self.INDEX_RES_ERR]
+    if self._catalogue_path is not None and self.check_sku(self.ePort2, sku) == self.ERR_CODE_SKU:
+      return self.ERR_CODE_SKU
+    rslt = self._execute("set_port2", sku)
+    self._invalidate_schema()
+    return rslt[self.INDEX_ERR_CODE]
 
   def get_port2(self):
     '''!
@@ -365,24 +532,10 @@ class DFRobot_RP2040_SCI:
       @n      The first element in the list: sensor mode
       @n      The second element in the list: sku config
     '''
-    rslt = [0,0,"NULL"]
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_READ_IF1
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_READ_IF1)
-    rslt[self.INDEX_ERR_CODE] = recv_pkt[self.INDEX_RES_ERR]
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        rslt[self.INDEX_MODE] = recv_pkt[self.INDEX_RES_DATA]
-        rslt[self.INDEX_SKU]  = ""
-        for data in recv_pkt[self.INDEX_RES_DATA + 1:]:
-          rslt[self.INDEX_SKU] += chr(data)
-    return rslt
+    rslt = self._execute("get_port2")
+    if rslt[1] is None:
+      return [rslt[self.INDEX_ERR_CODE], 0, "NULL"]
+    return [rslt[self.INDEX_ERR_CODE]] + rslt[1]
 
   def set_port3(self, sku):
     '''!
@@ -401,21 +554,11 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_SKU          or 0x08  The SKU is invalid SKU or unsupported by the SCI Acquisition Module
       @n      ERR_CODE_S_NO_SPACE   or 0x09  Insufficient memory of I2C peripheral
     '''
-    length = len(sku)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_IF2
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    i = 0
-    for c in sku:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SET_IF2)
-    return recv_pkt[self.INDEX_RES_ERR]
+    if self._catalogue_path is not None and self.check_sku(self.ePort3, sku) == self.ERR_CODE_SKU:
+      return self.ERR_CODE_SKU
+    rslt = self._execute("set_port3", sku)
+    self._invalidate_schema()
+    return rslt[self.INDEX_ERR_CODE]
 
   def get_port3(self):
     '''!
@@ -425,36 +568,262 @@ class DFRobot_RP2040_SCI:
       @n      The first element in the list: sensor mode 
       @n      The second element in the list: sku config
     '''
-    rslt = [0,0,"NULL"]
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_READ_IF2
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_READ_IF2)
-    rslt[self.INDEX_ERR_CODE] = recv_pkt[self.INDEX_RES_ERR]
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        rslt[self.INDEX_MODE] = recv_pkt[self.INDEX_RES_DATA]
-        rslt[self.INDEX_SKU]  = ""
-        for data in recv_pkt[self.INDEX_RES_DATA + 1:]:
-          rslt[self.INDEX_SKU] += chr(data)
-    return rslt
-
+    rslt = self._execute("get_port3")
+    if rslt[1] is None:
+      return [rslt[self.INDEX_ERR_CODE], 0, "NULL"]
+    return [rslt[self.INDEX_ERR_CODE]] + rslt[1]
 
   def set_recv_timeout(self,timeout = 2):
     '''!
-      @brief Initalize the SCI Acquisition Module, mainly for initializing communication interface
-      @param timeout Set Timeout
-      @return int Init status
-      @n       0      Init successful
-      @n      others  Init failed
+      @brief Set the response timeout of the commands which are not run inside deadline()
+      @param timeout Response timeout, unit s
     '''
     self.DEBUG_TIMEOUT_MS = timeout
+
+  @contextlib.contextmanager
+  def deadline(self, timeout):
+    '''!
+      @brief Give the commands run inside the with block of the current thread, on any module, a time budget in common.
+      @n Each command waits for its response until the deadline instead of the timeout of set_recv_timeout(), the recovery
+      @n after an error ends at the deadline too, and a command which starts after the deadline returns ERR_CODE_RES_TIMEOUT
+      @n at once. A deadline inside another one cannot end later than the outer one, so a composite operation keeps its budget:
+      @n   with sci.deadline(5):
+      @n     sci.set_port1("SEN0161")
+      @n     with sci.deadline(0.03):
+      @n       values = sci.get_values(sci.eALL)
+      @param timeout Time budget from now, unit s
+    '''
+    outer = self._call_deadline()
+    at = self._now() + timeout
+    if outer is not None:
+      at = min(at, outer)
+    self._deadlines.at = at
+    try:
+      yield
+    finally:
+      self._deadlines.at = outer
     
+  def set_recv_wait(self, strategy = eWaitAdaptive, initial = 0.0005, ceiling = 0.05):
+    '''!
+      @brief Set how to wait for the response packet, trade CPU and bus load for latency
+      @param strategy Wait strategy
+      @n     eWaitFixed       Poll the response status every 50ms
+      @n     eWaitAdaptive    Poll after the latency learned for the command, start with a short interval and double it up to ceiling (default)
+      @param initial  First polling interval of eWaitAdaptive, unit s
+      @param ceiling  Maximum polling interval of eWaitAdaptive, unit s
+    '''
+    self._wait_strategy = strategy
+    self._wait_initial  = initial
+    self._wait_ceiling  = ceiling
+    self._latency_hint  = self._default_latency()
+
+  def set_recovery(self, timeout = 2, settle = 0.005):
+    '''!
+      @brief Set the recovery after CMD_RESET, which is sent by begin() and after a response packet error or timeout.
+      @n The module is probed for readiness right after settle, so recovery returns as soon as it responds again.
+      @param timeout Worst-case recovery time, unit s
+      @param settle  Waiting time between CMD_RESET and the first readiness probe, unit s
+    '''
+    self._recovery_timeout = timeout
+    self._recovery_settle  = settle
+
+  def get_recovery_stats(self):
+    '''!
+      @brief Get the recovery counters
+      @return Dict
+      @n      "count"       Number of recoveries
+      @n      "failed"      Number of recoveries in which the module did not respond within the timeout
+      @n      "total_time"  Total recovery time, unit s
+      @n      "last_time"   Time of the latest recovery, unit s
+      @n      "max_time"    Longest recovery time, unit s
+    '''
+    return dict(self._recovery_stats)
+
+  def enable_coalescing(self, enable = True):
+    '''!
+      @brief Let identical read commands which are issued at the same time from several threads share one transaction.
+      @n The threads that find the same command to the same module already in progress wait for it and get a copy of its response.
+      @param enable true or false
+    '''
+    self._coalesce = enable
+
+  def get_lock_stats(self):
+    '''!
+      @brief Get the counters of the bus lock, every command is one transaction which holds the lock of the bus
+      @return Dict
+      @n      "count"       Number of transactions
+      @n      "contended"   Number of transactions which waited for another one on the same bus
+      @n      "total_wait"  Total waiting time for the lock, unit s
+      @n      "max_wait"    Longest waiting time for the lock, unit s
+      @n      "coalesced"   Number of commands answered by a transaction of another thread
+    '''
+    return dict(self._lock_stats)
+
+  def set_retry(self, attempts = 1, attempt_timeout = None, total_timeout = None, backoff = 0.005):
+    '''!
+      @brief Set how a command is tried again after a response timeout or a response packet error.
+      @n Read commands are simply sent again. A setting command (set_port1/2/3(), set_refresh_rate(), set_i2c_address()) is
+      @n read back first: it is sent again only if the module answers with the old setting, and it is reported successful
+      @n if the module answers with the new one. The other setting commands are never sent again.
+      @n The delay before the next attempt is backoff, doubled after every attempt, with a random jitter of up to half of it.
+      @param attempts        Maximum number of attempts of a command, 1 means no retry (default)
+      @param attempt_timeout Response timeout of each attempt, unit s, None means the timeout of set_recv_timeout()
+      @param total_timeout   Time budget of a command including all attempts, recoveries and delays, unit s, None means no limit
+      @param backoff         Delay before the second attempt, unit s
+    '''
+    self._retry = (max(attempts, 1), attempt_timeout, total_timeout, backoff)
+
+  def get_retry_stats(self):
+    '''!
+      @brief Get the retry counters
+      @return Dict
+      @n      "retries"    Number of attempts after the first one
+      @n      "readbacks"  Number of settings read back after a failed attempt
+      @n      "confirmed"  Number of failed setting commands found applied by the read back
+      @n      "exhausted"  Number of commands which still failed when the attempts or the time budget ran out
+    '''
+    return dict(self._retry_stats)
+
+  def set_resync(self, enable = True, limit = RESYNC_LIMIT, idle = RESYNC_IDLE):
+    '''!
+      @brief Resynchronize to the response instead of resetting the module when the bytes read before it are not its header.
+      @n The rest of a response of another command, e.g. left by a command which timed out, is discarded by its length,
+      @n and stray bytes which are neither a response status nor an idle byte (0 or 0xFF) are skipped without waiting.
+      @n CMD_RESET is sent only if more than limit bytes had to be discarded, or if nothing followed a discarded response
+      @n within idle, e.g. the module answered the command with another one; it is always sent after a response timeout.
+      @param enable true or false, disabled by default: a response of another command is an ERR_CODE_RES_PKT error
+      @param limit  Maximum number of bytes discarded while waiting for one response
+      @param idle   Maximum time from a discarded response to the next byte of the response, unit s
+    '''
+    self._resync_limit = limit if enable else 0
+    self._resync_idle = idle
+
+  def get_resync_stats(self):
+    '''!
+      @brief Get the resynchronization counters
+      @return Dict
+      @n      "resyncs"  Number of responses received after discarding bytes
+      @n      "skipped"  Number of bytes discarded
+      @n      "failed"   Number of resyncs which ran out of the limit or of the idle time, followed by CMD_RESET
+    '''
+    return dict(self._resync_stats)
+
+  def enable_metrics(self, enable = True, hook = None):
+    '''!
+      @brief Measure every command and the bus traffic, see get_metrics(). Enabling clears the measurements.
+      @param enable true or false
+      @param hook   Called as hook(name, err, latency) after every command, name is the command method, e.g. "get_values",
+      @n            err is the error code and latency the time of the command including retries, unit s; None for no hook
+    '''
+    self._metrics_hook = hook
+    if not enable:
+      self._metrics = None
+      return
+    self._metrics = {"start": _monotonic(), "commands": {}, "bytes_written": 0, "bytes_read": 0, "polls": 0,
+                     "timeouts": 0, "pkt_errors": 0, "resets": 0, "reset_time": 0.0}
+
+  def get_metrics(self):
+    '''!
+      @brief Get the measurements since enable_metrics()
+      @return Dict, empty if the measurements are not enabled
+      @n      "elapsed"        Time since enable_metrics(), unit s
+      @n      "bytes_written"  Bytes sent to the module
+      @n      "bytes_read"     Bytes read from the module, including the polled response status
+      @n      "bytes_per_s"    Bytes sent and read per second
+      @n      "polls"          Polls of the response status
+      @n      "timeouts"       Response timeouts
+      @n      "pkt_errors"     Response packet errors
+      @n      "resets"         Recoveries after CMD_RESET
+      @n      "reset_time"     Total recovery time, unit s
+      @n      "commands"       Dict of each command method used, e.g. "get_values", with the keys
+      @n                       "count", "errors", "mean", "max", "p50", "p95", "p99", the latencies are in s,
+      @n                       the percentiles are the upper bound of their histogram bucket (at most 25% above)
+    '''
+    m = self._metrics
+    if m is None:
+      return {}
+    elapsed = _monotonic() - m["start"]
+    rslt = {"elapsed": elapsed, "bytes_per_s": (m["bytes_written"] + m["bytes_read"]) / elapsed if elapsed > 0 else 0.0}
+    for key in ("bytes_written", "bytes_read", "polls", "timeouts", "pkt_errors", "resets", "reset_time"):
+      rslt[key] = m[key]
+    commands = {}
+    for name, (count, errors, total, longest, buckets) in m["commands"].items():
+      commands[name] = {"count": count, "errors": errors, "mean": total / count, "max": longest,
+                        "p50": self._percentile(buckets, count, longest, 0.50),
+                        "p95": self._percentile(buckets, count, longest, 0.95),
+                        "p99": self._percentile(buckets, count, longest, 0.99)}
+    rslt["commands"] = commands
+    return rslt
+
+  def enable_schema_cache(self, enable = True, revalidate_interval = 0):
+    '''!
+      @brief Cache the results of get_sku(), get_keys() and get_units(), so that steady-state polling only needs get_values().
+      @n The cache is cleared by begin(), set_port1/2/3() and set_i2c_address().
+      @param enable true or false
+      @param revalidate_interval Compare get_sku(eALL) with the cached one at most once every revalidate_interval seconds,
+      @n     and clear the cache if an I2C sensor has been plugged or unplugged, 0 means never revalidate automatically
+    '''
+    self._schema_cache_on   = enable
+    self._schema_revalidate = revalidate_interval
+    self._invalidate_schema()
+
+  def revalidate_schema(self):
+    '''!
+      @brief Read get_sku(eALL) from the module and clear the cached attribute names, units and SKUs if it has changed
+      @return true if the cache is still valid, false if it has been cleared
+    '''
+    cached = self._schema.pop((self.CMD_GET_SKU, self.eALL), None)
+    self._schema_checked_time = self._now()
+    skus = self.get_sku(self.eALL)
+    if skus == cached:
+      return True
+    self._invalidate_schema()
+    self._set_schema(self.CMD_GET_SKU, self.eALL, skus)
+    return False
+
+  def enable_sku_catalogue_cache(self, path = None):
+    '''!
+      @brief Keep the supported SKU lists in a file, keyed by the firmware version, so that they are read from the module once per firmware.
+      @n set_port1/2/3() then check the SKU locally and return ERR_CODE_SKU without sending the command if it is unsupported.
+      @n The command is sent as usual when a supported SKU list could not be read.
+      @param path Cache file, default ~/.cache/DFRobot_RP2040_SCI/sku_catalogue.json
+    '''
+    if path is None:
+      path = os.path.join(os.path.expanduser("~"), ".cache", "DFRobot_RP2040_SCI", "sku_catalogue.json")
+    self._catalogue_path = path
+    self._catalogue = {}
+    try:
+      import json
+      with open(path, "r") as f:
+        self._catalogue = json.load(f)
+    except (IOError, OSError, ValueError):
+      pass
+
+  def check_sku(self, port, sku):
+    '''!
+      @brief Check whether the SKU can be set on the port, according to the supported SKU lists
+      @param port ePort1, ePort2 or ePort3
+      @param sku  SKU to check
+      @return Error code
+      @n      ERR_CODE_NONE         or 0x00  The SKU is supported on the port
+      @n      ERR_CODE_SKU          or 0x08  The SKU is invalid SKU or unsupported by the SCI Acquisition Module
+      @n      Other error codes              A supported SKU list could not be read, the SKU is not checked
+    '''
+    if port == self.ePort1:
+      supported = ["NULL", "Analog"]
+      lists = ((self.CMD_SKU_A, "get_analog_sensor_sku"), (self.CMD_SKU_D, "get_digital_sensor_sku"))
+    else:
+      supported = ["NULL"]
+      lists = ((self.CMD_SKU_IIC, "get_i2c_sensor_sku"), (self.CMD_SKU_UART, "get_uart_sensor_sku"))
+    for cmd, name in lists:
+      err, skus = self._sku_list(cmd, name)
+      if skus is None:
+        return err or self.ERR_CODE_RES_PKT
+      supported.append(skus)
+    if sku.upper() in ",".join(supported).upper().split(","):
+      return self.ERR_CODE_NONE
+    return self.ERR_CODE_SKU
+
   def adjust_rtc_datetime(self):
     '''!
       @brief Set the date and time of the SCI Acquisition Module to the current time of Raspbbery Pi
@@ -466,6 +835,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout 
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command 
     '''
+    import datetime
     time = datetime.datetime.now()
     week = self._day_of_week(time.year, time.month, time.day)
     return self.adjust_rtc(time.year, time.month, time.day, week, time.hour, time.minute, time.second)
@@ -489,24 +859,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout 
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command
     '''
-    length = 8
-    addr = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_TIME
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS + 0]        = second
-    pkt[self.INDEX_ARGS + 1]        = minute
-    pkt[self.INDEX_ARGS + 2]        = hour
-    pkt[self.INDEX_ARGS + 3]        = day
-    pkt[self.INDEX_ARGS + 4]        = week
-    pkt[self.INDEX_ARGS + 5]        = month
-    pkt[self.INDEX_ARGS + 6]        = year & 0xFF
-    pkt[self.INDEX_ARGS + 7]        = (year >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SET_TIME)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("adjust_rtc", year, month, day, week, hour, minute, second)[self.INDEX_ERR_CODE]
 
   def get_rtc_time(self):
     '''!
@@ -515,53 +868,11 @@ class DFRobot_RP2040_SCI:
       @n      The first data in the list: list year, month, day, week, hour, minute, second[year, month, day, week, hour, minute, second]
       @n      The second data in the list: char string, year/month/day week hour:minute/second e.g. 2022/08/09 2 09:08:00
     '''
-    rslt = [[0,0,0,0,0,0,0],"0000/00/00 0 00:00:00"]
-    length = 0
-    addr = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_TIME
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_TIME)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length == 8:
-        rslt1 = [0]*8
-        rslt1[self.INDEX_SECOND]   = recv_pkt[self.INDEX_RES_DATA + 0]
-        rslt1[self.INDEX_MINUTE]   = recv_pkt[self.INDEX_RES_DATA + 1]
-        rslt1[self.INDEX_HOUR]     = recv_pkt[self.INDEX_RES_DATA + 2]
-        rslt1[self.INDEX_DAY]      = recv_pkt[self.INDEX_RES_DATA + 3]
-        rslt1[self.INDEX_WEEK]     = recv_pkt[self.INDEX_RES_DATA + 4]
-        rslt1[self.INDEX_MONTH]    = recv_pkt[self.INDEX_RES_DATA + 5]
-        rslt1[self.INDEX_YEAR]     = recv_pkt[self.INDEX_RES_DATA + 6] | (recv_pkt[self.INDEX_RES_DATA + 7] << 8)
-        rslt1[self.INDEX_TIME_STR] = str(rslt1[self.INDEX_YEAR]) + '/'
-        if(rslt1[self.INDEX_MONTH] < 10):
-          rslt1[self.INDEX_TIME_STR] += '0'
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_MONTH]) + '/'
-
-        if(rslt1[self.INDEX_DAY] < 10):
-          rslt1[self.INDEX_TIME_STR] += '0'
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_DAY]) + ' '
-
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_WEEK]) + ' '
-
-        if(rslt1[self.INDEX_HOUR] < 10):
-          rslt1[self.INDEX_TIME_STR] += '0'
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_HOUR]) + ':'
-
-        if(rslt1[self.INDEX_MINUTE] < 10):
-          rslt1[self.INDEX_TIME_STR] += '0'
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_MINUTE]) + ':'
-
-        if(rslt1[self.INDEX_SECOND] < 10):
-          rslt1[self.INDEX_TIME_STR] += '0'
-        rslt1[self.INDEX_TIME_STR] += str(rslt1[self.INDEX_SECOND])
-        rslt[0] = rslt1[:7]
-        rslt[1] = rslt1[7]
+    rslt = self._execute("get_rtc_time")[1]
+    if rslt is None:
+      return [[0,0,0,0,0,0,0],"0000/00/00 0 00:00:00"]
     return rslt
-  
+
   def set_refresh_rate(self, rate):
     '''!
       @brief Set data refresh rate
@@ -583,16 +894,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command 
     '''
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_REFRESH_TIME
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = rate
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SET_REFRESH_TIME)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("set_refresh_rate", rate)[self.INDEX_ERR_CODE]
 
   def get_refresh_rate(self):
     '''!
@@ -610,20 +912,9 @@ class DFRobot_RP2040_SCI:
       @n      7 or eRefreshRate5min   5min, if the actual data refresh rate is less than this value, refresh at this rate, if greater than it, refresh at actual rate
       @n      8 or eRefreshRate10min  10min, if the actual data refresh rate is less than this value, refresh at this rate, if greater than it, refresh at actual rate
     '''
-    rslt = [0,0]
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_REFRESH_TIME
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_REFRESH_TIME)
-    rslt[self.INDEX_ERR_CODE] = recv_pkt[self.INDEX_RES_ERR]
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        rslt[self.INDEX_MODE] = recv_pkt[self.INDEX_RES_DATA]
+    rslt = self._execute("get_refresh_rate")
+    if rslt[1] is None:
+      rslt[1] = 0
     return rslt
 
   def get_refresh_rate_describe(self, rate):
@@ -655,20 +946,12 @@ class DFRobot_RP2040_SCI:
       @brief Get time stamp, also the data refresh time of the SCI Acquisition Module
       @return Hour:Minute:Second(00:00:00) or Minute:Second. X%(0-99)second(00:00.00)
     '''
-    rslt = ""
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_TIMESTAMP
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_TIMESTAMP)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(self.eALL)
+    if readings and readings[0].timestamp:
+      return readings[0].timestamp
+    rslt = self._execute("get_timestamp")[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_AD_sensor_mode_describe(self, mode):
@@ -720,15 +1003,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command
     '''
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_RECORD_ON
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_RECORD_ON)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("enable_record")[self.INDEX_ERR_CODE]
 
   def disable_record(self):
     '''!
@@ -741,15 +1016,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command
     '''
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_RECORD_OFF
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_RECORD_OFF)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("disable_record")[self.INDEX_ERR_CODE]
 
   def display_on(self):
     '''!
@@ -762,15 +1029,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command
     '''
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SCREEN_ON
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SCREEN_ON)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("display_on")[self.INDEX_ERR_CODE]
 
   def display_off(self):
     '''!
@@ -783,15 +1042,7 @@ class DFRobot_RP2040_SCI:
       @n      ERR_CODE_RES_TIMEOUT  or 0x04  Response package receive timeout
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command
     '''
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SCREEN_OFF
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SCREEN_OFF)
-    return recv_pkt[self.INDEX_RES_ERR]
+    return self._execute("display_off")[self.INDEX_ERR_CODE]
 
   def get_information(self, inf, timestamp = False):
     '''!
@@ -805,22 +1056,172 @@ class DFRobot_RP2040_SCI:
       @return The attribute information of all sensors connected to the designated one or more ports of the SCI Acquisition Module
       @n For example, SEN0334:  Temp_Air:28.65 C,Humi_Air:30.12 %RH
     '''
-    rslt = ""
-    length = 2
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_INFO
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    pkt[self.INDEX_ARGS + 1]   = timestamp
-    self._send_packet(pkt)
+    readings = self._prefetched(inf)
+    if readings is not None:
+      cache = self._prefetch_cache
+      if timestamp and (cache is not None) and (readings is cache[3]):
+        return cache[2]
+      if timestamp:
+        return ",".join(["%s %s:%s %s"%(r.timestamp, r.key, r.value, r.unit) for r in readings])
+      return ",".join(["%s:%s %s"%(r.key, r.value, r.unit) for r in readings])
+    rslt = self._execute("get_information", inf, timestamp)[1]
+    if rslt is None:
+      return ""
+    return rslt
 
-    recv_pkt = self._recv_packet(self.CMD_GET_INFO)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+  def get_snapshot(self, inf = eALL):
+    '''!
+      @brief Get the attributes of all sensors connected to the designated one or more ports with a single CMD_GET_INFO, parsed to typed readings
+      @param inf Designate one or more ports
+      @n     ePort1                                    Select port1, get attributes of all sensors connected to port1
+      @n     ePort2                                    Select port2, get attributes of all sensors connected to port2
+      @n     ePort3                                    Select port3, get attributes of all sensors connected to port3
+      @n     eALL  or  (ePort1 | ePort2 | ePort3)      Select port1, port2 and port3, get attributes of all sensors connected to all ports
+      @return List
+      @n      The zeroth element in the list: error code
+      @n      The first element in the list: list of SCIReading(port, sku, key, value, unit, timestamp)
+      @n For example, SEN0334 on port2:  [0, [SCIReading(2, "SEN0334", "Temp_Air", 28.65, "C", "12:30:45"), SCIReading(2, "SEN0334", "Humi_Air", 30.12, "%RH", "12:30:45")]]
+      @n The port and sku of each attribute are resolved from get_sku()/get_keys() of each port, which are read again only when the attribute names change,
+      @n sku is the SKU list of the port, so the attributes of several sensors on one port all carry the SKUs of all of them
+    '''
+    rslt = self._read_information(inf)
+    rslt[1] = self._typed(rslt[1])
+    return rslt
+
+  def _typed(self, readings):
+    '''!
+      @brief Convert the char string values of readings to float, None if the value is not numeric
+      @param readings List of SCIReading
+      @return New list of SCIReading
+    '''
+    typed = []
+    for reading in readings:
+      try:
+        value = float(reading.value)
+      except ValueError:
+        value = None
+      typed.append(reading._replace(value = value))
+    return typed
+
+  def stream(self, inf = eALL, period = None):
+    '''!
+      @brief Generator of the snapshots of the designated ports, which yields each sample of the module once.
+      @n The module is polled once per refresh period with get_timestamp(), and get_snapshot() is read only when the timestamp has changed.
+      @n Until a new sample appears, the timestamp is polled again every tenth of the period, so the polls lock onto the refresh of the module.
+      @param inf    Designate one or more ports, eALL by default
+      @param period Refresh period, unit s, None to use the refresh rate read from the module by get_refresh_rate()
+      @n     STREAM_MIN_PERIOD is used if the refresh rate is eRefreshRateMs
+      @return Snapshots the same as get_snapshot(), also yielded if the snapshot or the timestamp can not be read
+      @n For example:
+      @n   for err, readings in sci.stream():
+      @n     print(readings)
+    '''
+    if period is None:
+      rate = self.get_refresh_rate()
+      period = 0
+      if rate[self.INDEX_ERR_CODE] == self.ERR_CODE_NONE:
+        period = self.get_refresh_rate_describe(rate[self.INDEX_MODE])
+    period = max(period, self.STREAM_MIN_PERIOD)
+    retry = max(period / 10.0, self.STREAM_MIN_PERIOD)
+    last = None
+    while True:
+      t = _monotonic()
+      timestamp = self.get_timestamp()
+      if timestamp == "" or timestamp != last:
+        snapshot = self.get_snapshot(inf)
+        if snapshot[self.INDEX_ERR_CODE] == self.ERR_CODE_NONE:
+          last = timestamp
+        yield snapshot
+        delay = period
+      else:
+        delay = retry
+      time.sleep(max(t + delay - _monotonic(), 0))
+
+  def enable_prefetch(self, enable = True, inf = eALL, period = None, max_age = None, callback = None):
+    '''!
+      @brief Keep the latest snapshot of the designated ports in memory, read by a background thread of this module.
+      @n get_information(), get_snapshot(), get_batch(), get_keys(), get_values(), get_units(), get_value0/1/2(),
+      @n get_unit0/1/2() and get_timestamp() are answered from it while it is not older than max_age, without a bus transaction;
+      @n an older snapshot, other ports or an attribute which is not in the snapshot are read from the module as usual.
+      @n The thread polls get_timestamp() once per refresh period the same way as stream(), and reads CMD_GET_INFO only when it changed,
+      @n so the bus load does not depend on the number of readers.
+      @param enable  true or false, disabling stops the thread and empties the cache
+      @param inf     Ports to prefetch, eALL by default
+      @param period  Refresh period, unit s, None to use the refresh rate read from the module by get_refresh_rate()
+      @n     STREAM_MIN_PERIOD is used if it is shorter
+      @param max_age Staleness bound of the snapshot, unit s, None for twice the refresh period
+      @param callback Called as callback(sci, t, snapshot) in the prefetch thread after each new snapshot,
+      @n     t is the host time.time() of the read, snapshot is the same as the return value of get_snapshot()
+    '''
+    prefetch = self._prefetch
+    if prefetch is not None:
+      prefetch[0].set()
+      if prefetch[1] is not threading.current_thread():
+        prefetch[1].join()
+      self._prefetch = None
+      self._prefetch_cache = None
+    if not enable:
+      return
+    if period is None:
+      rate = self.get_refresh_rate()
+      period = 0
+      if rate[self.INDEX_ERR_CODE] == self.ERR_CODE_NONE:
+        period = self.get_refresh_rate_describe(rate[self.INDEX_MODE])
+    period = max(period, self.STREAM_MIN_PERIOD)
+    if max_age is None:
+      max_age = 2 * period
+    stop = threading.Event()
+    thread = threading.Thread(target = self._prefetch_run, args = (stop, inf, period, callback))
+    thread.daemon = True
+    self._prefetch = (stop, thread, max_age)
+    thread.start()
+
+  def get_prefetch_stats(self):
+    '''!
+      @brief Get the prefetch counters
+      @return Dict
+      @n      "hits"       Number of reads answered from the prefetched snapshot
+      @n      "misses"     Number of reads which went to the module while prefetch is enabled
+      @n      "refreshes"  Number of snapshots read by the prefetch thread
+      @n      "age"        Age of the prefetched snapshot, unit s, None if there is none
+    '''
+    stats = dict(self._prefetch_stats)
+    cache = self._prefetch_cache
+    stats["age"] = None if cache is None else _monotonic() - cache[0]
+    return stats
+
+  def get_batch(self, requests):
+    '''!
+      @brief Get the data values and units of several attributes with a single CMD_GET_INFO, instead of one get_value/get_unit command each
+      @param requests List of (inf, sku, keys) tuples
+      @n     (inf, None, keys)    The same as get_value1(inf, keys) and get_unit1(inf, keys), eALL as inf is the same as get_value0(keys) and get_unit0(keys)
+      @n     (inf, sku, keys)     The same as get_value2(inf, sku, keys) and get_unit2(inf, sku, keys)
+      @return List
+      @n      The zeroth element in the list: error code
+      @n      The first element in the list: list of [values, units], one for each request, separate values or units of several sensors using ","
+      @n For example, [(eALL, None, "Temp_Air"), (ePort2, "SEN0334", "Humi_Air")]:  [0, [["28.65", "C"], ["30.12", "%RH"]]]
+      @n A request with sku for a port which several sensors share is read with get_value2() and get_unit2(), as the snapshot
+      @n does not tell which of the sensors of the port an attribute belongs to
+    '''
+    inf = 0
+    for request in requests:
+      inf |= request[0]
+    rslt = self._read_information(inf)
+    index = {}
+    for reading in rslt[1]:
+      index.setdefault(reading.key, []).append(reading)
+    found = []
+    for port, sku, keys in requests:
+      readings = self._of_sku([r for r in index.get(keys, []) if (r.port & port) or (port == self.eALL)], sku)
+      if readings is not None:
+        found.append([",".join([r.value for r in readings]), ",".join([r.unit for r in readings])])
+        continue
+      value = self._execute("get_value2", port, sku, keys)
+      unit = self._execute("get_unit2", port, sku, keys)
+      if rslt[self.INDEX_ERR_CODE] == self.ERR_CODE_NONE:
+        rslt[self.INDEX_ERR_CODE] = value[self.INDEX_ERR_CODE] or unit[self.INDEX_ERR_CODE]
+      found.append([value[1] or "", unit[1] or ""])
+    rslt[1] = found
     return rslt
 
   def get_sku(self, inf):
@@ -834,21 +1235,13 @@ class DFRobot_RP2040_SCI:
       @return The SKUs of all sensors connected to the designated one or more ports of the SCI Acquisition Module
       @n For example:  SEN0161,SEN0334
     '''
-    rslt = ""
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_SKU
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_SKU)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._get_schema(self.CMD_GET_SKU, inf)
+    if rslt is not None:
+      return rslt
+    rslt = self._execute("get_sku", inf)[1]
+    if rslt is None:
+      return ""
+    self._set_schema(self.CMD_GET_SKU, inf, rslt)
     return rslt
 
   def get_keys(self, inf):
@@ -862,21 +1255,16 @@ class DFRobot_RP2040_SCI:
       @return The attribute names of all sensors connected to the designated one or more ports of the SCI Acquisition Module
       @n For example:  Temp_Air,Humi_Air
     '''
-    rslt = ""
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_NAME
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_NAME)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._get_schema(self.CMD_GET_NAME, inf)
+    if rslt is not None:
+      return rslt
+    readings = self._prefetched(inf)
+    if readings is not None:
+      return ",".join([r.key for r in readings])
+    rslt = self._execute("get_keys", inf)[1]
+    if rslt is None:
+      return ""
+    self._set_schema(self.CMD_GET_NAME, inf, rslt)
     return rslt
 
   def get_values(self, inf):
@@ -890,21 +1278,12 @@ class DFRobot_RP2040_SCI:
       @return The attribute data values of all sensors connected to the designated one or more ports of the SCI Acquisition Module
       @n For example:  28.65,30.12
     '''
-    rslt = ""
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_VALUE
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_VALUE)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(inf)
+    if readings is not None:
+      return ",".join([r.value for r in readings])
+    rslt = self._execute("get_values", inf)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_units(self, inf):
@@ -918,21 +1297,16 @@ class DFRobot_RP2040_SCI:
       @return The attribute units of all sensors connected to the designated one or more ports of the SCI Acquisition Module
       @n For example:  C,%RH
     '''
-    rslt = ""
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_UNIT
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_UNIT)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._get_schema(self.CMD_GET_UNIT, inf)
+    if rslt is not None:
+      return rslt
+    readings = self._prefetched(inf)
+    if readings is not None:
+      return ",".join([r.unit for r in readings])
+    rslt = self._execute("get_units", inf)[1]
+    if rslt is None:
+      return ""
+    self._set_schema(self.CMD_GET_UNIT, inf, rslt)
     return rslt
 
   def get_value0(self, keys):
@@ -942,24 +1316,12 @@ class DFRobot_RP2040_SCI:
       @return Data values of the attribute named keys from sensors connected to all ports. Separate attribute values using ","
       @n For example, Temp_Air:  28.65,28.65
     '''
-    rslt = ""
-    length = len(keys)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_VALUE0
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    i = 0
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_VALUE0)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(self.eALL, keys)
+    if readings is not None:
+      return ",".join([r.value for r in readings])
+    rslt = self._execute("get_value0", keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_value1(self, inf, keys):
@@ -974,27 +1336,12 @@ class DFRobot_RP2040_SCI:
       @return The data values of the attribute named keys from sensors connected to the designated port. Separate attribute values using ","
       @n For example, Temp_Air:  28.65,28.65
     '''
-    length = len(keys) + 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_VALUE1
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    i = 1
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-    
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_VALUE1)
-    rslt = ""
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(inf, keys)
+    if readings is not None:
+      return ",".join([r.value for r in readings])
+    rslt = self._execute("get_value1", inf, keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_value2(self, inf, sku, keys):
@@ -1013,30 +1360,12 @@ class DFRobot_RP2040_SCI:
       @ Separate attribute values using ","
       @n For example, Temp_Air:  28.65,28.65
     '''
-    length = len(keys) + 1 + len(sku)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_VALUE2
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    i = 1
-    for c in sku:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_VALUE2)
-    rslt = ""
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(inf, keys, sku)
+    if readings is not None:
+      return ",".join([r.value for r in readings])
+    rslt = self._execute("get_value2", inf, sku, keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_unit0(self, keys):
@@ -1046,26 +1375,12 @@ class DFRobot_RP2040_SCI:
       @return Data units of the attribute named keys from sensors connected to all ports. Separate attribute units using ","
       @n For example, Temp_Air:  C,C
     '''
-    length = len(keys)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_UINT0
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    i = 0
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_UINT0)
-    rslt = ""
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(self.eALL, keys)
+    if readings is not None:
+      return ",".join([r.unit for r in readings])
+    rslt = self._execute("get_unit0", keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_unit1(self, inf, keys):
@@ -1080,27 +1395,12 @@ class DFRobot_RP2040_SCI:
       @return The data units of the attribute named keys from sensors connected to the designated port. Separate attribute units using ","
       @n For example, Temp_Air:  C,C
     '''
-    length = len(keys) + 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_UINT1
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    i = 1
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_UINT1)
-    rslt = ""
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(inf, keys)
+    if readings is not None:
+      return ",".join([r.unit for r in readings])
+    rslt = self._execute("get_unit1", inf, keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_unit2(self, inf, sku, keys):
@@ -1118,30 +1418,12 @@ class DFRobot_RP2040_SCI:
       @ Separate attribute units using ","
       @n For example, Temp_Air:  C,C
     '''
-    length = len(keys) + 1 + len(sku)
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_GET_KEY_UINT2
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = inf
-    i = 1
-    for c in sku:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    for c in keys:
-      pkt[self.INDEX_ARGS + i] = ord(c)
-      i += 1
-    
-    #print(pkt)
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_GET_KEY_UINT2)
-    rslt = ""
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    readings = self._prefetched(inf, keys, sku)
+    if readings is not None:
+      return ",".join([r.unit for r in readings])
+    rslt = self._execute("get_unit2", inf, sku, keys)[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_analog_sensor_sku(self):
@@ -1149,41 +1431,19 @@ class DFRobot_RP2040_SCI:
       @brief Get the SKU list of analog sensors supported by SCI Acquisition Module
       @return SKU list of supported analog sensors, return NULL if there is not
     '''
-    rslt = ""
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SKU_A
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SKU_A)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._sku_list(self.CMD_SKU_A, "get_analog_sensor_sku")[1]
+    if rslt is None:
+      return ""
     return rslt
-  
+
   def get_digital_sensor_sku(self):
     '''!
       @brief Get the SKU list of digital sensors supported by SCI Acquisition Module
       @return SKU list of supported digital sensors, return NULL if there is not
     '''
-    rslt = ""
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SKU_D
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SKU_D)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._sku_list(self.CMD_SKU_D, "get_digital_sensor_sku")[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_i2c_sensor_sku(self):
@@ -1191,20 +1451,9 @@ class DFRobot_RP2040_SCI:
       @brief Get the SKU list of I2C sensors supported by SCI Acquisition Module
       @return SKU list of supported I2C sensors, return NULL if there is not
     '''
-    rslt = ""
-    length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SKU_IIC
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
-
-    recv_pkt = self._recv_packet(self.CMD_SKU_IIC)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
+    rslt = self._sku_list(self.CMD_SKU_IIC, "get_i2c_sensor_sku")[1]
+    if rslt is None:
+      return ""
     return rslt
 
   def get_uart_sensor_sku(self):
@@ -1212,76 +1461,886 @@ class DFRobot_RP2040_SCI:
       @brief Get the SKU list of UART sensors supported by SCI Acquisition Module
       @return SKU list of supported UART sensors, return NULL if there is not
     '''
-    rslt = ""
+    rslt = self._sku_list(self.CMD_SKU_UART, "get_uart_sensor_sku")[1]
+    if rslt is None:
+      return ""
+    return rslt
+
+  def _execute(self, name, *args):
+    '''!
+      @brief Run a command of COMMANDS: encode the packet, send it, receive and decode the response
+      @param name Name of the command in COMMANDS
+      @param args Arguments of the command
+      @return List
+      @n      The zeroth element in the list: error code
+      @n      The first element in the list: decoded valid data, True for a command without valid data,
+      @n      None if the response is not successful or the valid data is not as expected
+    '''
+    if self._metrics is None and self._metrics_hook is None:
+      return self._run_command(name, args)
+    t = self._now()
+    rslt = self._run_command(name, args)
+    self._count_command(name, rslt[self.INDEX_ERR_CODE], self._now() - t)
+    return rslt
+
+  def _run_command(self, name, args):
+    '''!
+      @brief Run a command of COMMANDS with the retries of set_retry()
+      @param name Name of the command in COMMANDS
+      @param args Tuple of the arguments of the command
+      @return The same as _execute
+    '''
+    command = self.COMMANDS[name]
+    fields = args
+    if command.encode is not None:
+      fields = getattr(self, command.encode)(*args)
+    pkt = self._encode_packet(command.opcode, fields)
+    attempts, timeout, total, delay = self._retry
+    deadline = self._call_deadline()
+    if (deadline is not None) and (timeout is None):
+      timeout = max(deadline - self._now(), 0)
+    if attempts == 1 and total is None:
+      return self._transact(pkt, command, timeout, deadline)
+    if total is not None:
+      if deadline is None:
+        deadline = self._now() + total
+      else:
+        deadline = min(deadline, self._now() + total)
+    attempt = 1
+    while True:
+      rslt = self._transact(pkt, command, timeout, deadline)
+      if rslt[self.INDEX_ERR_CODE] not in self.RETRY_ERRORS:
+        return rslt
+      if attempt >= attempts:
+        break
+      if not command.idempotent:
+        applied = self._read_back(command, args, timeout, deadline)
+        if applied:
+          return [self.ERR_CODE_NONE, True]
+        if applied is None:
+          break
+      wait = delay * (1 - self._random() / 2)
+      if (deadline is not None) and (self._now() + wait >= deadline):
+        break
+      self._sleep(wait)
+      self._count_retry("retries")
+      delay *= 2
+      attempt += 1
+    self._count_retry("exhausted")
+    return rslt
+
+  def _read_back(self, command, args, timeout, deadline):
+    '''!
+      @brief Find out whether a failed setting command applied, by its readback command
+      @param command  SCICommand which failed
+      @param args     Arguments of the command
+      @param timeout  Response timeout, None means the timeout of set_recv_timeout()
+      @param deadline Time by which the read back must be done, None means no limit
+      @return True if it applied, False if it did not, None if it cannot be told
+    '''
+    if command.readback is None:
+      return None
+    self._count_retry("readbacks")
+    readback = self.COMMANDS[command.readback]
+    value = self._transact(self._encode_packet(readback.opcode, ()), readback, timeout, deadline)[1]
+    if value is None:
+      return None
+    if isinstance(value, list):
+      value = value[-1]
+    if value == args[-1]:
+      self._count_retry("confirmed")
+      return True
+    return False
+
+  def _encode_packet(self, opcode, fields):
+    '''!
+      @brief Encode a command packet [cmd, len_l, len_h, args...] into a buffer of its exact size
+      @param opcode Command
+      @param fields Argument fields, an int is one byte, a char string is one byte per character
+      @return bytearray, shared by all the packets of the same command if there is no argument
+    '''
+    if not fields:
+      pkt = self._packets.get(opcode)
+      if pkt is None:
+        pkt = self._packets[opcode] = bytearray([opcode, 0, 0])
+      return pkt
     length = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SKU_UART
+    for field in fields:
+      length += 1 if isinstance(field, int) else len(field)
+    pkt = bytearray(3 + length)
+    pkt[self.INDEX_CMD]        = opcode
     pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
     pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
+    i = self.INDEX_ARGS
+    for field in fields:
+      if isinstance(field, int):
+        pkt[i] = field & 0xFF
+        i += 1
+      else:
+        pkt[i:i + len(field)] = codecs.latin_1_encode(field)[0]
+        i += len(field)
+    return pkt
 
-    recv_pkt = self._recv_packet(self.CMD_SKU_UART)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
+  def _encode_rtc(self, year, month, day, week, hour, minute, second):
+    '''!
+      @brief Argument fields of CMD_SET_TIME
+    '''
+    return (second, minute, hour, day, week, month, year & 0xFF, (year >> 8) & 0xFF)
+
+  def _transact(self, pkt, command, timeout = None, deadline = None):
+    '''!
+      @brief Send a command packet and receive its response as one transaction, no other transaction on the same bus
+      @n can come in between; identical idempotent commands in progress at the same time share one transaction if coalescing is enabled
+      @param pkt      Command packet
+      @param command  SCICommand
+      @param timeout  Response timeout, None means the timeout of set_recv_timeout()
+      @param deadline Time by which the transaction and the recovery after it must be done, None means no limit
+      @return The same as _execute
+    '''
+    if not (self._coalesce and command.idempotent):
+      return self._locked_transact(pkt, command, timeout, deadline)
+    key = (self._device_key(), bytes(pkt), command)
+    with self._bus_guard:
+      call = self._inflight.get(key)
+      if call is None:
+        call = self._inflight[key] = [threading.Event(), [self.ERR_CODE_RES_TIMEOUT, None]]
+        owner = True
+      else:
+        self._lock_stats["coalesced"] += 1
+        owner = False
+    if not owner:
+      # Wait for the owner within the own deadline of this caller
+      if deadline is None:
+        call[0].wait()
+      elif not call[0].wait(max(deadline - self._now(), 0)):
+        return [self.ERR_CODE_RES_TIMEOUT, None]
+      return list(call[1])
+    try:
+      call[1] = self._locked_transact(pkt, command, timeout, deadline)
+    finally:
+      with self._bus_guard:
+        del self._inflight[key]
+      call[0].set()
+    return list(call[1])
+
+  def _locked_transact(self, pkt, command, timeout = None, deadline = None):
+    '''!
+      @brief Send a command packet and receive its response, holding the lock of the bus
+      @param pkt      Command packet
+      @param command  SCICommand
+      @param timeout  Response timeout, None means the timeout of set_recv_timeout()
+      @param deadline Time by which the transaction and the recovery after it must be done, None means no limit
+      @return The same as _execute
+    '''
+    lock = self._bus_lock()
+    t = _monotonic()
+    contended = not lock.acquire(False)
+    if contended and not self._acquire(lock, deadline):
+      return [self.ERR_CODE_RES_TIMEOUT, None]
+    try:
+      wait = _monotonic() - t
+      self._lock_stats["count"] += 1
+      if contended:
+        self._lock_stats["contended"] += 1
+      self._lock_stats["total_wait"] += wait
+      self._lock_stats["max_wait"] = max(self._lock_stats["max_wait"], wait)
+      if (deadline is not None) and (self._now() >= deadline):
+        return [self.ERR_CODE_RES_TIMEOUT, None]
+      self._send_packet(pkt)
+      self._count_io(len(pkt), 0, 0)
+      return self._decode_response(self._recv_packet(command.response, timeout, deadline), command)
+    finally:
+      lock.release()
+
+  def _acquire(self, lock, deadline):
+    '''!
+      @brief Wait for a lock until the deadline
+      @param lock     threading.RLock
+      @param deadline Time by which the lock must be acquired, None means no limit
+      @return true if the lock is acquired, false if the deadline passed
+    '''
+    if deadline is None:
+      return lock.acquire()
+    try:
+      return lock.acquire(True, max(deadline - self._now(), 0))
+    except TypeError:
+      # Python 2 has no lock timeout
+      return lock.acquire()
+
+  def _decode_response(self, recv_pkt, command):
+    '''!
+      @brief Check a response packet and decode its valid data, before the receive buffer is reused
+      @param recv_pkt Return value of _recv_packet
+      @param command  SCICommand
+      @return The same as _execute
+    '''
+    err = recv_pkt[self.INDEX_RES_ERR]
+    if (len(recv_pkt) > self.INDEX_RES_DATA) and (err == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
+      if command.decode is None:
+        return [err, True]
+      if isinstance(recv_pkt[self.INDEX_RES_DATA], _text_type):
+        # Streamed by _read_payload and already decoded
+        if command.decode == "_decode_text":
+          return [err, recv_pkt[self.INDEX_RES_DATA]]
+        return [err, None]
       length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length:
-        for data in recv_pkt[self.INDEX_RES_DATA:]:
-          rslt += chr(data)
-    return rslt
+      if (command.length is None) or (length == command.length):
+        return [err, getattr(self, command.decode)(recv_pkt[self.INDEX_RES_DATA])]
+    return [err, None]
+
+  def _decode_text(self, data):
+    '''!
+      @brief Decode valid data to a char string, one character per byte
+      @param data Buffer of the valid data
+      @return str
+    '''
+    return codecs.latin_1_decode(data)[0]
+
+  def _decode_u8(self, data):
+    '''!
+      @brief Decode the first byte of valid data
+      @return int, None if there is no valid data
+    '''
+    if len(data) < 1:
+      return None
+    return bytearray(data[:1])[0]
 
-  def _recv_packet(self, cmd):
+  def _decode_version(self, data):
+    '''!
+      @brief Decode the valid data of CMD_GET_VERSION
+      @return 16-bit version data
+    '''
+    data = bytearray(data)
+    return ((data[0] << 8) | data[1]) & 0xFFFF
+
+  def _decode_port(self, data):
+    '''!
+      @brief Decode the valid data of CMD_READ_IF0/1/2
+      @return List [sensor mode, sku config], None if there is no valid data
+    '''
+    if len(data) < 1:
+      return None
+    return [bytearray(data[:1])[0], self._decode_text(data[1:])]
+
+  def _decode_rtc(self, data):
+    '''!
+      @brief Decode the valid data of CMD_GET_TIME
+      @return The same as get_rtc_time()
+    '''
+    data = bytearray(data)
+    rslt = [0]*7
+    rslt[self.INDEX_SECOND] = data[0]
+    rslt[self.INDEX_MINUTE] = data[1]
+    rslt[self.INDEX_HOUR]   = data[2]
+    rslt[self.INDEX_DAY]    = data[3]
+    rslt[self.INDEX_WEEK]   = data[4]
+    rslt[self.INDEX_MONTH]  = data[5]
+    rslt[self.INDEX_YEAR]   = data[6] | (data[7] << 8)
+    return [rslt, "%d/%02d/%02d %d %02d:%02d:%02d"%(rslt[self.INDEX_YEAR], rslt[self.INDEX_MONTH], rslt[self.INDEX_DAY],
+                                                    rslt[self.INDEX_WEEK], rslt[self.INDEX_HOUR], rslt[self.INDEX_MINUTE], rslt[self.INDEX_SECOND])]
+
+  def _default_latency(self):
+    '''!
+      @brief Expected response latency of the commands whose typical latency is given in COMMANDS
+      @return Dict, response command: latency
+    '''
+    hint = {}
+    for command in self.COMMANDS.values():
+      if command.latency is not None:
+        hint[command.response] = command.latency
+    return hint
+
+  def _bus_lock(self):
+    '''!
+      @brief Get the lock of the bus of the module, it is reentrant so that recovery can run inside a transaction
+      @return threading.RLock
+    '''
+    if self._bus_rlock is None:
+      with self._bus_guard:
+        key = self._bus_key()
+        if key not in self._bus_locks:
+          self._bus_locks[key] = threading.RLock()
+        self._bus_rlock = self._bus_locks[key]
+    return self._bus_rlock
+
+  def _recv_packet(self, cmd, timeout = None, deadline = None):
     '''!
       @brief Receive and parse the response data packet
-      @param cmd Command to receive the packet
+      @param cmd      Command to receive the packet
+      @param timeout  Response timeout, None means the timeout of set_recv_timeout()
+      @param deadline Time by which the packet and the recovery after an error must be done, None means no limit
       @return Error code and response packet list
       @n      The zeroth element in the list: error code, only when the error code is ERR_CODE_NONE, there can be other elements
       @n      The first element in the list: response packet status code, 0x53-correct response packet 0x63-wrong response packet
       @n      The second element in the list: response packet command, which indicates the response packet belongs to which communication command
       @n      The third element in the list: low byte of the valid data length after the response packet
       @n      The fourth element in the list: high byte of the valid data length after the response packet
-      @n      The 5th element or more in the list: valid data
+      @n      The 5th element in the list: valid data, memoryview of the receive buffer, which is reused by the next response,
+      @n      or the decoded str if it is longer than the receive buffer, see _stream_text()
     '''
-    rslt = [0] * 1
-    t = time.time()
-    while time.time() - t < self.DEBUG_TIMEOUT_MS:
-      status = self._recv_data(1)[0]
+    t = _monotonic()
+    if timeout is None:
+      timeout = self.DEBUG_TIMEOUT_MS
+    if deadline is not None:
+      timeout = min(timeout, max(deadline - self._now(), 0))
+    rslt = self._wait_packet(cmd, timeout)
+    if rslt[0] == self.ERR_CODE_RES_PKT:
+      self._count_error("pkt_errors")
+      self._reset(cmd, deadline)
+      print("Response pkt is error!")
+    elif rslt[0] == self.ERR_CODE_RES_TIMEOUT:
+      self._count_error("timeouts")
+      self._reset(self.CMD_RESET, deadline)
+      print("time out: %f"%(_monotonic() - t))
+    return rslt
+
+  def _wait_packet(self, cmd, timeout):
+    '''!
+      @brief Wait for the response data packet of cmd, without resetting the module on error
+      @param cmd     Command to receive the packet
+      @param timeout Waiting time, unit s
+      @return The same as _recv_packet
+    '''
+    t = _monotonic()
+    adaptive = (self._wait_strategy == self.eWaitAdaptive)
+    delay = self._wait_initial
+    polls = 0
+    skipped = 0
+    extra = 0
+    idle_end = None
+    if adaptive and cmd in self._latency_hint:
+      time.sleep(min(self._latency_hint[cmd] * 0.75, timeout))
+    while _monotonic() - t < timeout:
+      self._recv_into(self._rx, 0, 1)
+      polls += 1
+      status = self._rx[0]
       #print("status=%x"%status)
       if status == self.STATUS_SUCCESS or status == self.STATUS_FAILED:
-        command = self._recv_data(1)[0]
-        #print("command=%x cmd=%x"%(command,cmd))
-        if command != cmd:
-          self._reset(cmd)
-          rslt[0] = self.ERR_CODE_RES_PKT
-          print("Response pkt is error!")
-          return rslt
-        lenL = self._recv_data(2)
-        length = (lenL[1] << 2) | lenL[0]
-        #print("length=%x length=%d"%(length,length))
-        rslt[0] = self.ERR_CODE_NONE
-        rslt = rslt + [status, command, lenL[0], lenL[1]]
-        if length:
-          rslt = rslt + self._recv_data(length)
-        #print(rslt)
-        #print("time: %f"%(time.time() - t))
+        self._recv_into(self._rx, 1, 1)
+        #print("command=%x cmd=%x"%(self._rx[1],cmd))
+        if self._rx[1] != cmd:
+          if skipped < self._resync_limit:
+            n = self._skip_response(self._resync_limit - skipped)
+            skipped += n
+            extra += n - 1
+            idle_end = _monotonic() + self._resync_idle
+            continue
+          self._count_resync(skipped, False)
+          self._count_io(0, polls + 1 + extra, polls)
+          return [self.ERR_CODE_RES_PKT]
+        self._count_resync(skipped, True)
+        self._learn_latency(cmd, _monotonic() - t)
+        self._recv_into(self._rx, 2, 2)
+        rslt = self._read_payload()
+        self._count_io(0, polls + 3 + extra + len(rslt[self.INDEX_RES_DATA]), polls)
         return rslt
-      time.sleep(0.05)
-    self._reset(self.CMD_RESET)
-    print("time out: %f"%(time.time() - t))
+      if (status not in self.IDLE_BYTES) and self._resync_limit:
+        skipped += 1
+        if skipped > self._resync_limit:
+          self._count_resync(skipped, False)
+          self._count_io(0, polls + extra, polls)
+          return [self.ERR_CODE_RES_PKT]
+        continue
+      left = max(t + timeout - _monotonic(), 0)
+      if idle_end is not None:
+        # Nothing follows the discarded response, the module is not answering this command
+        if _monotonic() >= idle_end:
+          self._count_resync(skipped, False)
+          self._count_io(0, polls + extra, polls)
+          return [self.ERR_CODE_RES_PKT]
+        left = min(left, idle_end - _monotonic())
+      if adaptive:
+        time.sleep(min(delay, left))
+        delay = min(delay * 2, self._wait_ceiling)
+      else:
+        time.sleep(min(self.WAIT_FIXED_INTERVAL, left))
+    self._count_io(0, polls, polls)
     return [self.ERR_CODE_RES_TIMEOUT]
 
-  def _reset(self, cmd):
+  def _read_payload(self):
+    '''!
+      @brief Read the valid data of the response packet whose status, command and length are in the receive buffer
+      @return The same as _recv_packet
+    '''
+    rx = self._rx
+    status, command, lenL, lenH = rx[0], rx[1], rx[2], rx[3]
+    length = (lenH << 8) | lenL
+    #print("length=%x length=%d"%(length,length))
+    if 4 + length > len(rx):
+      return [self.ERR_CODE_NONE, status, command, lenL, lenH, self._stream_text(length)]
+    self._recv_into(rx, 4, length)
+    return [self.ERR_CODE_NONE, status, command, lenL, lenH, self._rx_view[4:4 + length]]
+
+  def _stream_text(self, length):
+    '''!
+      @brief Read valid data longer than the receive buffer in RX_CHUNK bytes reads, and decode each read at once
+      @param length Length of the valid data
+      @return str, only char string responses are that long
+    '''
+    parts = []
+    while length:
+      n = min(length, self.RX_CHUNK)
+      self._recv_into(self._rx, 4, n)
+      parts.append(codecs.latin_1_decode(self._rx_view[4:4 + n])[0])
+      length -= n
+    return u"".join(parts)
+
+  def _skip_response(self, limit):
+    '''!
+      @brief Discard the rest of a response of another command, whose status and command are in the receive buffer
+      @param limit Maximum number of bytes to discard
+      @return Number of bytes discarded, including the status and the command
+    '''
+    self._recv_into(self._rx, 2, 2)
+    length = min(self._rx[2] | (self._rx[3] << 8), max(limit - 4, 0))
+    left = length
+    while left:
+      n = min(left, self.RX_CHUNK)
+      self._recv_into(self._rx, 4, n)
+      left -= n
+    return 4 + length
+
+  def _count_resync(self, skipped, ok):
+    '''!
+      @brief Count the bytes discarded before a response
+      @param skipped Number of bytes discarded, nothing is counted if it is 0
+      @param ok      true if the response was found, false if the resync ran out of its limit
+    '''
+    if skipped:
+      stats = self._resync_stats
+      stats["skipped"] += skipped
+      if ok:
+        stats["resyncs"] += 1
+      else:
+        stats["failed"] += 1
+
+  def _learn_latency(self, cmd, elapsed):
+    '''!
+      @brief Update the expected response latency of the command, exponentially weighted over the history
+      @param cmd     Communication command
+      @param elapsed Time from the start of waiting to the response status, unit s
+    '''
+    hint = self._latency_hint.get(cmd)
+    if hint is None:
+      self._latency_hint[cmd] = elapsed
+    else:
+      self._latency_hint[cmd] = hint + (elapsed - hint) / 8.0
+
+  def _get_schema(self, cmd, inf):
+    '''!
+      @brief Get a cached result of get_sku(), get_keys() or get_units()
+      @param cmd CMD_GET_SKU, CMD_GET_NAME or CMD_GET_UNIT
+      @param inf The ports
+      @return The cached char string, None if it is not cached
+    '''
+    if not self._schema_cache_on:
+      return None
+    if self._schema_revalidate and (self._now() - self._schema_checked_time >= self._schema_revalidate):
+      self.revalidate_schema()
+    return self._schema.get((cmd, inf))
+
+  def _set_schema(self, cmd, inf, rslt):
+    '''!
+      @brief Cache a result of get_sku(), get_keys() or get_units()
+      @param cmd  CMD_GET_SKU, CMD_GET_NAME or CMD_GET_UNIT
+      @param inf  The ports
+      @param rslt The char string read from the module
+    '''
+    if self._schema_cache_on:
+      self._schema[(cmd, inf)] = rslt
+
+  def _invalidate_schema(self):
     '''!
-      @brief Reset the cache sending of SCI Acquisition Module
-      @param cmd Communication command
+      @brief Clear the cached attribute names, units, SKUs, the snapshot layout and the prefetched snapshot,
+      @n a snapshot which the prefetch thread is reading meanwhile is discarded as well
     '''
-    len = 1
-    pkt = [0] * (3 + len)
-    pkt[self.INDEX_CMD]        = self.CMD_RESET
-    pkt[self.INDEX_ARGS_NUM_L] = len & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (len >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = cmd
-    self._send_packet(pkt)
-    time.sleep(2)
+    self._prefetch_generation += 1
+    self._prefetch_cache = None
+    self._schema = {}
+    self._schema_checked_time = _monotonic()
+    self._layout_keys = None
+
+  def _sku_list(self, cmd, name):
+    '''!
+      @brief Get a supported SKU list from the catalogue cache, or read it from the module and cache it
+      @param cmd  CMD_SKU_A, CMD_SKU_D, CMD_SKU_IIC or CMD_SKU_UART
+      @param name Name of the command in COMMANDS
+      @return List
+      @n      The zeroth element in the list: error code
+      @n      The first element in the list: SKU list, None if it could not be read
+    '''
+    rslt = self._get_catalogue(cmd)
+    if rslt is not None:
+      return [self.ERR_CODE_NONE, rslt]
+    rslt = self._execute(name)
+    if rslt[1] is not None:
+      self._set_catalogue(cmd, rslt[1])
+    return rslt
+
+  def _get_catalogue(self, cmd):
+    '''!
+      @brief Get a cached supported SKU list of the current firmware
+      @param cmd CMD_SKU_A, CMD_SKU_D, CMD_SKU_IIC or CMD_SKU_UART
+      @return The cached SKU list, None if it is not cached
+    '''
+    if self._catalogue_path is None:
+      return None
+    if self._catalogue_version is None:
+      version = self.get_version()
+      if not version:
+        # Read again by the next call
+        return None
+      self._catalogue_version = self.get_version_description(version)
+    return self._catalogue.get(self._catalogue_version, {}).get(str(cmd))
+
+  def _set_catalogue(self, cmd, rslt):
+    '''!
+      @brief Cache a supported SKU list of the current firmware and write the cache file
+      @param cmd  CMD_SKU_A, CMD_SKU_D, CMD_SKU_IIC or CMD_SKU_UART
+      @param rslt The SKU list read from the module
+    '''
+    if (self._catalogue_path is None) or (self._catalogue_version is None):
+      return
+    self._catalogue.setdefault(self._catalogue_version, {})[str(cmd)] = rslt
+    try:
+      folder = os.path.dirname(self._catalogue_path)
+      if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+      import json
+      tmp = self._catalogue_path + ".%d"%os.getpid()
+      with open(tmp, "w") as f:
+        json.dump(self._catalogue, f)
+      os.rename(tmp, self._catalogue_path)
+    except (IOError, OSError):
+      pass
+
+  def _read_information(self, inf):
+    '''!
+      @brief Read and parse the timestamped attribute information of the designated ports, from the prefetch cache if it can
+      @param inf The ports
+      @return List
+      @n      The zeroth element in the list: error code
+      @n      The first element in the list: list of SCIReading, in which value is still a char string
+    '''
+    readings = self._prefetched(inf)
+    if readings is not None:
+      return [self.ERR_CODE_NONE, list(readings)]
+    info = self._execute("get_information", inf, True)
+    return [info[self.INDEX_ERR_CODE], self._to_readings(inf, info[1])]
+
+  def _to_readings(self, inf, info):
+    '''!
+      @brief Parse the timestamped attribute information of the designated ports
+      @param inf  The ports
+      @param info Response of CMD_GET_INFO with timestamp, None if it could not be read
+      @return List of SCIReading, in which value is still a char string
+    '''
+    readings = []
+    if info:
+      items = self._parse_information(info)
+      owners = self._resolve_layout(inf, [item[1] for item in items])
+      for (timestamp, key, value, unit), (port, sku) in zip(items, owners):
+        readings.append(SCIReading(port, sku, key, value, unit, timestamp))
+    return readings
+
+  def _prefetched(self, inf, keys = None, sku = None):
+    '''!
+      @brief Look up the prefetch cache, see enable_prefetch()
+      @param inf  The ports
+      @param keys Attribute name, None for all the attributes
+      @param sku  Sensor SKU, None for all the sensors
+      @return List of the matching SCIReading, in which value is still a char string
+      @n      None if the cache can not answer: no cache, older than the staleness bound, other ports, or no reading matches
+    '''
+    if self._prefetch is None:
+      return None
+    cache = self._prefetch_cache
+    if (cache is None) or (_monotonic() - cache[0] > self._prefetch[2]) or (inf & ~cache[1]):
+      self._prefetch_stats["misses"] += 1
+      return None
+    readings = cache[3]
+    if inf != cache[1]:
+      # Some ports only, unless the ports of the attributes could not be resolved
+      if [r for r in readings if not r.port]:
+        readings = []
+      readings = [r for r in readings if r.port & inf]
+    if keys is not None:
+      readings = self._of_sku([r for r in readings if r.key == keys], sku)
+    if not readings:
+      self._prefetch_stats["misses"] += 1
+      return None
+    self._prefetch_stats["hits"] += 1
+    return readings
+
+  def _of_sku(self, readings, sku):
+    '''!
+      @brief Keep the readings of the sensors with a specific sku
+      @param readings List of SCIReading
+      @param sku      Sensor SKU, None for all the sensors
+      @return List of SCIReading, None if a port with such a sensor has other sensors as well, as its readings carry the
+      @n      SKUs of all the sensors of the port and do not tell which sensor they belong to
+    '''
+    if sku is None:
+      return readings
+    readings = [r for r in readings if sku in r.sku.split(",")]
+    if [r for r in readings if "," in r.sku]:
+      return None
+    return readings
+
+  def _prefetch_run(self, stop, inf, period, callback):
+    '''!
+      @brief Prefetch thread, reads the module the same way as stream() and keeps the latest snapshot in the cache
+      @param stop     threading.Event to stop the thread
+      @param inf      The ports
+      @param period   Refresh period of the module, unit s
+      @param callback Called with each new snapshot, None for none
+    '''
+    retry = max(period / 10.0, self.STREAM_MIN_PERIOD)
+    last = None
+    while not stop.is_set():
+      t = _monotonic()
+      generation = self._prefetch_generation
+      timestamp = self._execute("get_timestamp")[1]
+      cache = self._prefetch_cache
+      if (not timestamp) or (timestamp != last) or (cache is None):
+        now = time.time()
+        info = self._execute("get_information", inf, True)
+        delay = period
+        if (info[self.INDEX_ERR_CODE] == self.ERR_CODE_NONE) and info[1]:
+          readings = self._to_readings(inf, info[1])
+          if generation != self._prefetch_generation:
+            # The sensors or the schema changed while the snapshot was read, read it again
+            delay = retry
+          else:
+            self._prefetch_cache = (_monotonic(), inf, info[1], readings)
+            self._prefetch_stats["refreshes"] += 1
+            last = timestamp
+            if callback is not None:
+              callback(self, now, [self.ERR_CODE_NONE, self._typed(readings)])
+      else:
+        if generation == self._prefetch_generation:
+          self._prefetch_cache = (_monotonic(),) + cache[1:]
+        delay = retry
+      stop.wait(max(t + delay - _monotonic(), 0))
+
+  def _parse_information(self, info):
+    '''!
+      @brief Split the response of CMD_GET_INFO into attributes
+      @param info "name:value unit" attributes separated by ",", each one optionally led by a timestamp
+      @return List of (timestamp, name, value, unit) char string tuples, an attribute without timestamp takes the one before it
+    '''
+    items = []
+    timestamp = ""
+    pattern = DFRobot_RP2040_SCI.INFO_PATTERN
+    if pattern is None:
+      import re
+      pattern = DFRobot_RP2040_SCI.INFO_PATTERN = re.compile(self.INFO_REGEX)
+    for m in pattern.finditer(info):
+      if m.group(1):
+        timestamp = m.group(1)
+      items.append((timestamp, m.group(2).strip(), m.group(3), m.group(4).strip()))
+    return items
+
+  def _resolve_layout(self, inf, keys):
+    '''!
+      @brief Find the port and sku of the attributes of a snapshot
+      @param inf  The ports of the snapshot
+      @param keys Attribute names of the snapshot in order
+      @return List of (port, sku) tuples, one for each name
+    '''
+    if self._layout_keys != keys or self._layout_inf != inf:
+      layout = self._read_layout(inf)
+      if [item[2] for item in layout] != keys:
+        # The sensors changed since the snapshot was read, or could not be read, try again with the next snapshot
+        if self._schema:
+          self._invalidate_schema()
+        port = inf if inf in (self.ePort1, self.ePort2, self.ePort3) else 0
+        return [(port, "")] * len(keys)
+      self._layout = [(port, sku) for port, sku, key in layout]
+      self._layout_keys = keys
+      self._layout_inf = inf
+    return self._layout
+
+  def _read_layout(self, inf):
+    '''!
+      @brief Read the SKU and attribute names of each designated port from the module, the schema cache and the
+      @n prefetched snapshot may be older than the snapshot whose layout is resolved
+      @param inf The ports
+      @return List of (port, sku, name) tuples in the order of CMD_GET_INFO
+    '''
+    layout = []
+    for port in (self.ePort1, self.ePort2, self.ePort3):
+      if not (inf & port):
+        continue
+      sku = self._execute("get_sku", port)[1] or ""
+      keys = self._execute("get_keys", port)[1] or ""
+      for key in keys.split(","):
+        if key:
+          layout.append((port, sku, key))
+    return layout
+
+  def _reset(self, cmd, deadline = None):
+    '''!
+      @brief Reset the cache sending of SCI Acquisition Module, and wait until the module responds again
+      @n Recovery runs as a small state machine:
+      @n   eRecoveryReset   send CMD_RESET, then let the module settle
+      @n   eRecoveryProbe   send CMD_GET_VERSION and wait for its response, a stale response of another command goes back to eRecoveryReset
+      @n   eRecoveryReady   the module answered, return at once
+      @n   eRecoveryFailed  no answer within the recovery timeout set by set_recovery()
+      @n CMD_RESET is sent even if the deadline has passed, so that a late response never stays in the module to break
+      @n the framing of the next command; the deadline only bounds the settling and the probes.
+      @param cmd      Communication command
+      @param deadline Time by which the recovery must be done if it is earlier than the recovery timeout, None means no limit
+      @return eRecoveryReady or eRecoveryFailed
+    '''
+    t = _monotonic()
+    if deadline is None:
+      deadline = t + self._recovery_timeout
+    else:
+      deadline = min(t + self._recovery_timeout, deadline)
+    state = self.eRecoveryReset
+    with self._bus_lock():
+      while True:
+        if state == self.eRecoveryReset:
+          len = 1
+          pkt = [0] * (3 + len)
+          pkt[self.INDEX_CMD]        = self.CMD_RESET
+          pkt[self.INDEX_ARGS_NUM_L] = len & 0xFF
+          pkt[self.INDEX_ARGS_NUM_H] = (len >> 8) & 0xFF
+          pkt[self.INDEX_ARGS]       = cmd
+          self._send_packet(pkt)
+          self._count_io(3 + len, 0, 0)
+          time.sleep(min(self._recovery_settle, max(deadline - _monotonic(), 0)))
+          state = self.eRecoveryProbe
+        if _monotonic() >= deadline:
+          state = self.eRecoveryFailed
+          break
+        pkt = [self.CMD_GET_VERSION, 0, 0]
+        self._send_packet(pkt)
+        self._count_io(3, 0, 0)
+        timeout = min(self.RECOVERY_PROBE_TIMEOUT, max(deadline - _monotonic(), 0))
+        rslt = self._wait_packet(self.CMD_GET_VERSION, timeout)
+        if rslt[0] == self.ERR_CODE_NONE:
+          state = self.eRecoveryReady
+          break
+        if rslt[0] == self.ERR_CODE_RES_PKT:
+          cmd = self.CMD_RESET
+          state = self.eRecoveryReset
+    self._count_recovery(state, _monotonic() - t)
+    return state
+
+  def _count_recovery(self, state, elapsed):
+    '''!
+      @brief Count a recovery in get_recovery_stats() and get_metrics()
+      @param state   eRecoveryReady or eRecoveryFailed
+      @param elapsed Recovery time, unit s
+    '''
+    stats = self._recovery_stats
+    stats["count"] += 1
+    if state == self.eRecoveryFailed:
+      stats["failed"] += 1
+    stats["total_time"] += elapsed
+    stats["last_time"] = elapsed
+    stats["max_time"] = max(stats["max_time"], elapsed)
+    m = self._metrics
+    if m is not None:
+      m["resets"] += 1
+      m["reset_time"] += elapsed
+
+  def _count_io(self, written, read, polls):
+    '''!
+      @brief Count the bus traffic in get_metrics()
+      @param written Bytes sent
+      @param read    Bytes read
+      @param polls   Polls of the response status
+    '''
+    m = self._metrics
+    if m is not None:
+      m["bytes_written"] += written
+      m["bytes_read"]    += read
+      m["polls"]         += polls
+
+  def _count_error(self, key):
+    '''!
+      @brief Count a response error in get_metrics()
+      @param key "timeouts" or "pkt_errors"
+    '''
+    m = self._metrics
+    if m is not None:
+      m[key] += 1
+
+  def _count_command(self, name, err, latency):
+    '''!
+      @brief Count a command in get_metrics() and pass it to the hook of enable_metrics()
+      @param name    Name of the command in COMMANDS
+      @param err     Error code
+      @param latency Time of the command, unit s
+    '''
+    m = self._metrics
+    if m is not None:
+      entry = m["commands"].get(name)
+      if entry is None:
+        entry = m["commands"][name] = [0, 0, 0.0, 0.0, [0] * (len(self.LATENCY_BUCKETS) + 1)]
+      entry[0] += 1
+      if err != self.ERR_CODE_NONE:
+        entry[1] += 1
+      entry[2] += latency
+      entry[3] = max(entry[3], latency)
+      entry[4][bisect.bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+    if self._metrics_hook is not None:
+      self._metrics_hook(name, err, latency)
+
+  def _percentile(self, buckets, count, longest, q):
+    '''!
+      @brief Percentile of a latency histogram
+      @param buckets Counts of the buckets of LATENCY_BUCKETS, the last one is above all of them
+      @param count   Number of latencies
+      @param longest Longest latency
+      @param q       Fraction, e.g. 0.95
+      @return Upper bound of the bucket of the percentile, at most longest, unit s
+    '''
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+      seen += n
+      if seen >= rank and n:
+        if i < len(self.LATENCY_BUCKETS):
+          return min(self.LATENCY_BUCKETS[i], longest)
+        break
+    return longest
   
+  def _now(self):
+    '''!
+      @brief Clock of the deadlines, unit s, see _monotonic
+    '''
+    return _monotonic()
+
+  def _call_deadline(self):
+    '''!
+      @brief Deadline of the current deadline() block, None outside of it
+    '''
+    return getattr(self._deadlines, "at", None)
+
+  def _random(self):
+    '''!
+      @brief Random number of the retry jitter, in [0, 1)
+    '''
+    import random
+    return random.random()
+
+  def _count_retry(self, key):
+    '''!
+      @brief Count an event of get_retry_stats()
+    '''
+    self._retry_stats[key] += 1
+
+  def _sleep(self, delay):
+    '''!
+      @brief Wait before the next attempt of a command
+      @param delay Waiting time, unit s
+    '''
+    time.sleep(delay)
+
   def _day_of_week(self, year, month, day):
     '''!
       @brief Calculate the day of a week according to year/month/day
@@ -1315,46 +2374,104 @@ class DFRobot_RP2040_SCI:
     return (days + 6) % 7
 
 
-  def _send_packet(self, pkt):
-    pass
-   
-  def _recv_data(self, len):
-    pass
-
-
 class DFRobot_RP2040_SCI_IIC(DFRobot_RP2040_SCI):
-  def __init__(self,addr):
+  '''enum I2C transfer mode'''
+  ## Byte mode, one SMBus transaction per byte
+  eTransferByte  = 0
+  ## Block mode, whole packets per raw I2C transaction on /dev/i2c-N, fall back to byte mode if the adapter cannot do it
+  eTransferBlock = 1
+
+  ## Maximum transferred data via I2C in one transaction, the same as IIC_MAX_TRANSFER of the firmware
+  IIC_MAX_TRANSFER = 32
+
+  ## ioctl request of linux/i2c-dev.h: set the slave address
+  I2C_SLAVE        = 0x0703
+  ## ioctl request of linux/i2c-dev.h: get the adapter functionality mask
+  I2C_FUNCS        = 0x0705
+  ## Adapter functionality: plain I2C-level commands
+  I2C_FUNC_I2C     = 0x00000001
+
+  '''enum I2C backend of byte mode'''
+  ## The first one installed of smbus, smbus2 and ioctl
+  eBackendAuto   = 0
+  ## smbus module, e.g. the python3-smbus package
+  eBackendSMBus  = 1
+  ## smbus2 module, pure Python, pip install smbus2
+  eBackendSMBus2 = 2
+  ## read()/write() and ioctl() on /dev/i2c-N, no module needed
+  eBackendIoctl  = 3
+
+  def __init__(self,addr, transfer = eTransferBlock, bus = 1, backend = eBackendAuto):
     '''!
       @brief DFRobot_SCI_IIC Constructor
       @param addr:  7-bit IIC address, support the following address settings
       @n RP2040_SCI_ADDR_0X21      0x21 default I2C address
       @n RP2040_SCI_ADDR_0X22      0x22
       @n RP2040_SCI_ADDR_0X23      0x23
+      @param transfer I2C transfer mode
+      @n eTransferByte      One SMBus transaction per byte
+      @n eTransferBlock     Whole packets per I2C transaction, in IIC_MAX_TRANSFER bytes chunks (default), 
+      @n                    fall back to eTransferByte if the adapter cannot do it
+      @param bus I2C bus number, /dev/i2c-<bus>, 1 on Raspberry Pi
+      @param backend I2C backend of byte mode, it is imported and opened only when byte mode is used
+      @n eBackendAuto       The first one installed of smbus, smbus2 and ioctl (default)
+      @n eBackendSMBus      smbus module
+      @n eBackendSMBus2     smbus2 module
+      @n eBackendIoctl      read()/write() and ioctl() on /dev/i2c-N
+      @n ImportError is raised if the backend is needed and is not installed
     '''
     self._addr = addr
-    self._bus = smbus.SMBus(1)
+    self._bus_num = bus
+    self._backend = backend
+    self._backend_used = None
+    self._bus = None
+    self._fd = None
+    if transfer == self.eTransferBlock:
+      self._fd = self._open_block_device()
+    if self._fd is None:
+      self._bus = self._open_backend()
     DFRobot_RP2040_SCI.__init__(self)
+
+  def _bus_key(self):
+    '''!
+      @brief Identify the physical bus of the module, modules on the same bus can not be accessed at the same time
+      @return ("i2c", bus number)
+    '''
+    return ("i2c", self._bus_num)
+
+  def _device_key(self):
+    '''!
+      @brief Identify the module, identical commands to the same module can share one transaction
+      @return ("i2c", bus number, I2C address)
+    '''
+    return ("i2c", self._bus_num, self._addr)
+
+  def get_transfer_mode(self):
+    '''!
+      @brief Get the I2C transfer mode actually in use
+      @return eTransferBlock or eTransferByte
+    '''
+    if self._fd is None:
+      return self.eTransferByte
+    return self.eTransferBlock
+
+  def get_backend(self):
+    '''!
+      @brief Get the I2C backend of byte mode actually in use
+      @return eBackendSMBus, eBackendSMBus2 or eBackendIoctl, None if it has not been needed in block mode
+    '''
+    return self._backend_used
     
   def get_i2c_address(self):
     '''!
       @brief Get SCI Acquisition Module I2C address
       @return I2C address
     '''
-    length = 0
-    addr = 0
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_READ_ADDR
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    self._send_packet(pkt)
+    rslt = self._execute("get_i2c_address")[1]
+    if rslt is None:
+      return 0
+    return rslt
 
-    recv_pkt = self._recv_packet(self.CMD_READ_ADDR)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      length = recv_pkt[self.INDEX_RES_LEN_L] | (recv_pkt[self.INDEX_RES_LEN_H] << 8)
-      if length == 1:
-        addr = recv_pkt[self.INDEX_RES_DATA]
-    return addr
-  
   def set_i2c_address(self, addr):
     '''!
       @brief Set SCI Acquisition Module I2C address 
@@ -1371,18 +2488,83 @@ class DFRobot_RP2040_SCI_IIC(DFRobot_RP2040_SCI):
       @n      ERR_CODE_CMD_PKT      or 0x05  Invalid command package or unmatched command 
       @n      ERR_CODE_I2C_ADRESS   or 0x0A  Invalid I2C address
     '''
-    length = 1
-    pkt = [0] * (3 + length)
-    pkt[self.INDEX_CMD]        = self.CMD_SET_ADDR
-    pkt[self.INDEX_ARGS_NUM_L] = length & 0xFF
-    pkt[self.INDEX_ARGS_NUM_H] = (length >> 8) & 0xFF
-    pkt[self.INDEX_ARGS]       = addr
-    self._send_packet(pkt)
+    rslt = self._execute("set_i2c_address", addr)
+    if rslt[1]:
+      self._set_addr(addr)
+    return rslt[self.INDEX_ERR_CODE]
 
-    recv_pkt = self._recv_packet(self.CMD_READ_ADDR)
-    if (len(recv_pkt) >= 5) and (recv_pkt[self.INDEX_RES_ERR] == self.ERR_CODE_NONE and recv_pkt[self.INDEX_RES_STATUS] == self.STATUS_SUCCESS):
-      self._addr = addr
-    return recv_pkt[0]
+  def _set_addr(self, addr):
+    '''!
+      @brief Talk to the module at a new I2C address
+      @param addr 7-bit I2C address
+    '''
+    self._addr = addr
+    self._invalidate_schema()
+    if self._fd is not None:
+      try:
+        fcntl.ioctl(self._fd, self.I2C_SLAVE, self._addr)
+      except (IOError, OSError):
+        self._close_block_device()
+
+  def _open_block_device(self):
+    '''!
+      @brief Open /dev/i2c-N for block transfer
+      @return File descriptor, None if the adapter cannot do plain I2C transfers
+    '''
+    if fcntl is None:
+      return None
+    try:
+      fd = os.open("/dev/i2c-%d"%self._bus_num, os.O_RDWR)
+    except (IOError, OSError):
+      return None
+    try:
+      funcs = bytearray(4)
+      fcntl.ioctl(fd, self.I2C_FUNCS, funcs, True)
+      if not ((funcs[0] | (funcs[1] << 8) | (funcs[2] << 16) | (funcs[3] << 24)) & self.I2C_FUNC_I2C):
+        os.close(fd)
+        return None
+      fcntl.ioctl(fd, self.I2C_SLAVE, self._addr)
+    except (IOError, OSError):
+      os.close(fd)
+      return None
+    return fd
+
+  def _close_block_device(self):
+    '''!
+      @brief Close /dev/i2c-N and fall back to byte mode
+    '''
+    if self._fd is not None:
+      try:
+        os.close(self._fd)
+      except (IOError, OSError):
+        pass
+      self._fd = None
+    if self._bus is None:
+      self._bus = self._open_backend()
+
+  def _open_backend(self):
+    '''!
+      @brief Import the backend of byte mode and open the bus
+      @return Bus object with read_byte(addr) and write_byte(addr, value)
+    '''
+    if self._backend == self.eBackendAuto:
+      backends = [self.eBackendSMBus, self.eBackendSMBus2, self.eBackendIoctl]
+    else:
+      backends = [self._backend]
+    for backend in backends:
+      if backend == self.eBackendIoctl:
+        if fcntl is None:
+          continue
+        bus = _I2CDevBus(self._bus_num)
+      else:
+        try:
+          module = __import__("smbus" if backend == self.eBackendSMBus else "smbus2")
+        except ImportError:
+          continue
+        bus = module.SMBus(self._bus_num)
+      self._backend_used = backend
+      return bus
+    raise ImportError("No I2C backend, install smbus (sudo apt-get install python3-smbus) or smbus2 (pip install smbus2)")
 
   def _send_packet(self, pkt):
     '''!
@@ -1390,24 +2572,98 @@ class DFRobot_RP2040_SCI_IIC(DFRobot_RP2040_SCI):
       @param pkt List of data to be sent
       @return None
     '''
+    if self._fd is not None:
+      buf = bytes(bytearray(pkt))
+      for i in range(0, len(buf), self.IIC_MAX_TRANSFER):
+        try:
+          os.write(self._fd, buf[i:i + self.IIC_MAX_TRANSFER])
+        except (IOError, OSError) as e:
+          if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY):
+            self._close_block_device()
+            return self._send_packet(pkt[i:])
+      return
     for data in pkt:
       try:
         self._bus.write_byte(self._addr, data)
       except:
         pass
     
-  def _recv_data(self, len):
+  def _recv_data(self, length):
     '''!
       @brief Read data
-      @param len Number of bytes to be read
+      @param length Number of bytes to be read
       @return The read data list
     '''
-    rslt = [0]*len
-    i = 0
-    while i < len:
+    buf = bytearray(length)
+    self._recv_into(buf, 0, length)
+    return list(buf)
+
+  def _recv_into(self, buf, start, length):
+    '''!
+      @brief Read data into a buffer without allocating, a byte which can not be read is 0
+      @param buf    bytearray
+      @param start  Index of the first byte
+      @param length Number of bytes to be read
+    '''
+    end = start + length
+    if self._fd is not None:
+      pos = start
+      while pos < end:
+        n = min(end - pos, self.IIC_MAX_TRANSFER)
+        try:
+          got = self._read_block(buf, pos, n)
+        except (IOError, OSError) as e:
+          if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY):
+            self._close_block_device()
+            return self._recv_into(buf, pos, end - pos)
+          got = 0
+        for i in range(pos + got, pos + n):
+          buf[i] = 0
+        pos += n
+      return
+    for i in range(start, end):
       try:
-        rslt[i] = self._bus.read_byte(self._addr)
+        buf[i] = self._bus.read_byte(self._addr)
       except:
-        rslt[i] = 0
-      i += 1
-    return rslt
+        buf[i] = 0
+
+  def _read_block(self, buf, start, length):
+    '''!
+      @brief Read one I2C transaction from /dev/i2c-N into a buffer
+      @param buf    bytearray
+      @param start  Index of the first byte
+      @param length Number of bytes to be read, no more than IIC_MAX_TRANSFER
+      @return Number of bytes read
+    '''
+    if hasattr(os, "readv"):
+      return os.readv(self._fd, [memoryview(buf)[start:start + length]])
+    data = os.read(self._fd, length)
+    buf[start:start + len(data)] = data
+    return len(data)
+
+class _I2CDevBus:
+  '''!
+    @brief Backend eBackendIoctl of DFRobot_RP2040_SCI_IIC, the byte transfers of smbus done with read()/write() on /dev/i2c-N
+  '''
+  def __init__(self, bus):
+    self._fd = os.open("/dev/i2c-%d"%bus, os.O_RDWR)
+    self._addr = None
+
+  def _select(self, addr):
+    if addr != self._addr:
+      fcntl.ioctl(self._fd, DFRobot_RP2040_SCI_IIC.I2C_SLAVE, addr)
+      self._addr = addr
+
+  def write_byte(self, addr, value):
+    self._select(addr)
+    os.write(self._fd, bytes(bytearray([value])))
+
+  def read_byte(self, addr):
+    self._select(addr)
+    data = os.read(self._fd, 1)
+    if not data:
+      raise IOError(errno.EIO, "no data")
+    return bytearray(data)[0]
+
+  def close(self):
+    os.close(self._fd)
@@ -0,0 +1,477 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Async.py
+  @brief asyncio client of the SCI Acquisition Module (Python 3 only).
+  @n All commands of DFRobot_RP2040_SCI are coroutines here. Waiting for the response and recovering after CMD_RESET
+  @n are done with asyncio.sleep(), and the modules on one bus are accessed one transaction at a time, so many reads
+  @n across modules can be awaited concurrently without a thread per call.
+  @n The commands are encoded and decoded by the methods of DFRobot_RP2040_SCI themselves: each one runs against a
+  @n codec that records the packet it sends and replays the responses already received, so the client never drifts
+  @n from the blocking driver. Every pass starts from the cache state the command found, so a cache filled by an earlier
+  @n pass never makes a later pass skip a transaction and take the responses of others.
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import copy
+import weakref
+import asyncio
+import contextlib
+import contextvars
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, DFRobot_RP2040_SCI_IIC, _monotonic
+
+## Deadline of the commands of the current task, see DFRobot_RP2040_SCI_Async.deadline()
+_deadline = contextvars.ContextVar("deadline", default = None)
+
+class _Pending(Exception):
+  '''!
+    @brief Raised by the codec when a command needs a response which has not been received yet,
+    @n or a delay which has not passed yet
+  '''
+  def __init__(self, pkt, cmd, timeout = None, deadline = None, delay = None):
+    Exception.__init__(self)
+    self.pkt      = pkt
+    self.cmd      = cmd
+    self.timeout  = timeout
+    self.deadline = deadline
+    self.delay    = delay
+
+class _DFRobot_RP2040_SCI_Codec(DFRobot_RP2040_SCI):
+  '''!
+    @brief Runs the command methods of DFRobot_RP2040_SCI without touching the bus
+  '''
+  ## Attributes the command methods change as they run, restored before every pass
+  PASS_STATE = ("_layout", "_layout_keys", "_layout_inf", "_schema", "_schema_checked_time",
+                "_catalogue", "_catalogue_version", "_prefetch_cache")
+
+  def __init__(self, io):
+    DFRobot_RP2040_SCI.__init__(self)
+    self._io        = io
+    self._responses = []
+    self._pos       = 0
+    self._record    = []
+    self._rpos      = 0
+
+  def _save_state(self):
+    '''!
+      @brief Copy the attributes of PASS_STATE before the first pass of a command
+      @n They are caches only: when commands of one client are awaited concurrently, one of them may set back what
+      @n another has just cached, which is then read from the module again
+      @return Dict of the copies
+    '''
+    return copy.deepcopy(dict((name, getattr(self, name)) for name in self.PASS_STATE))
+
+  def _replay(self, responses, record, state):
+    '''!
+      @brief Start a new pass of a command
+      @param responses Responses received so far, in the order the command asks for them
+      @param record    Clock and random values read so far, so that every pass takes the same decisions
+      @param state     Return value of _save_state(), the caches are set back to it, the last pass keeps its changes
+    '''
+    for name, value in copy.deepcopy(state).items():
+      setattr(self, name, value)
+    self._responses = responses
+    self._pos       = 0
+    self._record    = record
+    self._rpos      = 0
+
+  def _next(self, pkt, cmd, timeout = None, deadline = None, delay = None):
+    '''!
+      @brief Replay the next response, or stop the pass if it has not been received yet
+    '''
+    if self._pos < len(self._responses):
+      self._pos += 1
+      return self._responses[self._pos - 1]
+    raise _Pending(pkt, cmd, timeout, deadline, delay)
+
+  def _recorded(self, func):
+    '''!
+      @brief Replay the next recorded value, or read it from func and record it
+    '''
+    if self._rpos == len(self._record):
+      self._record.append(func())
+    self._rpos += 1
+    return self._record[self._rpos - 1]
+
+  def _transact(self, pkt, command, timeout = None, deadline = None):
+    return self._decode_response(list(self._next(pkt, command.response, timeout, deadline)), command)
+
+  def _reset(self, cmd, deadline = None):
+    return self._next(None, cmd, deadline = deadline)
+
+  def _sleep(self, delay):
+    self._next(None, None, delay = delay)
+
+  def _call_deadline(self):
+    return _deadline.get()
+
+  def _count_retry(self, key):
+    self._recorded(lambda: DFRobot_RP2040_SCI._count_retry(self, key))
+
+  def _count_command(self, name, err, latency):
+    self._recorded(lambda: DFRobot_RP2040_SCI._count_command(self, name, err, latency))
+
+  def _now(self):
+    return self._recorded(lambda: DFRobot_RP2040_SCI._now(self))
+
+  def _random(self):
+    return self._recorded(lambda: DFRobot_RP2040_SCI._random(self))
+
+  def _set_addr(self, addr):
+    self._invalidate_schema()
+    self._io._set_addr(addr)
+
+  def _bus_key(self):
+    return self._io._bus_key()
+
+def _command(name, func = None):
+  '''!
+    @brief Make the coroutine of a command method of DFRobot_RP2040_SCI
+  '''
+  if func is None:
+    func = getattr(DFRobot_RP2040_SCI, name)
+  async def command(self, *args, **kwargs):
+    return await self._run(func, *args, **kwargs)
+  command.__name__ = name
+  command.__doc__  = func.__doc__
+  return command
+
+def _setting(name):
+  '''!
+    @brief Forward a method of DFRobot_RP2040_SCI that never touches the bus
+  '''
+  func = getattr(DFRobot_RP2040_SCI, name)
+  def setting(self, *args, **kwargs):
+    return func(self._codec, *args, **kwargs)
+  setting.__name__ = name
+  setting.__doc__  = func.__doc__
+  return setting
+
+class DFRobot_RP2040_SCI_Async:
+  ## asyncio.Lock of each bus in each event loop, shared by all the clients in the process, {loop: {bus key: lock}},
+  ## a lock belongs to the loop which created it and goes away with that loop
+  _loop_locks = weakref.WeakKeyDictionary()
+  ## Polling interval of the bus lock while a thread of a blocking driver holds it, unit s
+  BUS_LOCK_POLL = 0.001
+
+  def __init__(self, sci):
+    '''!
+      @brief DFRobot_RP2040_SCI_Async Constructor
+      @param sci DFRobot_RP2040_SCI_IIC object, used as the transport of the client, do not use it directly any more
+    '''
+    self._io    = sci
+    self._codec = _DFRobot_RP2040_SCI_Codec(sci)
+
+  def __getattr__(self, name):
+    '''!
+      @brief Constants such as eALL and ERR_CODE_NONE are the same as DFRobot_RP2040_SCI
+    '''
+    value = getattr(DFRobot_RP2040_SCI, name)
+    if callable(value):
+      raise AttributeError(name)
+    return value
+
+  @contextlib.contextmanager
+  def deadline(self, timeout):
+    '''!
+      @brief The same as DFRobot_RP2040_SCI.deadline(), for the commands awaited inside the with block of the current task
+      @n For example:
+      @n   with sci.deadline(0.03):
+      @n     values = await sci.get_values(sci.eALL)
+      @param timeout Time budget from now, unit s
+    '''
+    outer = _deadline.get()
+    at = _monotonic() + timeout
+    if outer is not None:
+      at = min(at, outer)
+    token = _deadline.set(at)
+    try:
+      yield
+    finally:
+      _deadline.reset(token)
+
+  async def stream(self, inf = DFRobot_RP2040_SCI.eALL, period = None):
+    '''!
+      @brief Asynchronous generator of the snapshots, the same as DFRobot_RP2040_SCI.stream()
+      @n For example:
+      @n   async for err, readings in sci.stream():
+      @n     print(readings)
+    '''
+    codec = self._codec
+    if period is None:
+      rate = await self.get_refresh_rate()
+      period = 0
+      if rate[codec.INDEX_ERR_CODE] == codec.ERR_CODE_NONE:
+        period = codec.get_refresh_rate_describe(rate[codec.INDEX_MODE])
+    period = max(period, codec.STREAM_MIN_PERIOD)
+    retry = max(period / 10.0, codec.STREAM_MIN_PERIOD)
+    last = None
+    while True:
+      t = _monotonic()
+      timestamp = await self.get_timestamp()
+      if timestamp == "" or timestamp != last:
+        snapshot = await self.get_snapshot(inf)
+        if snapshot[codec.INDEX_ERR_CODE] == codec.ERR_CODE_NONE:
+          last = timestamp
+        yield snapshot
+        delay = period
+      else:
+        delay = retry
+      await asyncio.sleep(max(t + delay - _monotonic(), 0))
+
+  @contextlib.asynccontextmanager
+  async def _hold_bus(self):
+    '''!
+      @brief Hold the bus of the module for one transaction.
+      @n The asyncio.Lock orders the clients in the event loop, the bus lock of DFRobot_RP2040_SCI keeps out the threads
+      @n of blocking drivers on the same bus; it is polled without blocking so that the event loop keeps running.
+    '''
+    key = self._io._bus_key()
+    locks = self._loop_locks.setdefault(asyncio.get_running_loop(), {})
+    loop_lock = locks.get(key)
+    if loop_lock is None:
+      loop_lock = locks[key] = asyncio.Lock()
+    bus_lock = self._io._bus_lock()
+    stats = self._codec._lock_stats
+    t = _monotonic()
+    contended = loop_lock.locked()
+    async with loop_lock:
+      while not bus_lock.acquire(False):
+        contended = True
+        await asyncio.sleep(self.BUS_LOCK_POLL)
+      try:
+        wait = _monotonic() - t
+        stats["count"] += 1
+        if contended:
+          stats["contended"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+        yield
+      finally:
+        bus_lock.release()
+
+  async def _run(self, func, *args, **kwargs):
+    '''!
+      @brief Run a command method, performing the transactions it asks for one after another
+      @param func Command method of DFRobot_RP2040_SCI
+      @return The return value of the command method
+    '''
+    responses = []
+    record = []
+    state = self._codec._save_state()
+    while True:
+      self._codec._replay(responses, record, state)
+      try:
+        return func(self._codec, *args, **kwargs)
+      except _Pending as pending:
+        if pending.delay is not None:
+          await asyncio.sleep(pending.delay)
+          responses.append(None)
+        elif pending.pkt is None:
+          responses.append(await self._reset(pending.cmd, pending.deadline))
+        else:
+          responses.append(await self._recv_packet(pending.pkt, pending.cmd, pending.timeout, pending.deadline))
+
+  async def _recv_packet(self, pkt, cmd, timeout = None, deadline = None):
+    '''!
+      @brief Send a command packet and wait for its response, recover the module on error before the bus is released,
+      @n so that no other command is sent while a late response is still queued in the module
+      @param pkt      Command packet
+      @param cmd      Command to receive the packet
+      @param timeout  Response timeout, None means the timeout of set_recv_timeout()
+      @param deadline Time by which the packet and the recovery after an error must be done, None means no limit
+      @return The same as DFRobot_RP2040_SCI._recv_packet(), the valid data is copied out of the receive buffer as bytes
+      @n      unless it was streamed and decoded already
+    '''
+    if timeout is None:
+      timeout = self._codec.DEBUG_TIMEOUT_MS
+    async with self._hold_bus():
+      if deadline is not None:
+        remaining = deadline - _monotonic()
+        if remaining <= 0:
+          return [DFRobot_RP2040_SCI.ERR_CODE_RES_TIMEOUT]
+        timeout = min(timeout, remaining)
+      self._io._send_packet(pkt)
+      self._codec._count_io(len(pkt), 0, 0)
+      rslt = await self._wait_packet(cmd, timeout)
+      if (len(rslt) > DFRobot_RP2040_SCI.INDEX_RES_DATA) and isinstance(rslt[DFRobot_RP2040_SCI.INDEX_RES_DATA], memoryview):
+        rslt[DFRobot_RP2040_SCI.INDEX_RES_DATA] = rslt[DFRobot_RP2040_SCI.INDEX_RES_DATA].tobytes()
+      if rslt[0] == DFRobot_RP2040_SCI.ERR_CODE_RES_PKT:
+        self._codec._count_error("pkt_errors")
+        await self._recover(cmd, deadline)
+      elif rslt[0] == DFRobot_RP2040_SCI.ERR_CODE_RES_TIMEOUT:
+        self._codec._count_error("timeouts")
+        await self._recover(DFRobot_RP2040_SCI.CMD_RESET, deadline)
+    return rslt
+
+  async def _wait_packet(self, cmd, timeout):
+    '''!
+      @brief Wait for the response data packet of cmd with asyncio.sleep(), the caller holds the bus lock
+      @param cmd     Command to receive the packet
+      @param timeout Waiting time, unit s
+      @return The same as DFRobot_RP2040_SCI._wait_packet()
+    '''
+    codec = self._codec
+    io = self._io
+    t = _monotonic()
+    adaptive = (codec._wait_strategy == codec.eWaitAdaptive)
+    delay = codec._wait_initial
+    polls = 0
+    skipped = 0
+    extra = 0
+    idle_end = None
+    if adaptive and cmd in codec._latency_hint:
+      await asyncio.sleep(min(codec._latency_hint[cmd] * 0.75, timeout))
+    while _monotonic() - t < timeout:
+      io._recv_into(io._rx, 0, 1)
+      polls += 1
+      status = io._rx[0]
+      if status == codec.STATUS_SUCCESS or status == codec.STATUS_FAILED:
+        io._recv_into(io._rx, 1, 1)
+        if io._rx[1] != cmd:
+          if skipped < codec._resync_limit:
+            n = io._skip_response(codec._resync_limit - skipped)
+            skipped += n
+            extra += n - 1
+            idle_end = _monotonic() + codec._resync_idle
+            continue
+          codec._count_resync(skipped, False)
+          codec._count_io(0, polls + 1 + extra, polls)
+          return [codec.ERR_CODE_RES_PKT]
+        codec._count_resync(skipped, True)
+        codec._learn_latency(cmd, _monotonic() - t)
+        io._recv_into(io._rx, 2, 2)
+        rslt = io._read_payload()
+        codec._count_io(0, polls + 3 + extra + len(rslt[codec.INDEX_RES_DATA]), polls)
+        return rslt
+      if (status not in codec.IDLE_BYTES) and codec._resync_limit:
+        skipped += 1
+        if skipped > codec._resync_limit:
+          codec._count_resync(skipped, False)
+          codec._count_io(0, polls + extra, polls)
+          return [codec.ERR_CODE_RES_PKT]
+        continue
+      left = max(t + timeout - _monotonic(), 0)
+      if idle_end is not None:
+        if _monotonic() >= idle_end:
+          codec._count_resync(skipped, False)
+          codec._count_io(0, polls + extra, polls)
+          return [codec.ERR_CODE_RES_PKT]
+        left = min(left, idle_end - _monotonic())
+      if adaptive:
+        await asyncio.sleep(min(delay, left))
+        delay = min(delay * 2, codec._wait_ceiling)
+      else:
+        await asyncio.sleep(min(codec.WAIT_FIXED_INTERVAL, left))
+    codec._count_io(0, polls, polls)
+    return [codec.ERR_CODE_RES_TIMEOUT]
+
+  async def _reset(self, cmd, deadline = None):
+    '''!
+      @brief The same recovery as DFRobot_RP2040_SCI._reset(), waiting with asyncio.sleep(), CMD_RESET is sent even if the deadline has passed
+      @param cmd      Communication command
+      @param deadline Time by which the recovery must be done if it is earlier than the recovery timeout, None means no limit
+      @return eRecoveryReady or eRecoveryFailed
+    '''
+    async with self._hold_bus():
+      return await self._recover(cmd, deadline)
+
+  async def _recover(self, cmd, deadline = None):
+    '''!
+      @brief The recovery of _reset(), the caller holds the bus lock
+      @param cmd      Communication command
+      @param deadline Time by which the recovery must be done if it is earlier than the recovery timeout, None means no limit
+      @return eRecoveryReady or eRecoveryFailed
+    '''
+    codec = self._codec
+    io = self._io
+    t = _monotonic()
+    if deadline is None:
+      deadline = t + codec._recovery_timeout
+    else:
+      deadline = min(t + codec._recovery_timeout, deadline)
+    state = codec.eRecoveryReset
+    while True:
+      if state == codec.eRecoveryReset:
+        io._send_packet([codec.CMD_RESET, 1, 0, cmd])
+        codec._count_io(4, 0, 0)
+        await asyncio.sleep(min(codec._recovery_settle, max(deadline - _monotonic(), 0)))
+        state = codec.eRecoveryProbe
+      if _monotonic() >= deadline:
+        state = codec.eRecoveryFailed
+        break
+      io._send_packet([codec.CMD_GET_VERSION, 0, 0])
+      codec._count_io(3, 0, 0)
+      timeout = min(codec.RECOVERY_PROBE_TIMEOUT, max(deadline - _monotonic(), 0))
+      rslt = await self._wait_packet(codec.CMD_GET_VERSION, timeout)
+      if rslt[0] == codec.ERR_CODE_NONE:
+        state = codec.eRecoveryReady
+        break
+      if rslt[0] == codec.ERR_CODE_RES_PKT:
+        cmd = codec.CMD_RESET
+        state = codec.eRecoveryReset
+    codec._count_recovery(state, _monotonic() - t)
+    return state
+
+  begin                   = _command("begin")
+  get_version             = _command("get_version")
+  set_port1               = _command("set_port1")
+  get_port1               = _command("get_port1")
+  set_port2               = _command("set_port2")
+  get_port2               = _command("get_port2")
+  set_port3               = _command("set_port3")
+  get_port3               = _command("get_port3")
+  adjust_rtc_datetime     = _command("adjust_rtc_datetime")
+  adjust_rtc              = _command("adjust_rtc")
+  get_rtc_time            = _command("get_rtc_time")
+  set_refresh_rate        = _command("set_refresh_rate")
+  get_refresh_rate        = _command("get_refresh_rate")
+  get_timestamp           = _command("get_timestamp")
+  enable_record           = _command("enable_record")
+  disable_record          = _command("disable_record")
+  display_on              = _command("display_on")
+  display_off             = _command("display_off")
+  get_information         = _command("get_information")
+  get_snapshot            = _command("get_snapshot")
+  get_batch               = _command("get_batch")
+  get_sku                 = _command("get_sku")
+  get_keys                = _command("get_keys")
+  get_values              = _command("get_values")
+  get_units               = _command("get_units")
+  get_value0              = _command("get_value0")
+  get_value1              = _command("get_value1")
+  get_value2              = _command("get_value2")
+  get_unit0               = _command("get_unit0")
+  get_unit1               = _command("get_unit1")
+  get_unit2               = _command("get_unit2")
+  get_analog_sensor_sku   = _command("get_analog_sensor_sku")
+  get_digital_sensor_sku  = _command("get_digital_sensor_sku")
+  get_i2c_sensor_sku      = _command("get_i2c_sensor_sku")
+  get_uart_sensor_sku     = _command("get_uart_sensor_sku")
+  revalidate_schema       = _command("revalidate_schema")
+  check_sku               = _command("check_sku")
+  get_i2c_address         = _command("get_i2c_address", DFRobot_RP2040_SCI_IIC.get_i2c_address)
+  set_i2c_address         = _command("set_i2c_address", DFRobot_RP2040_SCI_IIC.set_i2c_address)
+
+  set_recv_timeout                 = _setting("set_recv_timeout")
+  set_recv_wait                    = _setting("set_recv_wait")
+  set_recovery                     = _setting("set_recovery")
+  set_retry                        = _setting("set_retry")
+  get_retry_stats                  = _setting("get_retry_stats")
+  set_resync                       = _setting("set_resync")
+  get_resync_stats                 = _setting("get_resync_stats")
+  get_recovery_stats               = _setting("get_recovery_stats")
+  get_lock_stats                   = _setting("get_lock_stats")
+  enable_metrics                   = _setting("enable_metrics")
+  get_metrics                      = _setting("get_metrics")
+  enable_schema_cache              = _setting("enable_schema_cache")
+  enable_sku_catalogue_cache       = _setting("enable_sku_catalogue_cache")
+  get_version_description          = _setting("get_version_description")
+  get_refresh_rate_describe        = _setting("get_refresh_rate_describe")
+  get_AD_sensor_mode_describe      = _setting("get_AD_sensor_mode_describe")
+  get_I2CUART_sensor_mode_describe = _setting("get_I2CUART_sensor_mode_describe")
@@ -0,0 +1,577 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Daemon.py
+  @brief Local daemon which owns the SCI Acquisition Modules and serves them to many processes over a Unix-domain socket.
+  @n The daemon is the only process on the bus: it prefetches the snapshot of every module once per refresh period (see
+  @n enable_prefetch()), answers the read commands of all its clients from it, runs their setting commands, and pushes every
+  @n new snapshot to the clients which subscribed. DFRobot_RP2040_SCI_Client has the same command methods as DFRobot_RP2040_SCI_IIC.
+  @n Run it as:
+  @n   python DFRobot_RP2040_SCI_Daemon.py --bus 1 --addr 0x21 --addr 3:0x21 --socket /run/DFRobot_RP2040_SCI/daemon.sock
+  @n The modules are served by I2C bus number and address, so modules at the same address on several buses are served together.
+  @n The socket is made accessible to the owner and the group of the daemon only (mode 0o660 by default): run the daemon
+  @n with the group of the client users, e.g. i2c, or change the mode with --mode.
+  @n
+  @n Protocol: every message is a frame [op, bus, addr, seq(2 bytes), len(4 bytes), payload], little endian. The answer of a
+  @n request carries the seq of the request, so that the late answer of a request which timed out is told apart, OP_PUSH has seq 0.
+  @n The payload is one value encoded as
+  @n a type tag and its data: "N" None, "T"/"F" true/false, "B" int 0~255 in 1 byte, "q" other int in 8 bytes, "d" float,
+  @n "s" char string (2 bytes length + UTF-8), "l" list (2 bytes count + values).
+  @n   OP_CALL        client -> daemon, payload [method index in METHODS, args...], answered by OP_RESULT or OP_ERROR
+  @n   OP_SUBSCRIBE   client -> daemon, push the snapshots of module addr on bus, answered by OP_RESULT
+  @n   OP_UNSUBSCRIBE client -> daemon, stop pushing the snapshots of module addr on bus, answered by OP_RESULT
+  @n   OP_MODULES     client -> daemon, answered by OP_RESULT with the list of the [bus, addr] of the modules
+  @n   OP_PUSH        daemon -> client, payload [t, snapshot], t is the host time.time() of the snapshot
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import os
+import errno
+import socket
+import struct
+import argparse
+import threading
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, DFRobot_RP2040_SCI_IIC, SCIReading, _monotonic
+
+## Default path of the socket, its directory is created if it is missing
+DEFAULT_PATH = "/run/DFRobot_RP2040_SCI/daemon.sock"
+
+## Default access mode of the socket, the owner and the group of the daemon
+DEFAULT_MODE = 0o660
+
+## Client -> daemon: run a command method
+OP_CALL        = 0x01
+## Client -> daemon: push the snapshots of a module
+OP_SUBSCRIBE   = 0x02
+## Client -> daemon: stop pushing the snapshots of a module
+OP_UNSUBSCRIBE = 0x03
+## Client -> daemon: list the modules
+OP_MODULES     = 0x04
+## Daemon -> client: return value of a request
+OP_RESULT      = 0x81
+## Daemon -> client: a request failed, the payload is the reason
+OP_ERROR       = 0x82
+## Daemon -> client: a new snapshot of a subscribed module
+OP_PUSH        = 0x83
+
+## Command methods served by the daemon, a call carries the index of the method in this tuple
+METHODS = (
+  "get_version", "get_information", "get_snapshot", "get_batch", "get_sku", "get_keys", "get_values", "get_units",
+  "get_value0", "get_value1", "get_value2", "get_unit0", "get_unit1", "get_unit2", "get_timestamp", "get_rtc_time",
+  "get_refresh_rate", "get_port1", "get_port2", "get_port3", "get_analog_sensor_sku", "get_digital_sensor_sku",
+  "get_i2c_sensor_sku", "get_uart_sensor_sku", "set_port1", "set_port2", "set_port3", "set_refresh_rate",
+  "adjust_rtc", "adjust_rtc_datetime", "enable_record", "disable_record", "display_on", "display_off",
+)
+
+_HEADER = struct.Struct("<BBBHI")
+_U16    = struct.Struct("<H")
+_INT    = struct.Struct("<q")
+_FLOAT  = struct.Struct("<d")
+
+def _pack(value, out):
+  '''!
+    @brief Encode a value, see the protocol in the file header
+    @param value None, bool, int, float, char string, or list/tuple of them
+    @param out   bytearray to append to
+  '''
+  if value is None:
+    out += b"N"
+  elif value is True:
+    out += b"T"
+  elif value is False:
+    out += b"F"
+  elif isinstance(value, int) and 0 <= value <= 0xFF:
+    out += b"B"
+    out.append(value)
+  elif isinstance(value, int):
+    out += b"q" + _INT.pack(value)
+  elif isinstance(value, float):
+    out += b"d" + _FLOAT.pack(value)
+  elif isinstance(value, (list, tuple)):
+    out += b"l" + _U16.pack(len(value))
+    for item in value:
+      _pack(item, out)
+  else:
+    if not isinstance(value, bytes):
+      value = value.encode("utf-8")
+    out += b"s" + _U16.pack(len(value)) + value
+
+def _unpack(data, pos = 0):
+  '''!
+    @brief Decode a value
+    @param data bytes or bytearray
+    @param pos  Index of the type tag
+    @return (value, index after the value), lists are decoded as lists
+  '''
+  tag = data[pos:pos + 1]
+  pos += 1
+  if tag == b"N":
+    return None, pos
+  if tag == b"T":
+    return True, pos
+  if tag == b"F":
+    return False, pos
+  if tag == b"B":
+    return bytearray(data[pos:pos + 1])[0], pos + 1
+  if tag == b"q":
+    return _INT.unpack_from(data, pos)[0], pos + _INT.size
+  if tag == b"d":
+    return _FLOAT.unpack_from(data, pos)[0], pos + _FLOAT.size
+  if tag == b"s":
+    length = _U16.unpack_from(data, pos)[0]
+    pos += _U16.size
+    return bytes(data[pos:pos + length]).decode("utf-8"), pos + length
+  if tag == b"l":
+    count = _U16.unpack_from(data, pos)[0]
+    pos += _U16.size
+    items = []
+    for _ in range(count):
+      item, pos = _unpack(data, pos)
+      items.append(item)
+    return items, pos
+  raise ValueError("bad type tag %r"%tag)
+
+def _frame(op, key, seq, value):
+  payload = bytearray()
+  _pack(value, payload)
+  return bytes(bytearray(_HEADER.pack(op, key[0], key[1], seq, len(payload))) + payload)
+
+def _recv_exact(sock, length):
+  '''!
+    @brief Receive exactly length bytes
+    @return bytes, None if the connection is closed
+  '''
+  data = b""
+  while len(data) < length:
+    try:
+      chunk = sock.recv(length - len(data))
+    except socket.error as e:
+      if e.errno == errno.EINTR:
+        continue
+      return None
+    if not chunk:
+      return None
+    data += chunk
+  return data
+
+def _recv_frame(sock):
+  '''!
+    @brief Receive one frame
+    @return (op, (bus, addr), seq, value), None if the connection is closed
+  '''
+  header = _recv_exact(sock, _HEADER.size)
+  if header is None:
+    return None
+  op, bus, addr, seq, length = _HEADER.unpack(header)
+  payload = _recv_exact(sock, length)
+  if payload is None:
+    return None
+  return op, (bus, addr), seq, _unpack(payload)[0]
+
+def _snapshot(value):
+  '''!
+    @brief Rebuild the SCIReading of a snapshot received as lists
+  '''
+  if value and (len(value) > 1) and isinstance(value[1], list):
+    value[1] = [SCIReading(*reading) for reading in value[1]]
+  return value
+
+class _Connection:
+  '''!
+    @brief A client of the daemon, frames are sent by a writer thread of their own so that a slow client never blocks the others
+  '''
+  def __init__(self, sock, backlog):
+    self.sock    = sock
+    self.dropped = 0
+    self._queue  = queue.Queue(backlog)
+    self._writer = threading.Thread(target = self._write)
+    self._writer.daemon = True
+    self._writer.start()
+
+  def send(self, frame, drop = False):
+    '''!
+      @brief Queue a frame
+      @param drop true to drop the frame if the queue is full, false to wait
+    '''
+    try:
+      self._queue.put(frame, not drop)
+    except queue.Full:
+      self.dropped += 1
+
+  def close(self):
+    self._queue.put(None)
+
+  def _write(self):
+    while True:
+      frame = self._queue.get()
+      if frame is None:
+        break
+      try:
+        self.sock.sendall(frame)
+      except socket.error:
+        break
+    try:
+      self.sock.close()
+    except socket.error:
+      pass
+
+class DFRobot_RP2040_SCI_Daemon:
+
+  def __init__(self, path = DEFAULT_PATH, period = None, max_age = None, backlog = 64, mode = DEFAULT_MODE):
+    '''!
+      @brief DFRobot_RP2040_SCI_Daemon Constructor
+      @param path    Path of the Unix-domain socket, an old socket file there is replaced
+      @param period  Prefetch period of every module, unit s, None to use the refresh rate of each module
+      @param max_age Staleness bound of the prefetched snapshots, unit s, None for twice the period
+      @param backlog Frames queued for each client, the snapshots pushed to a client whose queue is full are dropped
+      @param mode    Access mode of the socket, a client needs write access to connect, e.g. 0o660 for the owner and
+      @n             the group of the daemon; any client can run the setting commands such as set_port1()
+    '''
+    self._path     = path
+    self._mode     = mode
+    self._period   = period
+    self._max_age  = max_age
+    self._backlog  = backlog
+    self._modules  = {}
+    self._subscribers = {}
+    self._clients  = []
+    self._lock     = threading.Lock()
+    self._sock     = None
+    self._stop     = threading.Event()
+
+  def add_module(self, sci, bus = None):
+    '''!
+      @brief Serve a module, the daemon starts its prefetch thread, see enable_prefetch()
+      @param sci DFRobot_RP2040_SCI_IIC object, which has been initialized by begin(), served by its bus and I2C address
+      @param bus Bus number the clients give for the module, 0~255, None for the I2C bus number of sci, 1 if it has none
+      @exception ValueError The daemon serves a module at the same I2C address on the same bus already
+    '''
+    if bus is None:
+      bus = getattr(sci, "_bus_num", None)
+      if bus is None:
+        bus = 1
+    key = (bus, sci._addr)
+    with self._lock:
+      if key in self._modules:
+        raise ValueError("a module at 0x%02x on bus %d is served already"%(sci._addr, bus))
+      self._modules[key] = sci
+      self._subscribers[key] = []
+    sci.enable_prefetch(True, DFRobot_RP2040_SCI.eALL, self._period, self._max_age,
+                        lambda sci, t, snapshot: self._publish(key, t, snapshot))
+
+  def start(self):
+    '''!
+      @brief Listen on the socket and accept clients in a background thread
+    '''
+    try:
+      os.unlink(self._path)
+    except OSError:
+      pass
+    directory = os.path.dirname(self._path)
+    if directory and not os.path.isdir(directory):
+      os.makedirs(directory)
+    self._stop.clear()
+    self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self._sock.bind(self._path)
+    os.chmod(self._path, self._mode)
+    self._sock.listen(16)
+    thread = threading.Thread(target = self._accept)
+    thread.daemon = True
+    thread.start()
+
+  def serve_forever(self):
+    '''!
+      @brief start() and wait until stop() is called
+    '''
+    self.start()
+    while not self._stop.is_set():
+      self._stop.wait(1)
+
+  def stop(self):
+    '''!
+      @brief Disconnect the clients, stop accepting new ones and the prefetch threads, and remove the socket
+    '''
+    self._stop.set()
+    if self._sock is not None:
+      try:
+        self._sock.shutdown(socket.SHUT_RDWR)
+      except socket.error:
+        pass
+      self._sock.close()
+      self._sock = None
+      try:
+        os.unlink(self._path)
+      except OSError:
+        pass
+    with self._lock:
+      modules = list(self._modules.values())
+      clients = list(self._clients)
+    for client in clients:
+      try:
+        client.sock.shutdown(socket.SHUT_RDWR)
+      except socket.error:
+        pass
+    for sci in modules:
+      sci.enable_prefetch(False)
+
+  def _accept(self):
+    sock = self._sock
+    while not self._stop.is_set():
+      try:
+        conn = sock.accept()[0]
+      except socket.error:
+        break
+      thread = threading.Thread(target = self._serve, args = (conn,))
+      thread.daemon = True
+      thread.start()
+
+  def _serve(self, conn):
+    '''!
+      @brief Thread of a client, answers its requests in order
+    '''
+    client = _Connection(conn, self._backlog)
+    with self._lock:
+      self._clients.append(client)
+    try:
+      while True:
+        frame = _recv_frame(conn)
+        if frame is None:
+          break
+        client.send(self._handle(client, *frame))
+    except (ValueError, struct.error):
+      pass
+    finally:
+      with self._lock:
+        self._clients.remove(client)
+        for subscribers in self._subscribers.values():
+          if client in subscribers:
+            subscribers.remove(client)
+      client.close()
+
+  def _handle(self, client, op, key, seq, value):
+    '''!
+      @brief Run a request, a command which raises is answered by OP_ERROR and the client stays connected
+      @param key (bus, addr) of the module
+      @return The frame of the answer
+    '''
+    if op == OP_MODULES:
+      with self._lock:
+        return _frame(OP_RESULT, key, seq, sorted(self._modules.keys()))
+    with self._lock:
+      sci = self._modules.get(key)
+      if sci is None:
+        return _frame(OP_ERROR, key, seq, "no module at 0x%02x on bus %d"%(key[1], key[0]))
+      if op == OP_SUBSCRIBE:
+        if client not in self._subscribers[key]:
+          self._subscribers[key].append(client)
+        return _frame(OP_RESULT, key, seq, None)
+      if op == OP_UNSUBSCRIBE:
+        if client in self._subscribers[key]:
+          self._subscribers[key].remove(client)
+        return _frame(OP_RESULT, key, seq, None)
+    if (op != OP_CALL) or not isinstance(value, list) or not value or not (0 <= value[0] < len(METHODS)):
+      return _frame(OP_ERROR, key, seq, "bad request")
+    try:
+      return _frame(OP_RESULT, key, seq, getattr(sci, METHODS[value[0]])(*value[1:]))
+    except Exception as e:
+      return _frame(OP_ERROR, key, seq, "%s: %s"%(type(e).__name__, e))
+
+  def _publish(self, key, t, snapshot):
+    '''!
+      @brief Prefetch callback, push a new snapshot to the subscribers of the module
+      @param key (bus, addr) of the module
+    '''
+    with self._lock:
+      subscribers = list(self._subscribers.get(key, []))
+    if subscribers:
+      frame = _frame(OP_PUSH, key, 0, [t, snapshot])
+      for client in subscribers:
+        client.send(frame, True)
+
+def _call(name):
+  index = METHODS.index(name)
+  def call(self, *args):
+    return self._request(OP_CALL, [index] + list(args))
+  call.__name__ = name
+  call.__doc__ = getattr(DFRobot_RP2040_SCI_IIC, name).__doc__
+  return call
+
+class DFRobot_RP2040_SCI_Client:
+
+  def __init__(self, addr = DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21, path = DEFAULT_PATH, timeout = 5, bus = 1):
+    '''!
+      @brief DFRobot_RP2040_SCI_Client Constructor, connects to the daemon
+      @n The command methods are the same as DFRobot_RP2040_SCI_IIC, served by the daemon; they raise IOError if the daemon
+      @n is gone or does not answer within timeout, and ValueError if it refuses the request
+      @param addr    I2C address of the module
+      @param path    Path of the socket of the daemon
+      @param timeout Waiting time of an answer, unit s
+      @param bus     I2C bus number of the module
+    '''
+    self._addr     = addr
+    self._key      = (bus, addr)
+    self._timeout  = timeout
+    self._sock     = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self._sock.connect(path)
+    self._lock     = threading.Lock()
+    self._results  = queue.Queue()
+    self._seq      = 0
+    self._callback = None
+    self._queue    = None
+    self._closed   = False
+    self._reader   = threading.Thread(target = self._read)
+    self._reader.daemon = True
+    self._reader.start()
+
+  def __getattr__(self, name):
+    '''!
+      @brief Constants such as eALL and ERR_CODE_NONE are the same as DFRobot_RP2040_SCI
+    '''
+    value = getattr(DFRobot_RP2040_SCI, name)
+    if callable(value):
+      raise AttributeError(name)
+    return value
+
+  def get_modules(self):
+    '''!
+      @brief Get the modules served by the daemon
+      @return List of [bus, addr], the I2C bus number and address of each module
+    '''
+    return self._request(OP_MODULES, None)
+
+  def subscribe(self, callback = None, queue = None):
+    '''!
+      @brief Receive every new snapshot of the module pushed by the daemon
+      @param callback Called as callback(client, t, snapshot) in the reader thread of the client,
+      @n     t is the host time.time() of the snapshot, snapshot is the same as the return value of get_snapshot()
+      @param queue    An object with put(), receives (client, t, snapshot) tuples, e.g. queue.Queue
+    '''
+    self._callback = callback
+    self._queue = queue
+    self._request(OP_SUBSCRIBE, None)
+
+  def unsubscribe(self):
+    '''!
+      @brief Stop receiving the snapshots
+    '''
+    self._request(OP_UNSUBSCRIBE, None)
+    self._callback = None
+    self._queue = None
+
+  def close(self):
+    '''!
+      @brief Disconnect from the daemon
+    '''
+    try:
+      self._sock.shutdown(socket.SHUT_RDWR)
+    except socket.error:
+      pass
+    self._sock.close()
+
+  def _request(self, op, value):
+    '''!
+      @brief Send a request and wait for its answer, one request at a time, the late answers of the requests
+      @n which timed out before are dropped
+    '''
+    with self._lock:
+      if self._closed:
+        raise IOError(errno.EPIPE, "DFRobot_RP2040_SCI daemon closed the connection")
+      self._seq = (self._seq % 0xFFFF) + 1
+      try:
+        self._sock.sendall(_frame(op, self._key, self._seq, value))
+      except socket.error:
+        raise IOError(errno.EIO, "DFRobot_RP2040_SCI daemon does not answer")
+      deadline = _monotonic() + self._timeout
+      while True:
+        try:
+          answer = self._results.get(True, max(deadline - _monotonic(), 0))
+        except queue.Empty:
+          raise IOError(errno.ETIMEDOUT, "DFRobot_RP2040_SCI daemon does not answer")
+        if (answer is None) or (answer[1] == self._seq):
+          break
+    if answer is None:
+      raise IOError(errno.EPIPE, "DFRobot_RP2040_SCI daemon closed the connection")
+    if answer[0] == OP_ERROR:
+      raise ValueError(answer[2])
+    if op == OP_CALL and METHODS[value[0]] == "get_snapshot":
+      return _snapshot(answer[2])
+    return answer[2]
+
+  def _read(self):
+    '''!
+      @brief Reader thread, hands the answers to _request() and the pushed snapshots to the callback and the queue
+    '''
+    while True:
+      try:
+        frame = _recv_frame(self._sock)
+      except (ValueError, struct.error):
+        frame = None
+      if frame is None:
+        self._closed = True
+        self._results.put(None)
+        break
+      op, key, seq, value = frame
+      if op == OP_PUSH:
+        t, snapshot = value[0], _snapshot(value[1])
+        if self._callback is not None:
+          self._callback(self, t, snapshot)
+        if self._queue is not None:
+          self._queue.put((self, t, snapshot))
+      else:
+        self._results.put((op, seq, value))
+
+for _name in METHODS:
+  setattr(DFRobot_RP2040_SCI_Client, _name, _call(_name))
+
+def _module_arg(text):
+  '''!
+    @brief Parse --addr, ADDR or BUS:ADDR
+    @return (bus, addr), bus is None if it is not given
+  '''
+  if ":" in text:
+    bus, addr = text.split(":", 1)
+    return int(bus, 0), int(addr, 0)
+  return None, int(text, 0)
+
+def main():
+  parser = argparse.ArgumentParser(description = "Serve SCI Acquisition Modules to local clients over a Unix-domain socket")
+  parser.add_argument("--socket", default = DEFAULT_PATH, help = "path of the socket, default %s"%DEFAULT_PATH)
+  parser.add_argument("--mode", type = lambda x: int(x, 8), default = DEFAULT_MODE, help = "access mode of the socket, octal, default %o"%DEFAULT_MODE)
+  parser.add_argument("--bus", type = int, default = 1, help = "I2C bus number of the modules given without one, default 1")
+  parser.add_argument("--addr", action = "append", type = _module_arg,
+                      help = "I2C address of a module as ADDR or BUS:ADDR, e.g. 0x21 or 3:0x21, can be repeated, default 0x21")
+  parser.add_argument("--period", type = float, help = "prefetch period, unit s, default the refresh rate of each module")
+  parser.add_argument("--max-age", type = float, help = "staleness bound of the snapshots, unit s, default twice the period")
+  parser.add_argument("--sim", action = "store_true", help = "serve simulated modules instead of the I2C bus")
+  args = parser.parse_args()
+
+  daemon = DFRobot_RP2040_SCI_Daemon(args.socket, args.period, args.max_age, mode = args.mode)
+  modules = [(args.bus if bus is None else bus, addr) for bus, addr in (args.addr or [(None, DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21)])]
+  for bus, addr in sorted(set(modules)):
+    if args.sim:
+      from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim
+      sci = DFRobot_RP2040_SCI_Sim(addr)
+    else:
+      sci = DFRobot_RP2040_SCI_IIC(addr, bus = bus)
+    if sci.begin() != 0:
+      print("Initialization SCI Acquisition Module 0x%02x on bus %d failed."%(addr, bus))
+      continue
+    print("Initialization SCI Acquisition Module 0x%02x on bus %d done."%(addr, bus))
+    daemon.add_module(sci, bus)
+  print("Serving on %s"%args.socket)
+  try:
+    daemon.serve_forever()
+  except KeyboardInterrupt:
+    daemon.stop()
+
+if __name__ == "__main__":
+  main()
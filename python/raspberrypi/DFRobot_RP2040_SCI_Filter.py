@@ -0,0 +1,101 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Filter.py
+  @brief Deadband filter of the snapshots of the SCI Acquisition Module.
+  @n A reading is passed on only when its value leaves the deadband around the last value passed on, or when nothing
+  @n has been passed on for that attribute within the heartbeat period. The deadbands are configured by attribute name,
+  @n as returned by get_keys(). Use one filter for each module.
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, _monotonic
+
+class DFRobot_RP2040_SCI_Filter:
+
+  def __init__(self, absolute = 0, relative = 0, heartbeat = None):
+    '''!
+      @brief DFRobot_RP2040_SCI_Filter Constructor
+      @param absolute  Default absolute deadband of all attributes, in the unit of the attribute
+      @param relative  Default relative deadband of all attributes, fraction of the last value passed on, e.g. 0.01 for 1%
+      @param heartbeat Default longest silence of an attribute, unit s, None means no heartbeat
+    '''
+    self._default  = (absolute, relative, heartbeat)
+    self._deadband = {}
+    self._last     = {}
+
+  def set_deadband(self, key, absolute = 0, relative = 0, heartbeat = None):
+    '''!
+      @brief Set the deadband of an attribute. The band is the larger of absolute and relative times the last value passed on,
+      @n a reading is passed on when it differs from the last one by more than the band.
+      @n Readings which are not numeric (value None) are passed on when they turn numeric or not, or when the heartbeat expires.
+      @param key       Attribute name, e.g. "Temp_Air"
+      @param absolute  Absolute deadband, in the unit of the attribute
+      @param relative  Relative deadband, fraction of the last value passed on
+      @param heartbeat Longest silence of the attribute, unit s, None means no heartbeat
+    '''
+    self._deadband[key] = (absolute, relative, heartbeat)
+
+  def reset(self):
+    '''!
+      @brief Forget the last values, the next reading of every attribute is passed on
+    '''
+    self._last = {}
+
+  def filter(self, snapshot, t = None):
+    '''!
+      @brief Drop the readings of a snapshot which are inside their deadbands
+      @param snapshot Return value of get_snapshot()
+      @param t        Time of the snapshot, unit s, a monotonic clock by default, which a change of the wall clock does not move
+      @return List the same as get_snapshot(), with the readings which are passed on only
+      @n      A snapshot with an error code is returned as it is
+    '''
+    if snapshot[DFRobot_RP2040_SCI.INDEX_ERR_CODE] != DFRobot_RP2040_SCI.ERR_CODE_NONE:
+      return snapshot
+    if t is None:
+      t = _monotonic()
+    readings = []
+    for reading in snapshot[1]:
+      if self._pass(reading, t):
+        readings.append(reading)
+    return [snapshot[DFRobot_RP2040_SCI.INDEX_ERR_CODE], readings]
+
+  def stream(self, snapshots):
+    '''!
+      @brief Filter a sequence of snapshots, e.g. DFRobot_RP2040_SCI.stream(), and skip those left with no reading
+      @param snapshots Iterable of snapshots
+      @return Generator of filtered snapshots
+      @n For example:
+      @n   for err, readings in flt.stream(sci.stream()):
+      @n     print(readings)
+    '''
+    for snapshot in snapshots:
+      snapshot = self.filter(snapshot)
+      if (snapshot[DFRobot_RP2040_SCI.INDEX_ERR_CODE] != DFRobot_RP2040_SCI.ERR_CODE_NONE) or snapshot[1]:
+        yield snapshot
+
+  def _pass(self, reading, t):
+    '''!
+      @brief Decide whether a reading is passed on, and remember it if it is
+      @param reading SCIReading
+      @param t       Time of the reading
+      @return true or false
+    '''
+    absolute, relative, heartbeat = self._deadband.get(reading.key, self._default)
+    name = (reading.port, reading.sku, reading.key)
+    last = self._last.get(name)
+    if last is None:
+      changed = True
+    elif (heartbeat is not None) and (t - last[1] >= heartbeat):
+      changed = True
+    elif (reading.value is None) or (last[0] is None):
+      changed = (reading.value != last[0])
+    else:
+      changed = abs(reading.value - last[0]) > max(absolute, relative * abs(last[0]))
+    if changed:
+      self._last[name] = (reading.value, t)
+    return changed
@@ -0,0 +1,155 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Poller.py
+  @brief Poll many SCI Acquisition Modules on one or several I2C buses.
+  @n One worker thread runs for each physical bus, so buses are polled in parallel, while the modules on the same bus
+  @n are polled in turn and their transactions never overlap. Every snapshot is delivered to a callback and/or a queue,
+  @n and can be published into a DFRobot_RP2040_SCI_Ring shared with other processes.
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import time
+import threading
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, _monotonic
+
+class DFRobot_RP2040_SCI_Poller:
+
+  def __init__(self, interval = 1, callback = None, queue = None, inf = DFRobot_RP2040_SCI.eALL, ring = None):
+    '''!
+      @brief DFRobot_RP2040_SCI_Poller Constructor
+      @param interval Polling period of every module, unit s
+      @param callback Called as callback(sci, t, snapshot) in the worker thread of the bus after each module is polled,
+      @n     t is the host time.time() of the poll, snapshot is the return value of sci.get_snapshot()
+      @param queue    An object with put(), receives (sci, t, snapshot) tuples, e.g. queue.Queue
+      @param inf      Ports to poll, eALL by default
+      @param ring     DFRobot_RP2040_SCI_Ring object, receives every snapshot without an error code, None for none
+    '''
+    self._interval = interval
+    self._callback = callback
+    self._queue    = queue
+    self._inf      = inf
+    self._ring     = ring
+    self._buses    = {}
+    self._workers  = {}
+    self._lock     = threading.Lock()
+    self._stop     = threading.Event()
+    self._running  = False
+
+  def add_module(self, sci):
+    '''!
+      @brief Add a module to be polled, it can be added while the poller is running
+      @param sci DFRobot_RP2040_SCI_IIC object, which has been initialized by begin()
+    '''
+    key = sci._bus_key()
+    with self._lock:
+      modules = list(self._buses.get(key, []))
+      if sci not in modules:
+        modules.append(sci)
+      self._buses[key] = modules
+      if self._running and key not in self._workers:
+        self._start_worker(key)
+
+  def remove_module(self, sci):
+    '''!
+      @brief Stop polling a module
+      @param sci DFRobot_RP2040_SCI_IIC object
+    '''
+    key = sci._bus_key()
+    with self._lock:
+      self._buses[key] = [m for m in self._buses.get(key, []) if m is not sci]
+
+  def start(self):
+    '''!
+      @brief Start one worker thread for each bus
+    '''
+    with self._lock:
+      self._stop.clear()
+      self._running = True
+      for key in self._buses:
+        if key not in self._workers:
+          self._start_worker(key)
+
+  def stop(self, timeout = None):
+    '''!
+      @brief Stop all worker threads and wait for them to finish
+      @param timeout Waiting time for each worker, unit s, None means wait until it finishes
+    '''
+    self._stop.set()
+    with self._lock:
+      self._running = False
+      workers = list(self._workers.values())
+      self._workers = {}
+    for worker in workers:
+      worker.join(timeout)
+
+  def poll_once(self):
+    '''!
+      @brief Poll every module once, buses in parallel, and deliver the snapshots, without starting the worker threads
+    '''
+    with self._lock:
+      keys = list(self._buses.keys())
+    threads = [threading.Thread(target = self._poll_bus, args = (key, None)) for key in keys]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+  def _start_worker(self, key):
+    '''!
+      @brief Start the worker thread of a bus, the caller holds self._lock
+      @param key Bus identifier returned by _bus_key()
+    '''
+    worker = threading.Thread(target = self._run, args = (key,))
+    worker.daemon = True
+    self._workers[key] = worker
+    worker.start()
+
+  def _run(self, key):
+    '''!
+      @brief Worker thread of a bus, polls all its modules once per interval
+      @param key Bus identifier returned by _bus_key()
+    '''
+    next_time = _monotonic()
+    while not self._stop.is_set():
+      self._poll_bus(key, self._stop)
+      next_time += self._interval
+      delay = next_time - _monotonic()
+      if delay < 0:
+        next_time = _monotonic()
+        delay = 0
+      self._stop.wait(delay)
+
+  def _poll_bus(self, key, stop):
+    '''!
+      @brief Poll the modules of a bus in turn
+      @param key  Bus identifier returned by _bus_key()
+      @param stop threading.Event to give up the rest of the modules when it is set, None to poll all of them
+    '''
+    with self._lock:
+      modules = list(self._buses.get(key, []))
+    for sci in modules:
+      if (stop is not None) and stop.is_set():
+        break
+      t = time.time()
+      snapshot = sci.get_snapshot(self._inf)
+      self._deliver(sci, t, snapshot)
+
+  def _deliver(self, sci, t, snapshot):
+    '''!
+      @brief Hand a snapshot over to the ring, the callback and the queue
+      @param sci      The polled module
+      @param t        Host time of the poll
+      @param snapshot Return value of sci.get_snapshot()
+    '''
+    if self._ring is not None:
+      self._ring.publish(sci, t, snapshot)
+    if self._callback is not None:
+      self._callback(sci, t, snapshot)
+    if self._queue is not None:
+      self._queue.put((sci, t, snapshot))
@@ -0,0 +1,235 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Ring.py
+  @brief Ring buffer of snapshots in a memory-mapped file, written by one process and read by any number of processes.
+  @n DFRobot_RP2040_SCI_Ring publishes every snapshot into the next slot of the file, e.g. as the ring of a DFRobot_RP2040_SCI_Poller,
+  @n and DFRobot_RP2040_SCI_RingReader maps the same file and reads the latest samples straight from the shared memory,
+  @n without a system call or a message for each sample. The default file is in /dev/shm, so the pages never go to disk.
+  @n
+  @n Layout, all fields little endian:
+  @n   header   magic "SCIR", version(2), readings per slot(2), slots(4), slot size(4), sku size(1), key size(1), unit size(1),
+  @n            padding to 24 bytes, samples published(8)
+  @n   slot     seq(8), sample number(8), host time.time()(8, double), I2C address(1), readings kept(1),
+  @n            readings of the snapshot(2), flags(1), then the readings kept
+  @n   reading  port(1), sku, key, unit, timestamp(8), value(8, double, NaN if not numeric), char strings UTF-8, 0 padded
+  @n Flags: SLOT_TRUNCATED if a reading was not kept or a char string was cut to its field, at a character boundary.
+  @n Each slot is a seqlock: the writer makes seq odd, writes the slot, and makes seq even again, then counts the sample in the header.
+  @n A reader copies the slot out and keeps it only if seq was even and unchanged around the copy, and the slot still holds the
+  @n sample it looked for, so a slot overwritten while it is read is never returned half old and half new.
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import os
+import mmap
+import struct
+import tempfile
+import threading
+import collections
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, SCIReading
+
+## Sample read from the ring: sample number, host time of the poll, I2C address of the module, list of SCIReading,
+## and whether the sample lost readings or had char strings cut, see DFRobot_RP2040_SCI_Ring
+SCISample = collections.namedtuple("SCISample", ["index", "t", "addr", "readings", "truncated"])
+
+## Default path of the ring buffer file
+DEFAULT_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "DFRobot_RP2040_SCI.ring")
+
+## Flag of a slot whose snapshot lost readings or had char strings cut
+SLOT_TRUNCATED = 0x01
+
+_MAGIC   = b"SCIR"
+_VERSION = 2
+_HEADER  = struct.Struct("<4sHHIIBBB")
+_HEAD    = struct.Struct("<Q")
+_SLOT    = struct.Struct("<QQdBBHB")
+_SEQ     = struct.Struct("<Q")
+_TIMESTAMP_SIZE = 8
+_HEADER_SIZE = 32
+_HEAD_OFFSET = 24
+_NAN = float("nan")
+
+def _reading_struct(sku, key, unit):
+  return struct.Struct("<B%ds%ds%ds%dsd"%(sku, key, unit, _TIMESTAMP_SIZE))
+
+def _text(value, size):
+  '''!
+    @brief Encode a char string into a field
+    @return (bytes, true if the string was cut to the field at a character boundary)
+  '''
+  data = value.encode("utf-8")
+  if len(data) <= size:
+    return data, False
+  return data[:size].decode("utf-8", "ignore").encode("utf-8"), True
+
+def _string(value):
+  return value.rstrip(b"\0").decode("utf-8", "replace")
+
+class DFRobot_RP2040_SCI_Ring:
+
+  def __init__(self, path = DEFAULT_PATH, slots = 1024, readings = 8, sku = 32, key = 16, unit = 8):
+    '''!
+      @brief DFRobot_RP2040_SCI_Ring Constructor, creates the ring buffer file, a file already there is replaced
+      @param path     Path of the file
+      @param slots    Number of samples kept, the oldest one is overwritten by each new sample
+      @param readings Readings kept in each sample, at most 255, the readings after them are not published
+      @param sku      Size of the sku field, bytes, at most 255, it holds the SKU list of a port, e.g. "SEN0334,SEN0228"
+      @param key      Size of the key field, bytes, at most 255
+      @param unit     Size of the unit field, bytes, at most 255
+      @n A sample which loses readings or has a char string cut to its field is read with truncated set
+      @exception ValueError A size is out of range
+    '''
+    if not (0 < readings <= 0xFF) or not (0 < sku <= 0xFF) or not (0 < key <= 0xFF) or not (0 < unit <= 0xFF):
+      raise ValueError("readings and field sizes must be 1 to 255")
+    self._path     = path
+    self._slots    = slots
+    self._readings = readings
+    self._reading  = _reading_struct(sku, key, unit)
+    self._sizes    = (sku, key, unit, _TIMESTAMP_SIZE)
+    self._slot_size = _SLOT.size + readings * self._reading.size
+    self._head     = 0
+    self._lock     = threading.Lock()
+    size = _HEADER_SIZE + slots * self._slot_size
+    tmp = "%s.%d"%(path, os.getpid())
+    fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+      os.ftruncate(fd, size)
+      self._map = mmap.mmap(fd, size)
+    finally:
+      os.close(fd)
+    _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, readings, slots, self._slot_size, sku, key, unit)
+    _HEAD.pack_into(self._map, _HEAD_OFFSET, 0)
+    os.rename(tmp, path)
+
+  def publish(self, sci, t, snapshot):
+    '''!
+      @brief Write a snapshot into the next slot, it has the signature of the callback of DFRobot_RP2040_SCI_Poller and
+      @n enable_prefetch(), snapshots with an error code are not published
+      @n The readings after the first readings of the constructor are dropped and the char strings longer than their fields
+      @n are cut, the slot is then flagged SLOT_TRUNCATED
+      @param sci      The module of the snapshot
+      @param t        Host time.time() of the snapshot
+      @param snapshot Return value of sci.get_snapshot()
+    '''
+    if snapshot[DFRobot_RP2040_SCI.INDEX_ERR_CODE] != DFRobot_RP2040_SCI.ERR_CODE_NONE:
+      return
+    readings = snapshot[1][:self._readings]
+    flags = SLOT_TRUNCATED if len(snapshot[1]) > len(readings) else 0
+    fields = []
+    for reading in readings:
+      texts = [_text(text, size) for text, size in zip((reading.sku, reading.key, reading.unit, reading.timestamp), self._sizes)]
+      if [cut for data, cut in texts if cut]:
+        flags |= SLOT_TRUNCATED
+      value = _NAN if reading.value is None else float(reading.value)
+      fields.append([reading.port] + [data for data, cut in texts] + [value])
+    with self._lock:
+      index = self._head
+      offset = _HEADER_SIZE + (index % self._slots) * self._slot_size
+      seq = _SEQ.unpack_from(self._map, offset)[0]
+      _SEQ.pack_into(self._map, offset, seq + 1)
+      _SLOT.pack_into(self._map, offset, seq + 1, index, t, sci._addr, len(readings), min(len(snapshot[1]), 0xFFFF), flags)
+      pos = offset + _SLOT.size
+      for field in fields:
+        self._reading.pack_into(self._map, pos, *field)
+        pos += self._reading.size
+      _SEQ.pack_into(self._map, offset, seq + 2)
+      self._head = index + 1
+      _HEAD.pack_into(self._map, _HEAD_OFFSET, self._head)
+
+  def close(self, unlink = False):
+    '''!
+      @brief Unmap the file
+      @param unlink True to remove the file as well, the readers which have mapped it keep reading the last samples
+    '''
+    self._map.close()
+    if unlink:
+      os.unlink(self._path)
+
+class DFRobot_RP2040_SCI_RingReader:
+
+  ## Attempts to read a slot which is being written before it is skipped
+  READ_ATTEMPTS = 3
+
+  def __init__(self, path = DEFAULT_PATH):
+    '''!
+      @brief DFRobot_RP2040_SCI_RingReader Constructor, maps the file of a DFRobot_RP2040_SCI_Ring read-only
+      @param path Path of the file
+      @exception ValueError The file is not a ring buffer of this version
+    '''
+    with open(path, "rb") as f:
+      self._map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    magic, version, self._readings, self._slots, self._slot_size, sku, key, unit = _HEADER.unpack_from(self._map, 0)
+    if (magic != _MAGIC) or (version != _VERSION):
+      self._map.close()
+      raise ValueError("%s is not a DFRobot_RP2040_SCI ring buffer"%path)
+    self._reading = _reading_struct(sku, key, unit)
+
+  def get_head(self):
+    '''!
+      @brief Get the number of samples published so far, the number of the next sample
+      @return Int
+    '''
+    return _HEAD.unpack_from(self._map, _HEAD_OFFSET)[0]
+
+  def get_latest(self, n = 1):
+    '''!
+      @brief Get the latest samples
+      @param n Number of samples, at most the number of slots
+      @return List of SCISample, oldest first, it may hold fewer than n samples if fewer were published or the
+      @n      writer overwrote some of them while they were read
+    '''
+    head = self.get_head()
+    return self._read(max(head - min(n, self._slots), 0), head)
+
+  def get_since(self, index):
+    '''!
+      @brief Get the samples published since a sample, to consume every sample, e.g. index = samples[-1].index + 1
+      @param index Number of the first sample, the samples already overwritten are skipped
+      @return List of SCISample, oldest first
+    '''
+    head = self.get_head()
+    return self._read(max(index, head - self._slots, 0), head)
+
+  def close(self):
+    '''!
+      @brief Unmap the file
+    '''
+    self._map.close()
+
+  def _read(self, first, head):
+    '''!
+      @brief Read samples first to head - 1
+      @return List of SCISample
+    '''
+    samples = []
+    for index in range(first, head):
+      sample = self._read_slot(index)
+      if sample is not None:
+        samples.append(sample)
+    return samples
+
+  def _read_slot(self, index):
+    '''!
+      @brief Read a sample under the seqlock of its slot
+      @return SCISample, None if the slot already holds a newer sample or stays being written
+    '''
+    offset = _HEADER_SIZE + (index % self._slots) * self._slot_size
+    size = self._reading.size
+    for _ in range(self.READ_ATTEMPTS):
+      seq, number, t, addr, count, total, flags = _SLOT.unpack_from(self._map, offset)
+      if seq & 1:
+        continue
+      if number != index:
+        return None
+      fields = [self._reading.unpack_from(self._map, offset + _SLOT.size + i * size) for i in range(min(count, self._readings))]
+      if _SEQ.unpack_from(self._map, offset)[0] != seq:
+        continue
+      readings = [SCIReading(port, _string(sku), _string(key), None if value != value else value, _string(unit), _string(timestamp))
+                  for port, sku, key, unit, timestamp, value in fields]
+      return SCISample(index, t, addr, readings, bool(flags & SLOT_TRUNCATED) or (total > len(readings)))
+    return None
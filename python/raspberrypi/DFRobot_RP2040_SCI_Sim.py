@@ -0,0 +1,529 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file DFRobot_RP2040_SCI_Sim.py
+  @brief In-process simulator of the SCI Acquisition Module, to run the driver without a Raspberry Pi and the board.
+  @n DFRobot_RP2040_SCI_SimModule implements the packet protocol of the firmware: command packets [cmd, len_l, len_h, args...],
+  @n response packets [status, cmd, len_l, len_h, data...] with status 0x53 or 0x63, all CMD_* commands, CMD_RESET,
+  @n a configurable latency of each command and injected faults. DFRobot_RP2040_SCI_SimBus connects simulated modules by
+  @n I2C address, and DFRobot_RP2040_SCI_Sim is the driver talking to them, with the same methods as DFRobot_RP2040_SCI_IIC.
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import datetime
+import threading
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI, DFRobot_RP2040_SCI_IIC, _monotonic
+
+SCI = DFRobot_RP2040_SCI
+
+class DFRobot_RP2040_SCI_SimModule:
+  '''enum Sensor kind'''
+  ## Analog sensor, on port1
+  eKindAnalog  = 0
+  ## Digital sensor, on port1
+  eKindDigital = 1
+  ## I2C sensor, on port2 or port3
+  eKindI2C     = 2
+  ## UART sensor, on port2 or port3
+  eKindUART    = 3
+
+  '''enum Fault'''
+  ## The command is lost, there is no response
+  eFaultDrop         = 0
+  ## The response carries another command
+  eFaultWrongCommand = 1
+  ## The response has status 0x63 and error code ERR_CODE_SLAVE_BREAK
+  eFaultFailed       = 2
+  ## The response is preceded by the response of another command, as left by a command which timed out
+  eFaultStale        = 3
+  ## The response is preceded by NOISE, stray bytes on the bus
+  eFaultNoise        = 4
+  ## The bus reads 0xFF instead of 0 until the response is ready, as a released bus does
+  eFaultIdleHigh     = 5
+
+  ## Stray bytes of eFaultNoise, neither an idle byte (0 or 0xFF) nor a response status
+  NOISE = (0xFE, 0xA5, 0x5A, 0x01, 0x7F, 0x10, 0x80, 0xFE)
+
+  ## Sensors known to the simulated firmware, SKU: (kind, [(attribute name, value, unit), ...])
+  ## a value is a number, a char string, or a function of the time since the module started, unit s
+  SENSORS = {
+    "SEN0161": (eKindAnalog,  [("pH", 7.0, "")]),
+    "SEN0114": (eKindAnalog,  [("Moisture", 512, "")]),
+    "KIT0021": (eKindDigital, [("Button", 0, "")]),
+    "SEN0334": (eKindI2C,     [("Temp_Air", 28.65, "C"), ("Humi_Air", 30.12, "%RH")]),
+    "SEN0228": (eKindI2C,     [("Light", 235.4, "lx")]),
+    "SEN0219": (eKindUART,    [("CO2", 400, "ppm")]),
+  }
+
+  ## Refresh period of each refresh rate, unit s, eRefreshRateMs is simulated as 10ms
+  REFRESH_PERIODS = (0.01, 1, 3, 5, 10, 30, 60, 300, 600)
+
+  ## Valid I2C addresses of the module
+  ADDRESSES = (SCI.RP2040_SCI_ADDR_0X21, SCI.RP2040_SCI_ADDR_0X22, SCI.RP2040_SCI_ADDR_0X23)
+
+  def __init__(self, addr = SCI.RP2040_SCI_ADDR_0X21, ports = ("SEN0161", "SEN0334", "NULL"), version = 0x0102, latency = 0.001):
+    '''!
+      @brief DFRobot_RP2040_SCI_SimModule Constructor
+      @param addr    I2C address of the module
+      @param ports   SKUs configured on port1, port2 and port3, "NULL" for none,
+      @n             several I2C sensors chained on port2 or port3 are separated using ",", e.g. "SEN0334,SEN0228"
+      @param version Firmware version returned by CMD_GET_VERSION
+      @param latency Time from a command to its response, unit s, see set_latency()
+    '''
+    self.addr      = addr
+    self._next_addr = None
+    self._version  = version
+    self._latency  = latency
+    self._latencies = {}
+    self._sensors  = dict(self.SENSORS)
+    self._ports    = []
+    for sku in ports:
+      self._ports.append([self._mode(sku), sku])
+    self._refresh  = SCI.eRefreshRate1s
+    self._record   = False
+    self._display  = True
+    self._start    = _monotonic()
+    self._rtc_offset = datetime.timedelta(0)
+    self._faults   = []
+    self._rx       = bytearray()
+    self._tx       = bytearray()
+    self._tx_pos   = 0
+    self._ready_at = 0
+    self._idle     = 0
+    self._stats    = {"commands": {}, "resets": 0, "faults": 0, "bytes_written": 0, "bytes_read": 0}
+
+  def set_sensor(self, sku, kind, attributes):
+    '''!
+      @brief Add or replace a sensor known to the module
+      @param sku        Sensor SKU, at most SKU_MAX_VAILD_LEN characters
+      @param kind       eKindAnalog, eKindDigital, eKindI2C or eKindUART
+      @param attributes List of (attribute name, value, unit), a value is a number, a char string,
+      @n                or a function of the time since the module started, unit s
+    '''
+    self._sensors[sku] = (kind, list(attributes))
+
+  def set_latency(self, latency, cmd = None):
+    '''!
+      @brief Set the time from a command to its response
+      @param latency Latency, unit s
+      @param cmd     Command, e.g. CMD_GET_INFO, None for all the commands without a latency of their own
+    '''
+    if cmd is None:
+      self._latency = latency
+    else:
+      self._latencies[cmd] = latency
+
+  def inject_fault(self, fault, count = 1, cmd = None):
+    '''!
+      @brief Make the next commands fail, faults are used in the order they are injected
+      @param fault eFaultDrop, eFaultWrongCommand, eFaultFailed, eFaultStale, eFaultNoise or eFaultIdleHigh
+      @param count Number of commands to fail
+      @param cmd   Command to fail, None for any command except CMD_RESET
+    '''
+    self._faults.append([fault, count, cmd])
+
+  def get_stats(self):
+    '''!
+      @brief Get the counters of the module
+      @return Dict
+      @n      "commands"       Dict, command: number of command packets received
+      @n      "resets"         Number of CMD_RESET received
+      @n      "faults"         Number of injected faults used
+      @n      "bytes_written"  Bytes written to the module
+      @n      "bytes_read"     Bytes read from the module
+    '''
+    stats = dict(self._stats)
+    stats["commands"] = dict(self._stats["commands"])
+    return stats
+
+  def write(self, data):
+    '''!
+      @brief Receive bytes from the I2C controller, a complete command packet is executed at once
+      @param data Bytes, list or bytearray
+    '''
+    self._rx.extend(bytearray(data))
+    self._stats["bytes_written"] += len(data)
+    while len(self._rx) >= 3:
+      length = self._rx[SCI.INDEX_ARGS_NUM_L] | (self._rx[SCI.INDEX_ARGS_NUM_H] << 8)
+      if len(self._rx) < 3 + length:
+        break
+      cmd = self._rx[SCI.INDEX_CMD]
+      args = self._rx[SCI.INDEX_ARGS:SCI.INDEX_ARGS + length]
+      del self._rx[:3 + length]
+      self._execute(cmd, args)
+
+  def read_into(self, buf, start, length):
+    '''!
+      @brief Send bytes to the I2C controller, 0 (0xFF with eFaultIdleHigh) before the response is ready and after it is read out
+      @param buf    bytearray
+      @param start  Index of the first byte
+      @param length Number of bytes
+    '''
+    self._stats["bytes_read"] += length
+    if (self._tx_pos >= len(self._tx)) or (_monotonic() < self._ready_at):
+      buf[start:start + length] = bytearray([self._idle]) * length
+      return
+    n = min(length, len(self._tx) - self._tx_pos)
+    buf[start:start + n] = self._tx[self._tx_pos:self._tx_pos + n]
+    buf[start + n:start + length] = bytearray(length - n)
+    self._tx_pos += n
+    if (self._tx_pos >= len(self._tx)) and (self._next_addr is not None):
+      self.addr = self._next_addr
+      self._next_addr = None
+
+  def _execute(self, cmd, args):
+    '''!
+      @brief Execute a command packet and prepare its response
+      @param cmd  Command
+      @param args bytearray of the arguments
+    '''
+    self._tx = bytearray()
+    self._tx_pos = 0
+    self._idle = 0
+    if cmd == SCI.CMD_RESET:
+      self._stats["resets"] += 1
+      self._rx = bytearray()
+      return
+    commands = self._stats["commands"]
+    commands[cmd] = commands.get(cmd, 0) + 1
+    fault = self._take_fault(cmd)
+    if fault == self.eFaultDrop:
+      return
+    status, data = self._handle(cmd, args)
+    latency = self._latencies.get(cmd, self._latency)
+    if fault == self.eFaultWrongCommand:
+      cmd = (cmd + 1) & 0xFF
+    elif fault == self.eFaultFailed:
+      status, data = SCI.STATUS_FAILED, [SCI.ERR_CODE_SLAVE_BREAK]
+    elif fault == self.eFaultStale:
+      other = SCI.CMD_GET_VALUE if cmd == SCI.CMD_GET_INFO else SCI.CMD_GET_INFO
+      self._tx = self._packet(other, *self._handle(other, bytearray([SCI.eALL, 1])))
+    elif fault == self.eFaultNoise:
+      self._tx = bytearray(self.NOISE)
+    elif fault == self.eFaultIdleHigh:
+      self._idle = 0xFF
+    self._tx += self._packet(cmd, status, data)
+    self._ready_at = _monotonic() + latency
+
+  def _packet(self, cmd, status, data):
+    '''!
+      @brief Response packet [status, cmd, len_l, len_h, data...]
+    '''
+    return bytearray([status, cmd, len(data) & 0xFF, (len(data) >> 8) & 0xFF]) + bytearray(data)
+
+  def _take_fault(self, cmd):
+    '''!
+      @brief Use the first injected fault which applies to the command
+      @return The fault, None if there is none
+    '''
+    for entry in self._faults:
+      fault, count, target = entry
+      if (target is None) or (target == cmd):
+        entry[1] -= 1
+        if entry[1] <= 0:
+          self._faults.remove(entry)
+        self._stats["faults"] += 1
+        return fault
+    return None
+
+  def _handle(self, cmd, args):
+    '''!
+      @brief Run a command the way the firmware does
+      @return (status, valid data)
+    '''
+    if cmd in (SCI.CMD_SET_IF0, SCI.CMD_SET_IF1, SCI.CMD_SET_IF2):
+      if args:
+        return self._set_port(cmd - SCI.CMD_SET_IF0, self._text(args))
+      mode, sku = self._ports[cmd - SCI.CMD_READ_IF0]
+      return self._success([mode] + list(bytearray(sku.encode("latin-1"))))
+    if cmd == SCI.CMD_SET_ADDR:
+      if not args:
+        return self._success([self.addr])
+      if args[0] not in self.ADDRESSES:
+        return self._failed(SCI.ERR_CODE_I2C_ADRESS)
+      self._next_addr = args[0]
+      return self._success([])
+    if cmd == SCI.CMD_SET_TIME:
+      if args:
+        return self._set_time(args)
+      return self._get_time()
+    if cmd in (SCI.CMD_RECORD_ON, SCI.CMD_RECORD_OFF):
+      self._record = (cmd == SCI.CMD_RECORD_ON)
+      return self._success([])
+    if cmd in (SCI.CMD_SCREEN_ON, SCI.CMD_SCREEN_OFF):
+      self._display = (cmd == SCI.CMD_SCREEN_ON)
+      return self._success([])
+    if cmd in (SCI.CMD_GET_NAME, SCI.CMD_GET_VALUE, SCI.CMD_GET_UNIT):
+      readings = self._readings(args[0] if args else SCI.eALL)
+      field = {SCI.CMD_GET_NAME: 1, SCI.CMD_GET_VALUE: 2, SCI.CMD_GET_UNIT: 3}[cmd]
+      return self._success_text(",".join([r[field] for r in readings]))
+    if cmd == SCI.CMD_GET_SKU:
+      inf = args[0] if args else SCI.eALL
+      return self._success_text(",".join([p[1] for i, p in enumerate(self._ports) if inf & (1 << i)]))
+    if cmd == SCI.CMD_GET_INFO:
+      inf = args[0] if args else SCI.eALL
+      stamped = len(args) > 1 and args[1]
+      items = []
+      for i in range(len(self._ports)):
+        sku = None
+        for r in self._readings(inf & (1 << i)):
+          item = "%s:%s %s"%(r[1], r[2], r[3])
+          if stamped and r[0] != sku:
+            # One timestamp leads the attributes of each sensor, as the firmware does
+            item = self._timestamp() + " " + item
+          sku = r[0]
+          items.append(item)
+      return self._success_text(",".join(items))
+    if SCI.CMD_GET_KEY_VALUE0 <= cmd <= SCI.CMD_GET_KEY_UINT2:
+      return self._get_key(cmd, args)
+    if cmd in (SCI.CMD_SKU_A, SCI.CMD_SKU_D, SCI.CMD_SKU_IIC, SCI.CMD_SKU_UART):
+      kind = {SCI.CMD_SKU_A: self.eKindAnalog, SCI.CMD_SKU_D: self.eKindDigital,
+              SCI.CMD_SKU_IIC: self.eKindI2C, SCI.CMD_SKU_UART: self.eKindUART}[cmd]
+      skus = sorted([sku for sku in self._sensors if self._sensors[sku][0] == kind])
+      return self._success_text(",".join(skus) or "NULL")
+    if cmd == SCI.CMD_GET_TIMESTAMP:
+      return self._success_text(self._timestamp())
+    if cmd == SCI.CMD_SET_REFRESH_TIME:
+      if not args:
+        return self._success([self._refresh])
+      if args[0] >= len(self.REFRESH_PERIODS):
+        return self._failed(SCI.ERR_CODE_ARGS)
+      self._refresh = args[0]
+      return self._success([])
+    if cmd == SCI.CMD_GET_VERSION:
+      return self._success([(self._version >> 8) & 0xFF, self._version & 0xFF])
+    return self._failed(SCI.ERR_CODE_CMD_INVAILED)
+
+  def _set_port(self, index, sku):
+    '''!
+      @brief Configure a port, port1 takes analog and digital sensors, port2 and port3 take I2C and UART sensors
+    '''
+    if sku != "NULL":
+      sensor = self._sensors.get(sku)
+      kinds = (self.eKindAnalog, self.eKindDigital) if index == 0 else (self.eKindI2C, self.eKindUART)
+      if (sensor is None) or (sensor[0] not in kinds):
+        return self._failed(SCI.ERR_CODE_SKU)
+    self._ports[index] = [self._mode(sku), sku]
+    return self._success([])
+
+  def _mode(self, sku):
+    '''!
+      @brief Sensor mode of a port configured with sku, eAnalogMode/eDigitalMode on port1, eI2CMode/eUARTMode on port2 and port3
+    '''
+    kind = self._sensors.get(sku.split(",")[0], (self.eKindAnalog,))[0]
+    if kind in (self.eKindDigital, self.eKindUART):
+      return SCI.eDigitalMode
+    return SCI.eAnalogMode
+
+  def _readings(self, inf, sku = None, key = None):
+    '''!
+      @brief Attributes of the sensors on the ports of inf at the latest refresh
+      @return List of (sku, name, value, unit)
+    '''
+    t = self._sample_time()
+    readings = []
+    for i, (mode, port_skus) in enumerate(self._ports):
+      if not (inf & (1 << i)):
+        continue
+      for port_sku in port_skus.split(","):
+        if (port_sku not in self._sensors) or ((sku is not None) and (sku != port_sku)):
+          continue
+        for name, value, unit in self._sensors[port_sku][1]:
+          if (key is not None) and (key != name):
+            continue
+          if callable(value):
+            value = value(t)
+          if isinstance(value, str):
+            text = value
+          else:
+            text = "%.2f"%value
+          readings.append((port_sku, name, text, unit))
+    return readings
+
+  def _get_key(self, cmd, args):
+    '''!
+      @brief CMD_GET_KEY_VALUE0/1/2 and CMD_GET_KEY_UINT0/1/2
+    '''
+    if cmd in (SCI.CMD_GET_KEY_VALUE0, SCI.CMD_GET_KEY_UINT0):
+      readings = self._readings(SCI.eALL, key = self._text(args))
+    elif cmd in (SCI.CMD_GET_KEY_VALUE1, SCI.CMD_GET_KEY_UINT1):
+      readings = self._readings(args[0], key = self._text(args[1:]))
+    else:
+      sku = self._text(args[1:1 + SCI.SKU_MAX_VAILD_LEN])
+      readings = self._readings(args[0], sku, self._text(args[1 + SCI.SKU_MAX_VAILD_LEN:]))
+    field = 2 if cmd <= SCI.CMD_GET_KEY_VALUE2 else 3
+    return self._success_text(",".join([r[field] for r in readings]))
+
+  def _now(self):
+    '''!
+      @brief Time of the RTC of the module
+    '''
+    return datetime.datetime.now() + self._rtc_offset
+
+  def _set_time(self, args):
+    if len(args) != 8:
+      return self._failed(SCI.ERR_CODE_ARGS)
+    try:
+      t = datetime.datetime(args[6] | (args[7] << 8), args[5], args[3], args[2], args[1], args[0])
+    except ValueError:
+      return self._failed(SCI.ERR_CODE_ARGS)
+    self._rtc_offset = t - datetime.datetime.now()
+    return self._success([])
+
+  def _get_time(self):
+    t = self._now()
+    return self._success([t.second, t.minute, t.hour, t.day, t.isoweekday() % 7, t.month, t.year & 0xFF, (t.year >> 8) & 0xFF])
+
+  def _sample_time(self):
+    '''!
+      @brief Time of the latest refresh since the module started, unit s
+    '''
+    period = self.REFRESH_PERIODS[self._refresh]
+    return int((_monotonic() - self._start) / period) * period
+
+  def _timestamp(self):
+    '''!
+      @brief Time stamp of the latest refresh, Hour:Minute:Second, or Minute:Second.1/100 second at eRefreshRateMs
+    '''
+    t = self._now() - datetime.timedelta(seconds = (_monotonic() - self._start) - self._sample_time())
+    if self._refresh == SCI.eRefreshRateMs:
+      return "%02d:%02d.%02d"%(t.minute, t.second, t.microsecond // 10000)
+    return "%02d:%02d:%02d"%(t.hour, t.minute, t.second)
+
+  def _text(self, data):
+    return bytes(bytearray(data)).decode("latin-1")
+
+  def _success(self, data):
+    return (SCI.STATUS_SUCCESS, data)
+
+  def _success_text(self, text):
+    return (SCI.STATUS_SUCCESS, bytearray(text.encode("latin-1")))
+
+  def _failed(self, err):
+    return (SCI.STATUS_FAILED, [err])
+
+class DFRobot_RP2040_SCI_SimBus:
+
+  def __init__(self):
+    '''!
+      @brief DFRobot_RP2040_SCI_SimBus Constructor, a simulated I2C bus
+    '''
+    self._modules = []
+    self._lock    = threading.Lock()
+
+  def add_module(self, module):
+    '''!
+      @brief Connect a simulated module to the bus
+      @param module DFRobot_RP2040_SCI_SimModule object
+      @return The module
+    '''
+    with self._lock:
+      self._modules.append(module)
+    return module
+
+  def get_module(self, addr):
+    '''!
+      @brief Get the module at an I2C address
+      @return DFRobot_RP2040_SCI_SimModule object, None if no module answers at addr
+    '''
+    with self._lock:
+      for module in self._modules:
+        if module.addr == addr:
+          return module
+    return None
+
+  def write(self, addr, data):
+    '''!
+      @brief Write bytes to the module at addr, nothing happens if there is none
+    '''
+    with self._lock:
+      module = self._find(addr)
+      if module is not None:
+        module.write(data)
+
+  def read_into(self, addr, buf, start, length):
+    '''!
+      @brief Read bytes from the module at addr into a buffer, 0 if there is none
+    '''
+    with self._lock:
+      module = self._find(addr)
+      if module is None:
+        buf[start:start + length] = bytearray(length)
+      else:
+        module.read_into(buf, start, length)
+
+  def _find(self, addr):
+    for module in self._modules:
+      if module.addr == addr:
+        return module
+    return None
+
+class DFRobot_RP2040_SCI_Sim(DFRobot_RP2040_SCI_IIC):
+
+  def __init__(self, addr = SCI.RP2040_SCI_ADDR_0X21, bus = None):
+    '''!
+      @brief DFRobot_RP2040_SCI_Sim Constructor, the driver of a simulated module, the same as DFRobot_RP2040_SCI_IIC in byte mode
+      @param addr I2C address of the module
+      @param bus  DFRobot_RP2040_SCI_SimBus object, None for a bus of its own with one simulated module at addr
+    '''
+    if bus is None:
+      bus = DFRobot_RP2040_SCI_SimBus()
+      bus.add_module(DFRobot_RP2040_SCI_SimModule(addr))
+    self._sim_bus = bus
+    self._addr    = addr
+    self._bus_num = None
+    self._bus     = None
+    self._fd      = None
+    DFRobot_RP2040_SCI.__init__(self)
+
+  def get_sim_module(self):
+    '''!
+      @brief Get the simulated module the driver talks to, to set latencies or inject faults
+      @return DFRobot_RP2040_SCI_SimModule object, None if no module answers at the address
+    '''
+    return self._sim_bus.get_module(self._addr)
+
+  def _bus_key(self):
+    '''!
+      @brief Identify the physical bus of the module, modules on the same bus can not be accessed at the same time
+      @return ("sim", bus object id)
+    '''
+    return ("sim", id(self._sim_bus))
+
+  def _device_key(self):
+    '''!
+      @brief Identify the module, identical commands to the same module can share one transaction
+      @return ("sim", bus object id, I2C address)
+    '''
+    return ("sim", id(self._sim_bus), self._addr)
+
+  def _send_packet(self, pkt):
+    '''!
+      @brief Write a command packet to the simulated module
+      @param pkt List of data to be sent
+    '''
+    self._sim_bus.write(self._addr, pkt)
+
+  def _recv_data(self, length):
+    '''!
+      @brief Read bytes from the simulated module
+      @param length Number of bytes to be read
+      @return The read data list, a byte which can not be read is 0
+    '''
+    buf = bytearray(length)
+    self._recv_into(buf, 0, length)
+    return list(buf)
+
+  def _recv_into(self, buf, start, length):
+    '''!
+      @brief Read bytes from the simulated module into a buffer
+      @param buf    bytearray
+      @param start  Index of the first byte
+      @param length Number of bytes to be read
+    '''
+    self._sim_bus.read_into(self._addr, buf, start, length)
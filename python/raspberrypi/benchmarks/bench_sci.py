@@ -0,0 +1,259 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file bench_sci.py
+  @brief Benchmarks of the driver: import time, packet encoding, response framing by _recv_packet, decoding of get_information/get_values
+  @n payloads, full polls of a simulated module with a configurable bus latency, and polling of many simulated modules.
+  @n The results are written as JSON, run it with --compare on the file of another driver version to see the ratios.
+  @n   python bench_sci.py --output new.json
+  @n   python bench_sci.py --latency 0.002 --compare new.json
+  @n It runs on any computer, smbus and the board are not needed.
+
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import gc
+import json
+import time
+import hashlib
+import platform
+import argparse
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Sim import *
+from DFRobot_RP2040_SCI_Poller import *
+
+try:
+  _clock = time.perf_counter
+except AttributeError:
+  _clock = time.time
+
+SCI = DFRobot_RP2040_SCI
+
+## Sensors of the payload sizes benchmarked, port1, port2 and port3, from one attribute to a crowded module,
+## large still fits in the receive buffer of the driver, xlarge is streamed
+PAYLOADS = {
+  "small":  ("SEN0161", "NULL", "NULL"),
+  "medium": ("SEN0161", "SEN0334", "SEN0219"),
+  "large":  ("SEN0161", "BENCH08", "NULL"),
+  "xlarge": ("SEN0161", "BENCH08", "BENCH12"),
+}
+
+## Extra sensors of the simulated modules, with many attributes
+BENCH_SENSORS = {
+  "BENCH08": (DFRobot_RP2040_SCI_SimModule.eKindI2C, [("Attr%d"%i, 1000.0 + i, "u") for i in range(8)]),
+  "BENCH12": (DFRobot_RP2040_SCI_SimModule.eKindUART, [("Val%d"%i, 10.5 * i, "") for i in range(12)]),
+}
+
+class _ReplayTransport(DFRobot_RP2040_SCI):
+  '''!
+    @brief Transport which answers every command with the same response packet, to time the framing alone
+  '''
+  def __init__(self, response):
+    self._response = bytearray(response)
+    self._pos = 0
+    DFRobot_RP2040_SCI.__init__(self)
+    self.set_recv_wait(self.eWaitFixed)
+
+  def _send_packet(self, pkt):
+    self._pos = 0
+
+  def _recv_into(self, buf, start, length):
+    n = min(length, len(self._response) - self._pos)
+    buf[start:start + n] = self._response[self._pos:self._pos + n]
+    buf[start + n:start + length] = bytearray(length - n)
+    self._pos += n
+
+def _new_module(addr, ports, latency):
+  module = DFRobot_RP2040_SCI_SimModule(addr, ports, latency = latency)
+  for sku in BENCH_SENSORS:
+    module.set_sensor(sku, *BENCH_SENSORS[sku])
+  return module
+
+def _new_sci(ports, latency):
+  bus = DFRobot_RP2040_SCI_SimBus()
+  module = bus.add_module(_new_module(SCI.RP2040_SCI_ADDR_0X21, ports, latency))
+  sci = DFRobot_RP2040_SCI_Sim(SCI.RP2040_SCI_ADDR_0X21, bus)
+  return sci, module
+
+def _information(ports):
+  sci, module = _new_sci(ports, 0)
+  return sci.get_information(SCI.eALL, True), sci.get_values(SCI.eALL)
+
+def _measure(func, iterations, repeat, ops = 1):
+  '''!
+    @brief Time func() run iterations times, repeat times, and keep the fastest run
+    @return Dict of the timing, unit s
+  '''
+  runs = []
+  func()
+  gc_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    for _ in range(repeat):
+      t = _clock()
+      for _ in range(iterations):
+        func()
+      runs.append(_clock() - t)
+  finally:
+    if gc_enabled:
+      gc.enable()
+  best = min(runs)
+  count = iterations * ops
+  return {"iterations": count, "repeat": repeat, "best_s": best, "mean_s": sum(runs) / len(runs),
+          "per_op_us": best / count * 1e6, "ops_per_s": count / best if best else None}
+
+def bench_encode(args, results):
+  sci = _ReplayTransport([])
+  cases = [
+    ("encode/no_args",   SCI.CMD_GET_VERSION,   []),
+    ("encode/inf",       SCI.CMD_GET_INFO,      [SCI.eALL, 1]),
+    ("encode/value2",    SCI.CMD_GET_KEY_VALUE2, [SCI.ePort2, "SEN0334", "Humi_Air"]),
+    ("encode/rtc",       SCI.CMD_SET_TIME,      list(sci._encode_rtc(2023, 5, 6, 6, 12, 34, 56))),
+  ]
+  for name, opcode, fields in cases:
+    results[name] = _measure(lambda: sci._encode_packet(opcode, fields), args.iterations, args.repeat)
+
+def bench_framing(args, results):
+  for name in sorted(PAYLOADS):
+    info = _information(PAYLOADS[name])[0]
+    data = bytearray(info.encode("latin-1"))
+    response = bytearray([SCI.STATUS_SUCCESS, SCI.CMD_GET_INFO, len(data) & 0xFF, len(data) >> 8]) + data
+    sci = _ReplayTransport(response)
+    def run():
+      sci._send_packet(None)
+      sci._recv_packet(SCI.CMD_GET_INFO)
+    result = _measure(run, args.iterations, args.repeat)
+    result["payload_bytes"] = len(data)
+    results["framing/" + name] = result
+
+def bench_decode(args, results):
+  for name in sorted(PAYLOADS):
+    info, values = _information(PAYLOADS[name])
+    sci = _ReplayTransport([])
+    data = memoryview(bytearray(info.encode("latin-1")))
+    result = _measure(lambda: sci._parse_information(sci._decode_text(data)), args.iterations, args.repeat)
+    result["payload_bytes"] = len(data)
+    results["decode/information/" + name] = result
+    result = _measure(lambda: [float(v) for v in values.split(",")], args.iterations, args.repeat)
+    result["payload_bytes"] = len(values)
+    results["decode/values/" + name] = result
+
+def bench_poll(args, results):
+  iterations = max(1, args.iterations // 100)
+  for name in sorted(PAYLOADS):
+    sci, module = _new_sci(PAYLOADS[name], args.latency)
+    sci.begin()
+    sci.enable_schema_cache()
+    result = _measure(lambda: sci.get_snapshot(SCI.eALL), iterations, args.repeat)
+    result["latency_s"] = args.latency
+    results["poll/snapshot/" + name] = result
+    result = _measure(lambda: sci.get_values(SCI.eALL), iterations, args.repeat)
+    result["latency_s"] = args.latency
+    results["poll/values/" + name] = result
+
+def bench_multi(args, results):
+  poller = DFRobot_RP2040_SCI_Poller()
+  count = 0
+  for b in range(args.buses):
+    bus = DFRobot_RP2040_SCI_SimBus()
+    for i in range(args.modules):
+      addr = SCI.RP2040_SCI_ADDR_0X21 + i
+      bus.add_module(_new_module(addr, PAYLOADS["medium"], args.latency))
+      sci = DFRobot_RP2040_SCI_Sim(addr, bus)
+      sci.begin()
+      sci.enable_schema_cache()
+      poller.add_module(sci)
+      count += 1
+  result = _measure(poller.poll_once, max(1, args.iterations // 200), args.repeat, count)
+  result.update({"buses": args.buses, "modules_per_bus": args.modules, "latency_s": args.latency})
+  results["multi/poll_once"] = result
+
+## Program timing the import of the driver in a fresh interpreter, as short-lived collectors do
+IMPORT_PROGRAM = (
+  "import sys, time\n"
+  "clock = getattr(time, 'perf_counter', time.time)\n"
+  "sys.path.insert(0, %r)\n"
+  "t = clock()\n"
+  "import DFRobot_RP2040_SCI\n"
+  "print(clock() - t)\n"
+)
+
+def bench_import(args, results):
+  folder = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+  runs = []
+  for _ in range(args.repeat):
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_PROGRAM%folder])
+    runs.append(float(output.decode().strip()))
+  best = min(runs)
+  results["import/driver"] = {"iterations": 1, "repeat": args.repeat, "best_s": best, "mean_s": sum(runs) / len(runs),
+                              "per_op_us": best * 1e6, "ops_per_s": 1 / best if best else None}
+
+## Benchmark groups in the order they run
+BENCHMARKS = [("import", bench_import), ("encode", bench_encode), ("framing", bench_framing), ("decode", bench_decode),
+              ("poll", bench_poll), ("multi", bench_multi)]
+
+def _driver_digest():
+  path = sys.modules[SCI.__module__].__file__
+  if path.endswith(".pyc"):
+    path = path[:-1]
+  with open(path, "rb") as f:
+    return hashlib.sha1(f.read()).hexdigest()
+
+def _compare(results, path):
+  with open(path) as f:
+    baseline = json.load(f)["results"]
+  print("%-32s %14s %14s %8s"%("benchmark", "baseline us", "current us", "ratio"))
+  for name in sorted(results):
+    if name not in baseline:
+      continue
+    old, new = baseline[name]["per_op_us"], results[name]["per_op_us"]
+    print("%-32s %14.2f %14.2f %8.2f"%(name, old, new, new / old if old else 0))
+
+def main():
+  parser = argparse.ArgumentParser(description = "Benchmarks of the DFRobot_RP2040_SCI driver against the simulated module")
+  parser.add_argument("--iterations", type = int, default = 2000, help = "iterations of the fast benchmarks, polls run fewer")
+  parser.add_argument("--repeat", type = int, default = 5, help = "runs of each benchmark, the fastest is kept")
+  parser.add_argument("--latency", type = float, default = 0, help = "latency of every command of the simulated modules, unit s")
+  parser.add_argument("--modules", type = int, default = 3, help = "simulated modules on each bus for the multi benchmark, at most 3")
+  parser.add_argument("--buses", type = int, default = 2, help = "simulated buses for the multi benchmark")
+  parser.add_argument("--only", action = "append", choices = [name for name, func in BENCHMARKS], help = "run only this group, can be repeated")
+  parser.add_argument("--output", help = "write the JSON results to this file instead of stdout")
+  parser.add_argument("--compare", help = "JSON results of another run, print the ratios of the times per operation")
+  args = parser.parse_args()
+  args.modules = max(1, min(args.modules, 3))
+
+  results = {}
+  for name, func in BENCHMARKS:
+    if args.only and name not in args.only:
+      continue
+    func(args, results)
+
+  report = {
+    "driver_sha1": _driver_digest(),
+    "python": platform.python_implementation() + " " + platform.python_version(),
+    "machine": platform.machine(),
+    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "params": {"iterations": args.iterations, "repeat": args.repeat, "latency_s": args.latency,
+               "modules_per_bus": args.modules, "buses": args.buses},
+    "results": results,
+  }
+  text = json.dumps(report, indent = 2, sort_keys = True)
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(text + "\n")
+  elif not args.compare:
+    print(text)
+  if args.compare:
+    _compare(results, args.compare)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,39 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_async.py
+  @brief Read three SCI Acquisition Modules at 0x21, 0x22 and 0x23 concurrently with asyncio (Python 3 only)
+  
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Async import *
+
+addrs = [DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21, DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X22, DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X23]
+
+async def main():
+  modules = [DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_IIC(addr = addr, bus = 1)) for addr in addrs]
+  errs = await asyncio.gather(*[sci.begin() for sci in modules])
+  modules = [sci for sci, err in zip(modules, errs) if err == 0]
+  print("%d SCI Acquisition Modules initialized."%len(modules))
+
+  while True:
+    snapshots = await asyncio.gather(*[sci.get_snapshot() for sci in modules])
+    for sci, snapshot in zip(modules, snapshots):
+      if snapshot[sci.INDEX_ERR_CODE] == sci.ERR_CODE_NONE:
+        for reading in snapshot[1]:
+          print("0x%02x Port%d %s %s: %s %s"%(sci._io._addr, reading.port, reading.sku, reading.key, reading.value, reading.unit))
+    await asyncio.sleep(1)
+
+if __name__ == "__main__":
+  asyncio.run(main())
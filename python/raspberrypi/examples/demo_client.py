@@ -0,0 +1,33 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_client.py
+  @brief Read a module served by DFRobot_RP2040_SCI_Daemon, several such programs can run at the same time, start the daemon first:
+  @n   python DFRobot_RP2040_SCI_Daemon.py --bus 1 --addr 0x21
+
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI_Daemon import *
+
+def on_snapshot(client, t, snapshot):
+  for reading in snapshot[1]:
+    print("%.3f port%d %s %s: %s %s"%(t, reading.port, reading.sku, reading.key, reading.value, reading.unit))
+
+if __name__ == "__main__":
+  sci = DFRobot_RP2040_SCI_Client(addr = 0x21)
+  print("Modules served by the daemon: %s"%["bus %d 0x%02x"%(bus, addr) for bus, addr in sci.get_modules()])
+  print("Firmware version: %s"%sci.get_version())
+  print(sci.get_information(sci.eALL, True))
+  sci.subscribe(callback = on_snapshot)
+  while True:
+    time.sleep(1)
@@ -0,0 +1,38 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_filter.py
+  @brief Print the readings of all ports only when they change by more than a deadband, or at least once a minute
+  
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Filter import *
+
+sci = DFRobot_RP2040_SCI_IIC(addr = DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21)
+
+if __name__ == "__main__":
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+
+  # 0.2 by default, 0.5 C for the air temperature and 2% for the air humidity of SEN0334, a heartbeat every 60s
+  flt = DFRobot_RP2040_SCI_Filter(absolute = 0.2, heartbeat = 60)
+  flt.set_deadband("Temp_Air", absolute = 0.5, heartbeat = 60)
+  flt.set_deadband("Humi_Air", relative = 0.02, heartbeat = 60)
+
+  for snapshot in flt.stream(sci.stream(inf = sci.eALL)):
+    if snapshot[sci.INDEX_ERR_CODE] == sci.ERR_CODE_NONE:
+      for reading in snapshot[1]:
+        print("Port%d %s %s %s: %s %s"%(reading.port, reading.sku, reading.timestamp, reading.key, reading.value, reading.unit))
@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_poller.py
+  @brief Poll three SCI Acquisition Modules at 0x21, 0x22 and 0x23 on I2C bus 1, and print the snapshots from a queue
+  
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Poller import *
+
+addrs = [DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21, DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X22, DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X23]
+
+if __name__ == "__main__":
+  snapshots = queue.Queue()
+  poller = DFRobot_RP2040_SCI_Poller(interval = 1, queue = snapshots)
+  for addr in addrs:
+    sci = DFRobot_RP2040_SCI_IIC(addr = addr, bus = 1)
+    if sci.begin() != 0:
+      print("Initialization SCI Acquisition Module 0x%02x failed."%addr)
+      continue
+    print("Initialization SCI Acquisition Module 0x%02x done."%addr)
+    poller.add_module(sci)
+  poller.start()
+
+  while True:
+    sci, t, snapshot = snapshots.get()
+    if snapshot[sci.INDEX_ERR_CODE] == sci.ERR_CODE_NONE:
+      for reading in snapshot[1]:
+        print("0x%02x Port%d %s %s: %s %s"%(sci._addr, reading.port, reading.sku, reading.key, reading.value, reading.unit))
@@ -0,0 +1,45 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_prefetch.py
+  @brief Read the values of all ports from several threads, answered from the snapshot prefetched by a background thread
+  @n instead of one bus transaction per read
+
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+
+sci = DFRobot_RP2040_SCI_IIC(addr = 0x21)
+
+def reader(name):
+  while True:
+    print("%s: %s %s"%(name, sci.get_timestamp(), sci.get_values(sci.eALL)))
+    time.sleep(0.5)
+
+if __name__ == "__main__":
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+  sci.set_refresh_rate(sci.eRefreshRate1s)
+  sci.enable_prefetch(inf = sci.eALL)
+
+  for i in range(3):
+    thread = threading.Thread(target = reader, args = ("reader%d"%i,))
+    thread.daemon = True
+    thread.start()
+
+  while True:
+    time.sleep(5)
+    print(sci.get_prefetch_stats())
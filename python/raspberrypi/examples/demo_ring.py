@@ -0,0 +1,52 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_ring.py
+  @brief Poll the module at the fastest refresh rate and publish every snapshot into a shared-memory ring buffer,
+  @n then read the latest samples from the ring in another process, as any number of reader processes can do
+
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Poller import *
+from DFRobot_RP2040_SCI_Ring import *
+
+def reader():
+  ring = DFRobot_RP2040_SCI_RingReader()
+  index = ring.get_head()
+  while True:
+    time.sleep(1)
+    samples = ring.get_since(index)
+    if samples:
+      index = samples[-1].index + 1
+      print("%d samples, latest: %s"%(len(samples), [(r.key, r.value) for r in samples[-1].readings]))
+
+if __name__ == "__main__":
+  sci = DFRobot_RP2040_SCI_IIC(addr = 0x21)
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+  sci.set_refresh_rate(sci.eRefreshRateMs)
+  sci.enable_schema_cache()
+
+  poller = DFRobot_RP2040_SCI_Poller(interval = 0.01, inf = sci.ePort1, ring = DFRobot_RP2040_SCI_Ring(slots = 1024))
+  poller.add_module(sci)
+  poller.start()
+
+  process = multiprocessing.Process(target = reader)
+  process.daemon = True
+  process.start()
+  while True:
+    time.sleep(1)
@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_sim.py
+  @brief Run the driver against the simulated SCI Acquisition Module, without a Raspberry Pi and the board,
+  @n and show how the simulated firmware answers a slow command and an injected fault
+
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+from DFRobot_RP2040_SCI_Sim import *
+
+bus = DFRobot_RP2040_SCI_SimBus()
+module = bus.add_module(DFRobot_RP2040_SCI_SimModule(addr = 0x21, ports = ("SEN0161", "SEN0334", "SEN0219")))
+sci = DFRobot_RP2040_SCI_Sim(addr = 0x21, bus = bus)
+
+if __name__ == "__main__":
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+  print("Firmware version: %s"%sci.get_version_description(sci.get_version()))
+  print(sci.get_information(sci.eALL, True))
+
+  module.set_latency(0.1, DFRobot_RP2040_SCI.CMD_GET_INFO)
+  t = time.time()
+  sci.get_information(sci.eALL, False)
+  print("CMD_GET_INFO with 100ms latency took %.3fs"%(time.time() - t))
+
+  module.inject_fault(module.eFaultDrop, cmd = DFRobot_RP2040_SCI.CMD_GET_VALUE)
+  sci.set_retry(attempts = 2, attempt_timeout = 0.2)
+  print("Values after a dropped response: %s"%sci.get_values(sci.eALL))
+  print("Retry counters: %s"%sci.get_retry_stats())
+  print("Simulated module counters: %s"%module.get_stats())
@@ -0,0 +1,43 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_snapshot.py
+  @brief Get the typed readings of all ports with a single command
+  
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+
+sci = DFRobot_RP2040_SCI_IIC(addr = DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21)
+
+if __name__ == "__main__":
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+
+  while True:
+    '''!
+      @fn get_snapshot
+      @param inf Parameters for selecting port
+      @n     ePort1                                           Select Port1
+      @n     ePort2                                           Select Port2
+      @n     ePort3                                           Select Port3
+      @n     eALL  or  (ePort1 | ePort2 | ePort3)             Select Port1, Port2 and Port3
+    '''
+    snapshot = sci.get_snapshot(inf = sci.eALL)
+    if snapshot[sci.INDEX_ERR_CODE] == sci.ERR_CODE_NONE:
+      for reading in snapshot[1]:
+        print("Port%d %s %s %s: %s %s"%(reading.port, reading.sku, reading.timestamp, reading.key, reading.value, reading.unit))
+    print("\r\n")
+    time.sleep(1)
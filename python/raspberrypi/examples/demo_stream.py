@@ -0,0 +1,34 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file demo_stream.py
+  @brief Print each new sample of all ports once, at the data refresh rate of the SCI Acquisition Module
+  
+  @copyright   Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @version  V1.0
+  @date  2021-08-11
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI import *
+
+sci = DFRobot_RP2040_SCI_IIC(addr = DFRobot_RP2040_SCI.RP2040_SCI_ADDR_0X21)
+
+if __name__ == "__main__":
+  while sci.begin() != 0:
+    print("Initialization SCI Acquisition Module failed.")
+    time.sleep(1)
+  print("Initialization SCI Acquisition Module done.")
+
+  sci.set_refresh_rate(sci.eRefreshRate1s)
+  for snapshot in sci.stream(inf = sci.eALL):
+    if snapshot[sci.INDEX_ERR_CODE] == sci.ERR_CODE_NONE:
+      for reading in snapshot[1]:
+        print("Port%d %s %s %s: %s %s"%(reading.port, reading.sku, reading.timestamp, reading.key, reading.value, reading.unit))
+    print("\r\n")
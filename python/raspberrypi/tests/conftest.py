@@ -0,0 +1,37 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file conftest.py
+  @brief Fixtures of the tests, which drive the driver against the simulated SCI Acquisition Module, run them with
+  @n   python -m pytest tests
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim, DFRobot_RP2040_SCI_SimBus, DFRobot_RP2040_SCI_SimModule
+
+## Sensor with a response longer than the receive buffer of the driver
+BIG_SENSOR = ("BIG0001", DFRobot_RP2040_SCI_SimModule.eKindI2C, [("Channel%02d"%i, 100.0 + i, "mV") for i in range(16)])
+
+@pytest.fixture
+def bus():
+  return DFRobot_RP2040_SCI_SimBus()
+
+@pytest.fixture
+def module(bus):
+  return bus.add_module(DFRobot_RP2040_SCI_SimModule(0x21, ("SEN0161", "SEN0334", "NULL"), latency = 0))
+
+@pytest.fixture
+def sci(bus, module):
+  sci = DFRobot_RP2040_SCI_Sim(0x21, bus)
+  assert sci.begin() == 0
+  return sci
@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_async.py
+  @brief The asyncio client returns the same as the blocking driver for every command
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import time
+import asyncio
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI as SCI
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim
+from DFRobot_RP2040_SCI_Async import DFRobot_RP2040_SCI_Async
+
+## Commands compared, (name, args)
+CALLS = [
+  ("get_version", ()), ("get_port1", ()), ("get_port2", ()), ("get_port3", ()), ("get_refresh_rate", ()),
+  ("get_information", (SCI.eALL, False)), ("get_snapshot", (SCI.eALL,)), ("get_snapshot", (SCI.ePort2,)),
+  ("get_batch", ([(SCI.ePort2, "SEN0334", "Humi_Air"), (SCI.ePort1, "SEN0161", "pH")],)),
+  ("get_sku", (SCI.eALL,)), ("get_keys", (SCI.eALL,)), ("get_values", (SCI.eALL,)), ("get_units", (SCI.eALL,)),
+  ("get_value0", ("Temp_Air",)), ("get_value1", (SCI.ePort2, "Humi_Air")), ("get_value2", (SCI.ePort2, "SEN0334", "Temp_Air")),
+  ("get_unit0", ("Temp_Air",)), ("get_unit1", (SCI.ePort2, "Humi_Air")), ("get_unit2", (SCI.ePort2, "SEN0334", "Temp_Air")),
+  ("get_analog_sensor_sku", ()), ("get_digital_sensor_sku", ()), ("get_i2c_sensor_sku", ()), ("get_uart_sensor_sku", ()),
+  ("check_sku", (SCI.ePort1, "SEN0114")), ("check_sku", (SCI.ePort2, "SEN0114")),
+  ("set_port3", ("SEN0219",)), ("get_keys", (SCI.eALL,)), ("set_refresh_rate", (SCI.eRefreshRate3s,)),
+  ("get_refresh_rate", ()), ("get_i2c_address", ()),
+]
+
+def _run_parity(bus, setup = None):
+  '''!
+    @brief Run CALLS on the blocking driver and on the asyncio client of the same simulated module
+    @return (blocking results, asyncio results)
+  '''
+  sync = DFRobot_RP2040_SCI_Sim(0x21, bus)
+  client = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  if setup is not None:
+    setup(sync)
+    setup(client)
+  expected = []
+  sync.begin()
+  for name, args in CALLS:
+    expected.append(getattr(sync, name)(*args))
+  async def run():
+    rslt = []
+    await client.begin()
+    # Undo the settings of the blocking run
+    await client.set_port3("NULL")
+    await client.set_refresh_rate(SCI.eRefreshRate1s)
+    for name, args in CALLS:
+      rslt.append(await getattr(client, name)(*args))
+    return rslt
+  return expected, asyncio.run(run())
+
+def test_async_parity(bus, module):
+  expected, rslt = _run_parity(bus)
+  assert rslt == expected
+
+def test_async_concurrent_modules(bus):
+  from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_SimModule
+  for addr in (0x22, 0x23):
+    bus.add_module(DFRobot_RP2040_SCI_SimModule(addr, latency = 0.005))
+  clients = [DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(addr, bus)) for addr in (0x22, 0x23)]
+  async def run():
+    return await asyncio.gather(*[c.get_values(SCI.eALL) for c in clients for _ in range(5)])
+  assert asyncio.run(run()) == ["7.00,28.65,30.12"] * 10
+
+def test_async_parity_schema_cache(bus, module):
+  expected, rslt = _run_parity(bus, lambda sci: sci.enable_schema_cache())
+  assert rslt == expected
+  assert [r.sku for r in rslt[6][1]] == ["SEN0161", "SEN0334", "SEN0334"]
+
+def test_async_revalidate_schema(bus, module):
+  client = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  client.enable_schema_cache()
+  async def run():
+    await client.get_snapshot(SCI.eALL)
+    assert await client.get_sku(SCI.eALL) == "SEN0161,SEN0334,NULL"
+    return await client.revalidate_schema()
+  assert asyncio.run(run()) is True
+
+def test_async_parity_sku_catalogue_cache(bus, module, tmp_path):
+  path = str(tmp_path / "sku_catalogue.json")
+  expected, rslt = _run_parity(bus, lambda sci: sci.enable_sku_catalogue_cache(path))
+  assert rslt == expected
+  client = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  client.enable_sku_catalogue_cache(path)
+  async def run():
+    return await client.get_analog_sensor_sku(), await client.set_port1("SEN0114")
+  assert asyncio.run(run()) == ("SEN0114,SEN0161", SCI.ERR_CODE_NONE)
+  sync = DFRobot_RP2040_SCI_Sim(0x21, bus)
+  sync.enable_sku_catalogue_cache(path)
+  assert sync.set_port1("SEN0161") == SCI.ERR_CODE_NONE
+
+def test_async_bus_lock_per_event_loop(bus):
+  from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_SimModule
+  for addr in (0x22, 0x23):
+    bus.add_module(DFRobot_RP2040_SCI_SimModule(addr, latency = 0.002))
+  clients = [DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(addr, bus)) for addr in (0x22, 0x23)]
+  async def run():
+    return await asyncio.gather(*[c.get_version() for c in clients])
+  for _ in range(2):
+    assert asyncio.run(run()) == [0x0102, 0x0102]
+
+def test_async_reset_after_timeout_within_deadline(bus, module):
+  client = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  module.inject_fault(module.eFaultDrop, cmd = SCI.CMD_GET_VALUE)
+  async def run():
+    with client.deadline(0.05):
+      values = await client.get_values(SCI.eALL)
+    return values, await client.get_keys(SCI.eALL)
+  assert asyncio.run(run()) == ("", "pH,Temp_Air,Humi_Air")
+  assert module.get_stats()["resets"] == 1
+
+def test_async_resync_gives_up_when_nothing_follows(bus, module):
+  client = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  client.set_resync()
+  module.inject_fault(module.eFaultWrongCommand, cmd = SCI.CMD_GET_VALUE)
+  async def run():
+    t = time.time()
+    values = await client.get_values(SCI.eALL)
+    return values, time.time() - t, await client.get_values(SCI.eALL)
+  values, elapsed, again = asyncio.run(run())
+  assert (values, again) == ("", "7.00,28.65,30.12")
+  assert elapsed < 1.0
+  assert module.get_stats()["resets"] == 1
+
+def test_async_reset_before_bus_is_released(bus, module, monkeypatch):
+  first = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  second = DFRobot_RP2040_SCI_Async(DFRobot_RP2040_SCI_Sim(0x21, bus))
+  module.set_latency(0.3, SCI.CMD_GET_VALUE)
+  order = []
+  execute = module._execute
+  def record(cmd, args):
+    order.append(cmd)
+    execute(cmd, args)
+  monkeypatch.setattr(module, "_execute", record)
+  async def late():
+    with first.deadline(0.1):
+      return await first.get_values(SCI.eALL)
+  async def other():
+    await asyncio.sleep(0.02)
+    return await second.get_keys(SCI.eALL)
+  async def run():
+    return await asyncio.gather(late(), other())
+  assert asyncio.run(run()) == ["", "pH,Temp_Air,Humi_Air"]
+  # The late response is cleared by CMD_RESET before the other command is sent
+  assert order == [SCI.CMD_GET_VALUE, SCI.CMD_RESET, SCI.CMD_GET_NAME]
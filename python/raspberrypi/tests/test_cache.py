@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_cache.py
+  @brief Caches of the driver against the simulated module: the supported SKU catalogue, the batch layout and the prefetch
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import os
+import time
+
+import pytest
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI as SCI
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim, DFRobot_RP2040_SCI_SimModule
+
+def test_catalogue_rejects_unsupported_sku(sci, module, tmp_path):
+  sci.enable_sku_catalogue_cache(str(tmp_path / "catalogue.json"))
+  assert sci.set_port1("SEN9999") == SCI.ERR_CODE_SKU
+  assert SCI.CMD_SET_IF0 not in module.get_stats()["commands"]
+
+def test_catalogue_read_failure_sends_command(sci, module, tmp_path):
+  sci.enable_sku_catalogue_cache(str(tmp_path / "catalogue.json"))
+  module.inject_fault(module.eFaultFailed, cmd = SCI.CMD_SKU_A)
+  assert sci.check_sku(SCI.ePort1, "SEN0114") not in (SCI.ERR_CODE_NONE, SCI.ERR_CODE_SKU)
+  module.inject_fault(module.eFaultFailed, cmd = SCI.CMD_SKU_A)
+  assert sci.set_port1("SEN0114") == SCI.ERR_CODE_NONE
+  assert sci.get_port1()[2] == "SEN0114"
+  # The failed read is not cached either
+  assert sci.check_sku(SCI.ePort1, "SEN0114") == SCI.ERR_CODE_NONE
+
+def test_catalogue_version_read_again_after_failure(sci, module, tmp_path):
+  path = str(tmp_path / "catalogue.json")
+  sci.enable_sku_catalogue_cache(path)
+  module.inject_fault(module.eFaultFailed, cmd = SCI.CMD_GET_VERSION)
+  skus = sci.get_analog_sensor_sku()
+  assert skus and not os.path.exists(path)
+  assert sci.get_analog_sensor_sku() == skus
+  assert os.path.exists(path)
+  assert sci.get_analog_sensor_sku() == skus
+  assert module.get_stats()["commands"][SCI.CMD_SKU_A] == 2
+
+@pytest.fixture
+def shared(bus):
+  module = bus.add_module(DFRobot_RP2040_SCI_SimModule(0x22, ("SEN0161", "SEN0334,SEN0228", "SEN0334"), latency = 0))
+  sci = DFRobot_RP2040_SCI_Sim(0x22, bus)
+  assert sci.begin() == 0
+  return sci, module
+
+def test_snapshot_sku_is_port_sku_list(shared):
+  sci = shared[0]
+  readings = sci.get_snapshot(SCI.ePort2)[1]
+  assert [(r.sku, r.key) for r in readings] == [("SEN0334,SEN0228", "Temp_Air"), ("SEN0334,SEN0228", "Humi_Air"), ("SEN0334,SEN0228", "Light")]
+
+def test_batch_reads_shared_port_from_module(shared):
+  sci, module = shared
+  rslt = sci.get_batch([(SCI.eALL, None, "Temp_Air"), (SCI.ePort2, "SEN0228", "Temp_Air"), (SCI.eALL, "SEN0228", "Light"), (SCI.ePort3, "SEN0334", "Humi_Air")])
+  assert rslt == [SCI.ERR_CODE_NONE, [["28.65,28.65", "C,C"], ["", ""], ["235.40", "lx"], ["30.12", "%RH"]]]
+  commands = module.get_stats()["commands"]
+  assert (commands[SCI.CMD_GET_KEY_VALUE2], commands[SCI.CMD_GET_KEY_UINT2]) == (2, 2)
+
+def test_prefetch_reads_shared_port_from_module(shared):
+  sci, module = shared
+  sci.enable_prefetch(period = 0.05, max_age = 5)
+  try:
+    deadline = time.time() + 2
+    while sci.get_prefetch_stats()["refreshes"] == 0 and time.time() < deadline:
+      time.sleep(0.01)
+    before = sci.get_prefetch_stats()
+    assert sci.get_value2(SCI.ePort3, "SEN0334", "Temp_Air") == "28.65"
+    assert sci.get_value2(SCI.ePort2, "SEN0228", "Temp_Air") == ""
+    assert sci.get_unit2(SCI.ePort2, "SEN0228", "Light") == "lx"
+    stats = sci.get_prefetch_stats()
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (1, 2)
+  finally:
+    sci.enable_prefetch(False)
+
+def test_prefetch_discards_snapshot_read_across_invalidation(sci, module):
+  module.set_latency(0.5, SCI.CMD_GET_INFO)
+  sci.enable_prefetch(period = 0.05, max_age = 10)
+  try:
+    # The prefetch thread is waiting for the response of CMD_GET_INFO with pH 7.00
+    time.sleep(0.2)
+    module.set_sensor("SEN0161", module.eKindAnalog, [("pH", 4.0, "")])
+    sci._invalidate_schema()
+    deadline = time.time() + 5
+    while sci.get_prefetch_stats()["refreshes"] == 0 and time.time() < deadline:
+      time.sleep(0.01)
+    hits = sci.get_prefetch_stats()["hits"]
+    assert sci.get_value0("pH") == "4.00"
+    assert sci.get_prefetch_stats()["hits"] == hits + 1
+  finally:
+    sci.enable_prefetch(False)
+
+def test_prefetch_follows_sensor_changed_on_module(bus, sci):
+  sci.enable_prefetch(period = 0.05, max_age = 10)
+  try:
+    deadline = time.time() + 2
+    while sci.get_prefetch_stats()["refreshes"] == 0 and time.time() < deadline:
+      time.sleep(0.01)
+    # Another host configures port2, the prefetched snapshot of sci still shows the old sensor
+    assert DFRobot_RP2040_SCI_Sim(0x21, bus).set_port2("SEN0228") == SCI.ERR_CODE_NONE
+    deadline = time.time() + 5
+    while "Light" not in [r.key for r in sci.get_snapshot(SCI.eALL)[1]] and time.time() < deadline:
+      time.sleep(0.05)
+    readings = sci.get_snapshot(SCI.eALL)[1]
+    assert [(r.port, r.sku, r.key) for r in readings] == [(SCI.ePort1, "SEN0161", "pH"), (SCI.ePort2, "SEN0228", "Light")]
+    assert sci.get_value1(SCI.ePort2, "Light") == "235.40"
+  finally:
+    sci.enable_prefetch(False)
+  readings = sci.get_snapshot(SCI.eALL)[1]
+  assert [(r.port, r.sku) for r in readings] == [(SCI.ePort1, "SEN0161"), (SCI.ePort2, "SEN0228")]
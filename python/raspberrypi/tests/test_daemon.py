@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_daemon.py
+  @brief Round trip of the commands and the snapshot pushes between DFRobot_RP2040_SCI_Daemon and its clients
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import os
+import stat
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+import pytest
+
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI as SCI, SCIReading
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim
+from DFRobot_RP2040_SCI_Daemon import DFRobot_RP2040_SCI_Daemon, DFRobot_RP2040_SCI_Client
+
+@pytest.fixture
+def daemon(tmp_path, sci, module):
+  module.set_latency(0)
+  daemon = DFRobot_RP2040_SCI_Daemon(str(tmp_path / "sci.sock"), period = 0.05)
+  daemon.add_module(sci)
+  daemon.start()
+  yield daemon
+  daemon.stop()
+
+@pytest.fixture
+def client(daemon, tmp_path):
+  client = DFRobot_RP2040_SCI_Client(0x21, str(tmp_path / "sci.sock"), timeout = 2)
+  yield client
+  client.close()
+
+def test_round_trip(client):
+  assert client.get_modules() == [[1, 0x21]]
+  assert client.get_version() == 0x0102
+  assert client.get_values(client.eALL) == "7.00,28.65,30.12"
+  assert client.get_value2(SCI.ePort2, "SEN0334", "Humi_Air") == "30.12"
+  assert client.set_refresh_rate(SCI.eRefreshRate3s) == SCI.ERR_CODE_NONE
+  assert client.get_refresh_rate() == [SCI.ERR_CODE_NONE, SCI.eRefreshRate3s]
+  snapshot = client.get_snapshot(SCI.eALL)
+  assert snapshot[0] == SCI.ERR_CODE_NONE
+  assert isinstance(snapshot[1][0], SCIReading)
+  assert [(r.port, r.sku, r.key, r.value) for r in snapshot[1]] == \
+         [(1, "SEN0161", "pH", 7.0), (2, "SEN0334", "Temp_Air", 28.65), (2, "SEN0334", "Humi_Air", 30.12)]
+
+def test_unknown_module(daemon, tmp_path):
+  client = DFRobot_RP2040_SCI_Client(0x23, str(tmp_path / "sci.sock"), timeout = 2)
+  with pytest.raises(ValueError):
+    client.get_version()
+  client.close()
+
+def test_subscribe(client):
+  pushed = queue.Queue()
+  client.subscribe(queue = pushed)
+  _, t, snapshot = pushed.get(timeout = 3)
+  assert snapshot[0] == SCI.ERR_CODE_NONE
+  assert [r.key for r in snapshot[1]] == ["pH", "Temp_Air", "Humi_Air"]
+  client.unsubscribe()
+
+def test_stop_disconnects_clients(daemon, client):
+  assert client.get_version() == 0x0102
+  daemon.stop()
+  with pytest.raises(IOError):
+    client.get_version()
+
+def test_late_answer_is_dropped(daemon, module, tmp_path):
+  client = DFRobot_RP2040_SCI_Client(0x21, str(tmp_path / "sci.sock"), timeout = 0.3)
+  module.set_latency(0.5, SCI.CMD_SET_IF0)
+  with pytest.raises(IOError):
+    client.set_port1("SEN0161")
+  assert client.get_version() == 0x0102
+  assert client.get_units(SCI.eALL) == ",C,%RH"
+  client.close()
+
+def test_command_error_keeps_client(client):
+  with pytest.raises(ValueError):
+    client.get_batch([[SCI.ePort1]])
+  with pytest.raises(ValueError):
+    client.get_value0()
+  assert client.get_version() == 0x0102
+
+def test_same_address_twice(daemon, bus):
+  with pytest.raises(ValueError):
+    daemon.add_module(DFRobot_RP2040_SCI_Sim(0x21))
+
+def test_same_address_on_two_buses(daemon, tmp_path):
+  other = DFRobot_RP2040_SCI_Sim(0x21)
+  assert other.begin() == 0
+  other.set_refresh_rate(SCI.eRefreshRate3s)
+  daemon.add_module(other, 3)
+  first = DFRobot_RP2040_SCI_Client(0x21, str(tmp_path / "sci.sock"), timeout = 2)
+  third = DFRobot_RP2040_SCI_Client(0x21, str(tmp_path / "sci.sock"), timeout = 2, bus = 3)
+  assert first.get_modules() == [[1, 0x21], [3, 0x21]]
+  assert first.get_refresh_rate() == [SCI.ERR_CODE_NONE, SCI.eRefreshRate1s]
+  assert third.get_refresh_rate() == [SCI.ERR_CODE_NONE, SCI.eRefreshRate3s]
+  first.close()
+  third.close()
+
+def test_socket_is_not_world_writable(daemon, tmp_path):
+  assert stat.S_IMODE(os.stat(str(tmp_path / "sci.sock")).st_mode) == 0o660
+
+def test_socket_directory_is_created(tmp_path):
+  path = str(tmp_path / "run" / "daemon.sock")
+  daemon = DFRobot_RP2040_SCI_Daemon(path, period = 0.05, mode = 0o600)
+  daemon.start()
+  try:
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+  finally:
+    daemon.stop()
@@ -0,0 +1,34 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_filter.py
+  @brief Deadband filter of snapshots: deadbands and heartbeat
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import time
+
+from DFRobot_RP2040_SCI import SCIReading
+from DFRobot_RP2040_SCI_Filter import DFRobot_RP2040_SCI_Filter
+
+def _snapshot(value):
+  return [0, [SCIReading(2, "SEN0334", "Temp_Air", value, "C", "12:30:45")]]
+
+def test_deadband_drops_small_changes():
+  flt = DFRobot_RP2040_SCI_Filter(absolute = 0.5)
+  assert len(flt.filter(_snapshot(28.0), 0)[1]) == 1
+  assert flt.filter(_snapshot(28.4), 1)[1] == []
+  assert len(flt.filter(_snapshot(28.6), 2)[1]) == 1
+
+def test_heartbeat_ignores_wall_clock_steps(monkeypatch):
+  flt = DFRobot_RP2040_SCI_Filter(absolute = 1, heartbeat = 0.05)
+  assert len(flt.filter(_snapshot(28.0))[1]) == 1
+  assert flt.filter(_snapshot(28.0))[1] == []
+  # The wall clock is set back, e.g. by NTP
+  monkeypatch.setattr(time, "time", lambda: 0.0)
+  time.sleep(0.1)
+  assert len(flt.filter(_snapshot(28.0))[1]) == 1
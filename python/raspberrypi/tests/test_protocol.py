@@ -0,0 +1,147 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_protocol.py
+  @brief Packet protocol of the driver against the simulated module: framing, long responses, faults, retries and resync
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import time
+
+import pytest
+
+from conftest import BIG_SENSOR
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI as SCI, DFRobot_RP2040_SCI_IIC, DFRobot_RP2040_SCI_Transport
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim
+
+def test_information_has_one_timestamp_per_sensor(sci):
+  info = sci.get_information(SCI.eALL, True)
+  assert len([item for item in info.split(",") if item.count(":") == 3]) == 2
+  readings = sci.get_snapshot(SCI.eALL)[1]
+  assert [(r.port, r.key, r.value) for r in readings] == [(1, "pH", 7.0), (2, "Temp_Air", 28.65), (2, "Humi_Air", 30.12)]
+  assert readings[2].timestamp and readings[2].timestamp == readings[1].timestamp
+
+def test_long_response_is_streamed(sci, module):
+  module.set_sensor(*BIG_SENSOR)
+  assert sci.set_port2(BIG_SENSOR[0]) == SCI.ERR_CODE_NONE
+  assert sci.set_port3(BIG_SENSOR[0]) == SCI.ERR_CODE_NONE
+  info = sci.get_information(SCI.eALL, True)
+  assert len(info) > 255
+  assert info.endswith("Channel15:115.00 mV")
+  readings = sci.get_snapshot(SCI.eALL)[1]
+  assert len(readings) == 33
+  assert (readings[-1].port, readings[-1].sku, readings[-1].value) == (SCI.ePort3, BIG_SENSOR[0], 115.0)
+  assert sci.get_value2(SCI.ePort3, BIG_SENSOR[0], "Channel15") == "115.00"
+  assert module.get_stats()["resets"] == 1
+
+def test_retry_after_dropped_response(sci, module):
+  sci.set_retry(attempts = 2, attempt_timeout = 0.05)
+  module.inject_fault(module.eFaultDrop, cmd = SCI.CMD_GET_VALUE)
+  assert sci.get_values(SCI.eALL) == "7.00,28.65,30.12"
+  assert sci.get_retry_stats()["retries"] == 1
+  assert sci.get_retry_stats()["exhausted"] == 0
+
+def test_readback_confirms_applied_setting(sci, module):
+  sci.set_retry(attempts = 2, attempt_timeout = 0.05)
+  module.inject_fault(module.eFaultWrongCommand, cmd = SCI.CMD_SET_REFRESH_TIME)
+  assert sci.set_refresh_rate(SCI.eRefreshRate3s) == SCI.ERR_CODE_NONE
+  stats = sci.get_retry_stats()
+  assert (stats["readbacks"], stats["confirmed"], stats["retries"]) == (1, 1, 0)
+  # The setting and its readback, CMD_SET_REFRESH_TIME without argument
+  assert module.get_stats()["commands"][SCI.CMD_SET_REFRESH_TIME] == 2
+  assert sci.get_refresh_rate() == [SCI.ERR_CODE_NONE, SCI.eRefreshRate3s]
+
+def test_readback_retries_lost_setting(sci, module):
+  sci.set_retry(attempts = 2, attempt_timeout = 0.05)
+  module.inject_fault(module.eFaultDrop, cmd = SCI.CMD_SET_REFRESH_TIME)
+  assert sci.set_refresh_rate(SCI.eRefreshRate3s) == SCI.ERR_CODE_NONE
+  stats = sci.get_retry_stats()
+  assert (stats["readbacks"], stats["confirmed"], stats["retries"]) == (1, 0, 1)
+  assert module.get_stats()["commands"][SCI.CMD_SET_REFRESH_TIME] == 3
+
+def test_stale_response_resets_without_resync(sci, module):
+  module.inject_fault(module.eFaultStale)
+  assert sci.get_values(SCI.eALL) == ""
+  assert module.get_stats()["resets"] == 2
+  assert sci.get_values(SCI.eALL) == "7.00,28.65,30.12"
+
+def test_resync_skips_stale_response(sci, module):
+  sci.set_resync()
+  module.inject_fault(module.eFaultStale)
+  assert sci.get_values(SCI.eALL) == "7.00,28.65,30.12"
+  module.inject_fault(module.eFaultStale, cmd = SCI.CMD_GET_INFO)
+  assert sci.get_information(SCI.eALL, False) == "pH:7.00 ,Temp_Air:28.65 C,Humi_Air:30.12 %RH"
+  assert sci.get_resync_stats()["resyncs"] == 2
+  assert module.get_stats()["resets"] == 1
+
+def test_resync_skips_noise(sci, module):
+  sci.set_resync()
+  module.inject_fault(module.eFaultNoise)
+  assert sci.get_keys(SCI.eALL) == "pH,Temp_Air,Humi_Air"
+  stats = sci.get_resync_stats()
+  assert (stats["resyncs"], stats["skipped"], stats["failed"]) == (1, len(module.NOISE), 0)
+  assert module.get_stats()["resets"] == 1
+
+def test_resync_limit_falls_back_to_reset(sci, module):
+  sci.set_resync(True, 20)
+  module.inject_fault(module.eFaultStale)
+  assert sci.get_values(SCI.eALL) == ""
+  assert sci.get_resync_stats()["failed"] == 1
+  assert module.get_stats()["resets"] == 2
+
+def test_reset_after_timeout_within_deadline(sci, module):
+  module.inject_fault(module.eFaultDrop, cmd = SCI.CMD_GET_VALUE)
+  with sci.deadline(0.05):
+    assert sci.get_values(SCI.eALL) == ""
+  assert module.get_stats()["resets"] == 2
+  assert sci.get_keys(SCI.eALL) == "pH,Temp_Air,Humi_Air"
+
+def test_coalesced_waiter_keeps_deadline(sci, module):
+  import time
+  import threading
+  sci.enable_coalescing()
+  module.set_latency(0.3, SCI.CMD_GET_VALUE)
+  owner = threading.Thread(target = sci.get_values, args = (SCI.eALL,))
+  owner.start()
+  time.sleep(0.05)
+  t = time.time()
+  with sci.deadline(0.03):
+    assert sci.get_values(SCI.eALL) == ""
+  elapsed = time.time() - t
+  owner.join()
+  assert sci.get_lock_stats()["coalesced"] == 1
+  assert elapsed < 0.15
+
+def test_resync_gives_up_when_nothing_follows(sci, module):
+  sci.set_resync()
+  module.inject_fault(module.eFaultWrongCommand, cmd = SCI.CMD_GET_VALUE)
+  t = time.time()
+  assert sci.get_values(SCI.eALL) == ""
+  assert time.time() - t < 1.0
+  assert sci.get_resync_stats()["failed"] == 1
+  assert module.get_stats()["resets"] == 2
+  assert sci.get_values(SCI.eALL) == "7.00,28.65,30.12"
+
+def test_resync_waits_on_high_idle_bus(sci, module):
+  sci.set_resync()
+  module.set_latency(0.2, SCI.CMD_GET_VALUE)
+  module.inject_fault(module.eFaultIdleHigh, cmd = SCI.CMD_GET_VALUE)
+  assert sci.get_values(SCI.eALL) == "7.00,28.65,30.12"
+  assert sci.get_resync_stats() == {"resyncs": 0, "skipped": 0, "failed": 0}
+  assert module.get_stats()["resets"] == 1
+
+def test_transport_interface(sci):
+  for name in ("_send_packet", "_recv_data", "_recv_into", "_bus_key", "_device_key"):
+    for cls in (DFRobot_RP2040_SCI_IIC, DFRobot_RP2040_SCI_Sim):
+      assert name in vars(cls), (cls.__name__, name)
+  assert isinstance(sci, DFRobot_RP2040_SCI_Transport)
+  assert bytearray(sci._recv_data(3)) == bytearray(3)
+
+  class Unwired(SCI):
+    pass
+  with pytest.raises(NotImplementedError):
+    Unwired()._send_packet([SCI.CMD_GET_VERSION, 0, 0])
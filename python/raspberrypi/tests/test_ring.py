@@ -0,0 +1,63 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file test_ring.py
+  @brief Snapshots published into the shared memory ring buffer and read back by a reader
+  @copyright   Copyright (c) 2022 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license     The MIT License (MIT)
+  @author [Arya](xue.peng@dfrobot.com)
+  @maintainer [qsjhyy](yihuan.huang@dfrobot.com)
+  @version  V1.0
+  @date  2022-07-20
+  @url https://github.com/DFRobot/DFRobot_RP2040_SCI
+'''
+import pytest
+
+from conftest import BIG_SENSOR
+from DFRobot_RP2040_SCI import DFRobot_RP2040_SCI as SCI, SCIReading
+from DFRobot_RP2040_SCI_Sim import DFRobot_RP2040_SCI_Sim, DFRobot_RP2040_SCI_SimModule
+from DFRobot_RP2040_SCI_Ring import DFRobot_RP2040_SCI_Ring, DFRobot_RP2040_SCI_RingReader
+
+@pytest.fixture
+def snapshot(bus):
+  module = DFRobot_RP2040_SCI_SimModule(0x22, ("SEN0161", "SEN0334,SEN0228", BIG_SENSOR[0]), latency = 0)
+  module.set_sensor(*BIG_SENSOR)
+  bus.add_module(module)
+  sci = DFRobot_RP2040_SCI_Sim(0x22, bus)
+  assert sci.begin() == 0
+  snapshot = sci.get_snapshot(SCI.eALL)
+  assert len(snapshot[1]) == 20
+  return sci, snapshot
+
+def _round_trip(path, sci, snapshot, **sizes):
+  ring = DFRobot_RP2040_SCI_Ring(path, slots = 4, **sizes)
+  reader = DFRobot_RP2040_SCI_RingReader(path)
+  try:
+    ring.publish(sci, 1.5, snapshot)
+    return reader.get_latest()[0]
+  finally:
+    reader.close()
+    ring.close(unlink = True)
+
+def test_ring_round_trip(tmp_path, snapshot):
+  sci, snap = snapshot
+  sample = _round_trip(str(tmp_path / "ring"), sci, snap, readings = 32)
+  assert (sample.index, sample.t, sample.addr, sample.truncated) == (0, 1.5, 0x22, False)
+  assert sample.readings == snap[1]
+  assert sample.readings[3].sku == "SEN0334,SEN0228"
+
+def test_ring_flags_dropped_readings(tmp_path, snapshot):
+  sci, snap = snapshot
+  sample = _round_trip(str(tmp_path / "ring"), sci, snap)
+  assert sample.truncated
+  assert sample.readings == snap[1][:8]
+
+def test_ring_cuts_strings_at_character_boundary(tmp_path, snapshot):
+  sci = snapshot[0]
+  reading = SCIReading(SCI.ePort2, "SEN0334,SEN0228", "Temp_Air", 28.65, u"C°°°°", "12:30:45")
+  sample = _round_trip(str(tmp_path / "ring"), sci, [SCI.ERR_CODE_NONE, [reading]], sku = 8)
+  assert sample.truncated
+  assert (sample.readings[0].sku, sample.readings[0].unit) == ("SEN0334,", u"C°°°")
+
+def test_ring_rejects_oversize_fields(tmp_path):
+  with pytest.raises(ValueError):
+    DFRobot_RP2040_SCI_Ring(str(tmp_path / "ring"), key = 256)